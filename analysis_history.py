@@ -0,0 +1,55 @@
+import os
+from datetime import datetime
+from sqlalchemy import tuple_
+from models import Analysis
+
+# Analiz geçmişi sayfalama ayarları
+HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', 20))
+HISTORY_MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(analysis):
+    """Sayfanın son analizinden bir sonraki sayfanın imlecini üretir"""
+    return f"{analysis.analysis_date.isoformat()}_{analysis.id}"
+
+
+def decode_cursor(cursor):
+    """İmleci (analysis_date, id) olarak çözer, geçersizse None döndürür"""
+    if not cursor:
+        return None
+    date_part, _, id_part = cursor.rpartition('_')
+    try:
+        return datetime.fromisoformat(date_part), int(id_part)
+    except ValueError:
+        return None
+
+
+def history_page_query(project_id, before=None, limit=HISTORY_PAGE_SIZE):
+    """Projenin analizlerini yeniden eskiye, before imlecinden sonrasıyla sınırlı döndüren sorgu"""
+    query = Analysis.query.filter(Analysis.project_id == project_id)
+    if before is not None:
+        # (analysis_date, id) üzerinde anahtar tabanlı sayfalama; OFFSET gibi önceki
+        # sayfaları taramaz, ix_analysis_project_id_analysis_date üzerinden doğrudan başlar
+        query = query.filter(tuple_(Analysis.analysis_date, Analysis.id) < before)
+    return query.order_by(Analysis.analysis_date.desc(), Analysis.id.desc()).limit(limit)
+
+
+def history_page(project_id, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """Bir sayfa analiz, sonraki sayfanın imleci ve projenin en son analizini döndürür
+
+    İlk sayfada en son analiz aynı sorgunun ilk satırıdır; sonraki sayfalarda
+    indeksten tek satırlık ayrı bir okuma yapılır.
+    """
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    before = decode_cursor(cursor)
+
+    # Bir fazla satır okunarak sonraki sayfanın olup olmadığı anlaşılır
+    rows = history_page_query(project_id, before, limit + 1).all()
+    analyses = rows[:limit]
+    next_cursor = encode_cursor(analyses[-1]) if len(rows) > limit else None
+
+    if before is None:
+        latest_analysis = analyses[0] if analyses else None
+    else:
+        latest_analysis = history_page_query(project_id, limit=1).first()
+    return analyses, next_cursor, latest_analysis
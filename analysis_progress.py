@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import threading
+
+# İlerleme kayıtları ayarları
+# Olaylar işçinin yazdığı, web sürecinin okuduğu dosyalardır; bu yüzden web ve işçi
+# süreçleri aynı dosya sistemini (aynı makine ya da ortak bir disk) görmelidir.
+# Ayrı makinelerde çalışıyorlarsa PROGRESS_DIR ortak bir diske ayarlanmalıdır.
+PROGRESS_DIR = os.getenv('PROGRESS_DIR', os.path.join('instance', 'progress'))
+PROGRESS_RETENTION_SECONDS = int(os.getenv('PROGRESS_RETENTION_SECONDS', 24 * 60 * 60))
+# Yeni olay yoksa ilerleme isteğinin yanıt vermeden bekleyeceği en uzun süre. Senkron
+# web işçileri (gunicorn sync) bu süre boyunca meşgul kalır, bu yüzden varsayılan 0'dır
+PROGRESS_WAIT_SECONDS = float(os.getenv('PROGRESS_WAIT_SECONDS', 0))
+PROGRESS_POLL_SECONDS = float(os.getenv('PROGRESS_POLL_SECONDS', 0.5))
+# Tarayıcının yanıt kapandıktan sonra yeniden sorması için beklediği süre
+PROGRESS_RETRY_MS = int(os.getenv('PROGRESS_RETRY_MS', 2000))
+
+
+def progress_path(job_id):
+    return os.path.join(PROGRESS_DIR, f"job-{job_id}.jsonl")
+
+
+def _prune_old_files(now):
+    """Saklama süresi dolan ilerleme dosyalarını siler"""
+    try:
+        names = os.listdir(PROGRESS_DIR)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(PROGRESS_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > PROGRESS_RETENTION_SECONDS:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+class ProgressWriter:
+    """Çalışan analizin olaylarını iş başına bir JSON satırları dosyasına yazar
+
+    Her deneme dosyayı baştan oluşturur; ilk satırdaki deneme numarası okuyucuların
+    eski bir denemeye ait konumla devam etmesini engeller.
+    """
+
+    def __init__(self, job_id, attempt, analysis_id, total):
+        self.job_id = job_id
+        self.attempt = attempt
+        self._lock = threading.Lock()
+
+        os.makedirs(PROGRESS_DIR, exist_ok=True)
+        _prune_old_files(time.time())
+
+        path = progress_path(job_id)
+        start = {'type': 'start', 'attempt': attempt, 'analysisId': analysis_id, 'total': total}
+        # Okuyucular yarım yazılmış bir dosya görmesin diye önce geçici dosyaya yazılır
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(start) + '\n')
+        os.replace(tmp_path, path)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _write(self, event):
+        line = json.dumps(event, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line)
+            self._file.flush()
+
+    def point(self, index, coordinates, match):
+        """Sonucu gelen bir noktayı yazar; veri alınamadıysa match None olur"""
+        lat, lon = coordinates.replace('@', '').split(',')[:2]
+        event = {'type': 'point', 'index': index, 'lat': float(lat), 'lon': float(lon), 'ok': match is not None}
+        if match is not None:
+            event.update({'position': match['position'], 'rating': match['rating'], 'title': match['title']})
+        self._write(event)
+
+    def finish(self, status, analysis_id=None, error=None):
+        """Denemenin sonucunu yazar ve dosyayı kapatır"""
+        self._write({'type': 'finish', 'status': status, 'analysisId': analysis_id, 'error': error})
+        with self._lock:
+            self._file.close()
+
+
+def read_progress(job_id, cursor=None):
+    """cursor ('deneme:bayt') sonrasındaki olayları [(olay_id, olay), ...] ve yeni cursor olarak döndürür"""
+    try:
+        f = open(progress_path(job_id), 'rb')
+    except OSError:
+        return [], cursor
+
+    with f:
+        first_line = f.readline()
+        if not first_line.endswith(b'\n'):
+            return [], cursor
+        attempt = json.loads(first_line).get('attempt')
+
+        offset = 0
+        if cursor:
+            cursor_attempt, _, cursor_offset = cursor.partition(':')
+            # Yeni bir deneme başladıysa dosya baştan okunur
+            if cursor_attempt == str(attempt) and cursor_offset.isdigit():
+                offset = int(cursor_offset)
+
+        f.seek(offset)
+        chunk = f.read()
+
+    events = []
+    position = offset
+    for line in chunk.splitlines(keepends=True):
+        # Yazılması sürmekte olan son satır bir sonraki okumaya bırakılır
+        if not line.endswith(b'\n'):
+            break
+        position += len(line)
+        events.append((f"{attempt}:{position}", json.loads(line)))
+
+    new_cursor = f"{attempt}:{position}" if events or cursor is None else cursor
+    return events, new_cursor
@@ -0,0 +1,139 @@
+import os
+import random
+from datetime import datetime, timedelta
+from models import db, ScheduledAnalysis
+from job_queue import enqueue_analysis
+
+# Zamanlayıcı ayarları
+SCHEDULER_TICK_SECONDS = int(os.getenv('SCHEDULER_TICK_SECONDS', 60))
+SCHEDULER_JITTER_MINUTES = int(os.getenv('SCHEDULER_JITTER_MINUTES', 30))
+SCHEDULER_HOURLY_CAPACITY = int(os.getenv('SCHEDULER_HOURLY_CAPACITY', 60))
+SCHEDULER_DISPATCH_BATCH = int(os.getenv('SCHEDULER_DISPATCH_BATCH', 5))
+
+FREQUENCIES = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+    'monthly': timedelta(days=30)
+}
+
+
+def _hour_start(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _hour_load(hour_start, exclude_id=None):
+    """Verilen saat dilimine planlanmış aktif zamanlama sayısını döndürür"""
+    query = ScheduledAnalysis.query.filter(
+        ScheduledAnalysis.is_active == True,
+        ScheduledAnalysis.next_run >= hour_start,
+        ScheduledAnalysis.next_run < hour_start + timedelta(hours=1)
+    )
+    if exclude_id is not None:
+        query = query.filter(ScheduledAnalysis.id != exclude_id)
+    return query.count()
+
+
+def plan_next_run(frequency, base_time=None, schedule_id=None):
+    """Sonraki çalışma zamanını rastgele sapma ve saatlik kapasiteye göre hesaplar
+
+    Tekrarlanan çalışmalar için kullanılır; çalışma günün aynı saatinde kalır.
+    """
+    base_time = base_time or datetime.utcnow()
+    interval = FREQUENCIES.get(frequency, FREQUENCIES['daily'])
+
+    jitter = timedelta(minutes=random.uniform(-SCHEDULER_JITTER_MINUTES, SCHEDULER_JITTER_MINUTES))
+    target = base_time + interval + jitter
+
+    # Hedef saat dilimi doluysa kapasitesi olan ilk sonraki dilime kaydır
+    hour_start = _hour_start(target)
+    for offset in range(24):
+        candidate = hour_start + timedelta(hours=offset)
+        if _hour_load(candidate, exclude_id=schedule_id) < SCHEDULER_HOURLY_CAPACITY:
+            if offset == 0:
+                return target
+            return candidate + timedelta(seconds=random.uniform(0, 3600))
+
+    # Sonraki 24 saatin tamamı doluysa hedef zamanı koru
+    return target
+
+
+def plan_first_run(frequency, base_time=None, schedule_id=None):
+    """İlk çalışma zamanını sıklık penceresindeki en az yüklü saat dilimine yerleştirir
+
+    Sonraki çalışmalar bu saati koruduğu için zamanlamalar gün (haftalık/aylık
+    sıklıkta hafta/ay) boyunca yayılır; eşit yükteki dilimler arasından rastgele seçilir.
+    """
+    base_time = base_time or datetime.utcnow()
+    interval = FREQUENCIES.get(frequency, FREQUENCIES['daily'])
+    first_hour = _hour_start(base_time) + timedelta(hours=1)
+    hours = int(interval.total_seconds() // 3600)
+
+    # Penceredeki planlı çalışmalar tek sorguda okunup saat dilimlerine dağıtılır
+    query = db.session.query(ScheduledAnalysis.next_run).filter(
+        ScheduledAnalysis.is_active == True,
+        ScheduledAnalysis.next_run >= first_hour,
+        ScheduledAnalysis.next_run < first_hour + timedelta(hours=hours)
+    )
+    if schedule_id is not None:
+        query = query.filter(ScheduledAnalysis.id != schedule_id)
+    load = [0] * hours
+    for (next_run,) in query:
+        load[int((next_run - first_hour).total_seconds() // 3600)] += 1
+
+    lowest = min(load)
+    offset = random.choice([index for index, count in enumerate(load) if count == lowest])
+    return first_hour + timedelta(hours=offset, seconds=random.uniform(0, 3600))
+
+
+def schedule_project(project_id, frequency):
+    """Proje için zamanlamayı oluşturur veya günceller"""
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Geçersiz sıklık: {frequency}")
+
+    schedule = ScheduledAnalysis.query.filter_by(project_id=project_id).first()
+    if schedule is None:
+        schedule = ScheduledAnalysis(project_id=project_id)
+        db.session.add(schedule)
+
+    schedule.frequency = frequency
+    schedule.is_active = True
+    schedule.next_run = plan_first_run(frequency, schedule_id=schedule.id)
+    db.session.commit()
+    return schedule
+
+
+def dispatch_due_schedules(now=None):
+    """Zamanı gelen zamanlamaları kuyruğa ekler ve bir sonraki çalışmayı planlar"""
+    now = now or datetime.utcnow()
+
+    # Kesintiden sonra biriken çalışmalar her turda en fazla SCHEDULER_DISPATCH_BATCH kadar gönderilir
+    due = db.session.query(
+        ScheduledAnalysis.id,
+        ScheduledAnalysis.project_id,
+        ScheduledAnalysis.frequency,
+        ScheduledAnalysis.next_run
+    ).filter(
+        ScheduledAnalysis.is_active == True,
+        ScheduledAnalysis.next_run <= now
+    ).order_by(ScheduledAnalysis.next_run).limit(SCHEDULER_DISPATCH_BATCH).all()
+
+    dispatched = 0
+    for schedule_id, project_id, frequency, due_at in due:
+        # Kaçırılan çalışmalar tek çalışmada birleşir, sonraki zaman şimdiden itibaren planlanır
+        next_run = plan_next_run(frequency, now, schedule_id)
+
+        # Koşullu güncelleme: aynı zamanlamayı başka bir süreç gönderdiyse atla
+        updated = ScheduledAnalysis.query.filter(
+            ScheduledAnalysis.id == schedule_id,
+            ScheduledAnalysis.next_run == due_at
+        ).update({
+            'last_run': now,
+            'next_run': next_run
+        }, synchronize_session=False)
+        db.session.commit()
+
+        if updated == 1:
+            enqueue_analysis(project_id)
+            dispatched += 1
+
+    return dispatched
@@ -0,0 +1,59 @@
+from models import Analysis
+
+# Sıralama dağılımı aralıkları ve analiz tablosundaki karşılık gelen sütunlar
+RANK_BUCKETS = (
+    ('rank_1_3', '1-3. sıra'),
+    ('rank_4_10', '4-10. sıra'),
+    ('rank_11_20', '11-20. sıra'),
+    ('rank_20_plus', '20+ sıra'),
+    ('rank_not_visible', 'Görünmüyor')
+)
+RANK_BUCKET_COLUMNS = tuple(getattr(Analysis, name) for name, _ in RANK_BUCKETS)
+
+
+def rank_bucket(position):
+    """Sıranın dağılımdaki aralık indeksini döndürür"""
+    if not position:
+        return 4
+    if position <= 3:
+        return 0
+    if position <= 10:
+        return 1
+    if position <= 20:
+        return 2
+    return 3
+
+
+def rank_distribution(positions):
+    """[1-3, 4-10, 11-20, 20+, Görünmüyor] aralıklarındaki nokta sayılarını döndürür"""
+    distribution = [0, 0, 0, 0, 0]
+    for position in positions:
+        distribution[rank_bucket(position)] += 1
+    return distribution
+
+
+def analysis_distribution(analysis):
+    """Analizde saklanan dağılımı döndürür; eski kayıtlarda noktalardan hesaplanır"""
+    distribution = [getattr(analysis, name) for name, _ in RANK_BUCKETS]
+    if None in distribution:
+        return rank_distribution(point.position for point in analysis.points)
+    return distribution
+
+
+def apply_summary(analysis, positions):
+    """Nokta sıralamalarından türetilen özet sütunlarını analiz satırına yazar
+
+    Analiz tamamlanırken bir kez çağrılır; panolar ve raporlar noktaları yeniden
+    taramak yerine bu sütunları okur.
+    """
+    positions = list(positions)
+    visible = [position for position in positions if position]
+
+    analysis.total_points = len(positions)
+    analysis.visible_points = len(visible)
+    analysis.average_position = sum(visible) / len(visible) if visible else None
+    analysis.best_position = min(visible) if visible else None
+    analysis.worst_position = max(visible) if visible else None
+    analysis.visibility_rate = (len(visible) / len(positions) * 100) if positions else 0
+    for (name, _), count in zip(RANK_BUCKETS, rank_distribution(positions)):
+        setattr(analysis, name, count)
@@ -1,18 +1,36 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_file, abort
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_file, abort, Response
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from models import db, User, Project, Analysis, AnalysisPoint, ScheduledAnalysis, SystemSettings
-from location_generator import LocationGenerator
-from rank_analyzer import RankAnalyzer
+from models import db, User, Project, Analysis, AnalysisPoint, ScheduledAnalysis, SystemSettings, AnalysisJob, CompetitorObservation
+from location_generator import LocationGenerator, PATTERNS, GRID_RESOLUTION_KM
+from rank_analyzer import RankAnalyzer, MAP_RENDERER
+from http_session import get_session_stats
+from serp_cache import get_serp_cache
+from serper_quota import get_serper_quota, key_fingerprint
+from job_queue import enqueue_analysis, enqueue_rematch, get_active_job, job_to_dict
+from analysis_progress import ProgressWriter, read_progress, PROGRESS_WAIT_SECONDS, PROGRESS_POLL_SECONDS, PROGRESS_RETRY_MS
+from analysis_scheduler import schedule_project
+from analysis_history import history_page, history_page_query, HISTORY_PAGE_SIZE
+from points_api import points_payload, payload_etag, encode_response, dumps as dumps_points
+from serp_archive import encode_places, store_payloads, prune_payloads, archive_stats, SERP_ARCHIVE_ENABLED
+from analysis_summary import apply_summary, analysis_distribution, RANK_BUCKET_COLUMNS
+from query_plans import run_check
+from rematch import rematch_project, REMATCH_WORKERS
+from competitors import (observation_rows, store_observations, delete_observations, top_competitors,
+                         competitor_history, backfill_observations, COMPETITOR_TRACKING_ENABLED, COMPETITOR_TOP_DEFAULT)
+from map_image import render_rank_map
+from sqlalchemy import func
+import click
 import os
+import time
+import shutil
 from datetime import datetime, timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
 from dotenv import load_dotenv
 from flask_migrate import Migrate
 import matplotlib
 matplotlib.use('Agg')  # GUI backend yerine Agg kullan
 import json
-from weasyprint import HTML
+from pdf_report import get_report_pdf, REPORT_PREGENERATE
 import base64
 from bs4 import BeautifulSoup
 from functools import wraps
@@ -25,6 +43,10 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///app.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Yeni proje formundaki yarıçap ve nokta sayısı kaydırıcılarının üst sınırları
+NEW_PROJECT_MAX_RADIUS_KM = 5
+NEW_PROJECT_MAX_POINTS = 32
+
 # Veritabanı ve login yöneticisini başlat
 db.init_app(app)
 migrate = Migrate(app, db)
@@ -32,10 +54,6 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
-# Zamanlanmış görevler için scheduler
-scheduler = BackgroundScheduler()
-scheduler.start()
-
 @login_manager.user_loader
 def load_user(user_id):
     return db.session.get(User, int(user_id))
@@ -105,6 +123,9 @@ def new_project():
         # Yeni parametreleri al
         num_points = int(request.form.get('num_points', 16))
         shape = request.form.get('shape', 'circle')
+        if shape not in PATTERNS:
+            flash('Geçersiz analiz şekli.')
+            return redirect(url_for('new_project'))
         
         project = Project(
             name=request.form.get('name'),
@@ -119,17 +140,23 @@ def new_project():
         db.session.add(project)
         db.session.commit()
         
-        # Analizi arka planda başlat
-        scheduler.add_job(
-            run_analysis,
-            args=[project.id],
-            id=f'initial_analysis_{project.id}'
-        )
+        # İlk analizi iş kuyruğuna ekle, işçi süreçleri arka planda çalıştırır
+        enqueue_analysis(project.id)
         
-        flash('Proje oluşturuldu. İlk analiz arka planda çalışıyor, sonuçlar hazır olduğunda görüntüleyebilirsiniz.')
+        # Her analizde nokta başına bir Serper çağrısı yapılır
+        calls = LocationGenerator(float(lat), float(lon), project.radius_km).estimate_points(shape, num_points)
+        flash(f'Proje oluşturuldu. İlk analiz arka planda çalışıyor, sonuçlar hazır olduğunda görüntüleyebilirsiniz. '
+              f'Her analiz {calls} nokta tarar ({calls} Serper çağrısı).')
         return redirect(url_for('project_detail', project_id=project.id))
     
-    return render_template('new_project.html')
+    # Formdaki en geniş ayarda (yarıçap ve nokta sayısı en fazla) şekillerin çağrı sayıları
+    generator = LocationGenerator(0, 0, NEW_PROJECT_MAX_RADIUS_KM)
+    max_calls = {shape: generator.estimate_points(shape, NEW_PROJECT_MAX_POINTS) for shape in PATTERNS}
+    return render_template('new_project.html',
+                         grid_resolution_m=int(GRID_RESOLUTION_KM * 1000),
+                         max_radius_km=NEW_PROJECT_MAX_RADIUS_KM,
+                         max_points=NEW_PROJECT_MAX_POINTS,
+                         max_calls=max_calls)
 
 @app.route('/project/<int:project_id>')
 @login_required
@@ -138,20 +165,45 @@ def project_detail(project_id):
     if project.user_id != current_user.id:
         return redirect(url_for('dashboard'))
     
-    # En son analizi kontrol et
-    latest_analysis = Analysis.query.filter_by(project_id=project_id).order_by(Analysis.analysis_date.desc()).first()
-    analyses = Analysis.query.filter_by(project_id=project_id).order_by(Analysis.analysis_date.desc()).all()
+    # Geçmiş sayfa sayfa gösterilir; en son analiz ilk sayfayla aynı indeks taramasından gelir
+    cursor = request.args.get('before')
+    analyses, next_cursor, latest_analysis = history_page(project_id, cursor)
     
-    analysis_status = 'completed' if latest_analysis and latest_analysis.map_file_path else 'running'
+    # Kuyrukta bekleyen veya çalışan iş varsa analiz devam ediyor sayılır
+    active_job = get_active_job(project_id)
+    analysis_status = 'running' if active_job else 'completed'
+    rematch_job = get_active_job(project_id, 'rematch')
     
     return render_template(
         'project_detail.html',
         project=project,
         analyses=analyses,
         latest_analysis=latest_analysis,
-        analysis_status=analysis_status
+        next_cursor=next_cursor,
+        is_first_page=not cursor,
+        analysis_status=analysis_status,
+        active_job=active_job,
+        rematch_job=rematch_job
     )
 
+@app.route('/project/<int:project_id>/rematch', methods=['POST'])
+@login_required
+def rematch_project_history(project_id):
+    project = Project.query.get_or_404(project_id)
+    if project.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    # Hedef işletme düzeltildiyse önce proje güncellenir, iş yeni adla eşleştirir
+    target_business = request.form.get('target_business', '').strip()
+    if target_business and target_business != project.target_business:
+        project.target_business = target_business
+        db.session.commit()
+    
+    # Geçmiş, API çağrısı yapmadan arşivlenmiş yanıtlardan yeniden hesaplanır
+    enqueue_rematch(project_id)
+    flash('Analiz geçmişi arşivlenmiş sonuçlardan yeniden hesaplanıyor.')
+    return redirect(url_for('project_detail', project_id=project_id))
+
 @app.route('/analysis/<int:analysis_id>')
 @login_required
 def analysis_detail(analysis_id):
@@ -159,21 +211,34 @@ def analysis_detail(analysis_id):
     if analysis.project.user_id != current_user.id:
         return redirect(url_for('dashboard'))
     
-    # Analiz noktalarını JSON'a dönüştürülebilir formata çevir
-    points_data = []
-    for point in analysis.points:
-        points_data.append({
-            'coordinates': point.coordinates,
-            'latitude': point.latitude,
-            'longitude': point.longitude,
-            'position': point.position,
-            'rating': point.rating,
-            'rating_count': point.rating_count
-        })
-        
+    # Noktalar sayfaya gömülmez, tablo ve grafikler /api/analysis/<id>/points'ten yüklenir
     return render_template('analysis_detail.html', 
                          analysis=analysis,
-                         points=points_data)
+                         distribution=analysis_distribution(analysis))
+
+@app.route('/api/analysis/<int:analysis_id>/points')
+@login_required
+def api_analysis_points(analysis_id):
+    """Analiz noktalarını sütun bazlı, sıkıştırılmış ve ETag'li JSON olarak döndürür"""
+    analysis = Analysis.query.get_or_404(analysis_id)
+    if analysis.project.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    body = dumps_points(points_payload(analysis_id))
+    etag = payload_etag(body)
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': 'private, no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    # Veri değişmediyse sıkıştırma yapılmadan 304 döner
+    if etag in request.if_none_match:
+        return Response(status=304, headers=headers)
+    
+    data, encoding = encode_response(body, etag, request.accept_encodings)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(data, mimetype='application/json', headers=headers)
 
 @app.route('/api/run-analysis/<int:project_id>')
 @login_required
@@ -182,11 +247,81 @@ def api_run_analysis(project_id):
     if project.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
         
-    analysis_id = run_analysis(project_id)
-    return jsonify({'analysis_id': analysis_id})
+    # Analizi web isteğinde çalıştırmak yerine kuyruğa ekle
+    job = enqueue_analysis(project_id)
+    return jsonify({'job_id': job.id, 'status': job.status}), 202
+
+@app.route('/api/jobs/<int:job_id>')
+@login_required
+def api_job_status(job_id):
+    job = AnalysisJob.query.get_or_404(job_id)
+    if job.project.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    return jsonify(job_to_dict(job))
+
+@app.route('/api/jobs/<int:job_id>/progress')
+@login_required
+def api_job_progress(job_id):
+    """Çalışan analizin imleçten sonraki nokta sonuçlarını ve iş durumunu server-sent events olarak döndürür
+
+    Bağlantı açık tutulmaz: yanıt mevcut olaylarla hemen kapanır ve tarayıcının
+    EventSource'u retry süresi sonra Last-Event-ID ile yeniden bağlanır. Böylece
+    açık proje sayfaları eşzamanlı web işçilerini meşgul etmez.
+    """
+    job = AnalysisJob.query.get_or_404(job_id)
+    if job.project.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    # Tarayıcı yeniden bağlanırken son aldığı olayın kimliğini gönderir
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor')
+    if cursor and job.status in ('completed', 'failed') and not read_progress(job_id, cursor)[0]:
+        # Biten işin gönderilmemiş olayı yoksa 204 ile yeniden bağlanma durdurulur
+        return Response(status=204)
 
-def run_analysis(project_id):
-    """Analiz işlemini gerçekleştirir"""
+    def sse(data, event=None, event_id=None):
+        lines = []
+        if event_id:
+            lines.append(f"id: {event_id}")
+        if event:
+            lines.append(f"event: {event}")
+        lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+        return '\n'.join(lines) + '\n\n'
+
+    # Yeni olay yoksa en fazla PROGRESS_WAIT_SECONDS kadar beklenir (varsayılan 0)
+    deadline = time.monotonic() + PROGRESS_WAIT_SECONDS
+    while True:
+        # Durum olaylardan önce okunur; iş bittiyse son olaylar da dosyaya yazılmıştır
+        state = db.session.query(
+            AnalysisJob.status, AnalysisJob.attempts, AnalysisJob.max_attempts, AnalysisJob.analysis_id
+        ).filter(AnalysisJob.id == job_id).first()
+        db.session.rollback()
+        if state is None:
+            return Response(status=204)
+        events, _ = read_progress(job_id, cursor)
+        if events or state.status in ('completed', 'failed') or time.monotonic() >= deadline:
+            break
+        time.sleep(PROGRESS_POLL_SECONDS)
+
+    body = [f"retry: {PROGRESS_RETRY_MS}\n\n"]
+    body.extend(sse(event, event['type'], event_id) for event_id, event in events)
+    body.append(sse({
+        'status': state.status,
+        'attempts': state.attempts,
+        'maxAttempts': state.max_attempts,
+        'analysisId': state.analysis_id
+    }, 'status'))
+    return Response(''.join(body), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+def get_serper_api_key():
+    """Admin panelinden kaydedilen son Serper API anahtarını döndürür, yoksa ortam değişkenine düşer"""
+    settings = SystemSettings.query.order_by(SystemSettings.id.desc()).first()
+    if settings and settings.serper_api_key:
+        return settings.serper_api_key
+    return os.getenv('SERPER_API_KEY')
+
+def run_analysis(project_id, job_id=None, attempt=1):
+    """Analiz işlemini gerçekleştirir, job_id verilirse ilerlemeyi nokta nokta yayınlar"""
     with app.app_context():
         project = Project.query.get(project_id)
         
@@ -203,85 +338,111 @@ def run_analysis(project_id):
         analysis_folder = f"static/analyses/{analysis.id}"
         os.makedirs(analysis_folder, exist_ok=True)
         
+        progress = None
         try:
             # Koordinatları üret ve analiz et
             coordinates_list = location_gen.generate_coordinates(project.shape, project.num_points)
-            analyzer = RankAnalyzer(project.target_business)
+            analyzer = RankAnalyzer(project.target_business, get_serper_api_key())
+            
+            # Noktalar geldikçe eşleştir ve ilerleme olayı olarak yayınla
+            matches = {}
+            if job_id is not None:
+                progress = ProgressWriter(job_id, attempt, analysis.id, len(coordinates_list))
+
+            payloads = {}
+
+            def on_result(index, coords, data):
+                match = analyzer.match_business(data) if data is not None else None
+                matches[index] = match
+                # Ham yanıt, yeniden API çağrısı yapmadan sonradan incelenebilsin diye arşivlenir
+                if data is not None and SERP_ARCHIVE_ENABLED:
+                    payloads[index] = encode_places(data)
+                if progress:
+                    progress.point(index, coords, match)
             
-            # Her koordinat için veri çek ve kaydet
-            for coords in coordinates_list:
+            # Tüm koordinatların verisini eşzamanlı çek
+            results = analyzer.fetch_all_serper_data(project.keyword, coordinates_list, on_result=on_result)
+
+            # Verisi alınamayan noktalar "görünmüyor" sayılmaz, analizden çıkarılır
+            failed_points = sum(1 for data in results if data is None)
+            if failed_points:
+                print(f"{failed_points}/{len(results)} nokta için veri alınamadı")
+            if results and failed_points == len(results):
+                raise Exception('Hiçbir nokta için Serper verisi alınamadı')
+
+            # Sonuçları ızgara sırasıyla eşleştir
+            point_rows = []
+            point_places = {}
+            for index, (coords, data) in enumerate(zip(coordinates_list, results)):
+                if data is None:
+                    continue
                 try:
                     lat, lon = coords.replace('@', '').split(',')[:2]
-                    data = analyzer.get_serper_data(project.keyword, lat, lon)
-                    analyzer.add_location_data(coords, data)
+                    match = analyzer.add_location_data(coords, data, matches.get(index))
                     
-                    # Veritabanına nokta bilgisini ekle
-                    point = AnalysisPoint(
-                        analysis_id=analysis.id,
-                        coordinates=coords,
-                        latitude=float(lat),
-                        longitude=float(lon),
-                        position=analyzer.get_position(data, project.target_business),
-                        rating=analyzer.get_rating(data, project.target_business),
-                        rating_count=analyzer.get_rating_count(data, project.target_business)
-                    )
-                    db.session.add(point)
+                    point_rows.append({
+                        'analysis_id': analysis.id,
+                        'coordinates': coords,
+                        'latitude': float(lat),
+                        'longitude': float(lon),
+                        'position': match['position'],
+                        'rating': match['rating'],
+                        'rating_count': match['rating_count'],
+                        'payload_hash': payloads[index]['hash'] if index in payloads else None
+                    })
+                    point_places[coords] = data.get('places')
                     
                 except Exception as e:
                     print(f"Hata: {coords} için veri alınamadı - {str(e)}")
                     continue
             
             # Haritayı oluştur
-            map_path = os.path.join(analysis_folder, 'map.html')
-            analyzer.create_position_map(map_path, project.center_coordinates)
+            if MAP_RENDERER == 'folium':
+                map_path = os.path.join(analysis_folder, 'map.html')
+                analyzer.create_position_map(map_path, project.center_coordinates)
+            else:
+                # Paylaşılan Leaflet sayfası için yalnızca nokta verisi ve rapor PNG'si yazılır
+                map_path = os.path.join(analysis_folder, 'points.json')
+                analyzer.create_position_data(map_path, project.center_coordinates)
+                analyzer.create_position_png(os.path.join(analysis_folder, 'map.png'), project.center_coordinates)
             
-            # Analiz sonuçlarını güncelle
-            points = analyzer.get_all_points()
-            points_with_position = [p for p in points if p.get('position')]
+            # Tüm noktaları tek bir toplu INSERT ile kaydet
+            db.session.bulk_insert_mappings(AnalysisPoint, point_rows)
+            store_payloads(payloads.values())
             
-            analysis.total_points = len(points)
-            analysis.visible_points = len(points_with_position)
-            analysis.average_position = sum(p['position'] for p in points_with_position) / len(points_with_position) if points_with_position else None
-            analysis.best_position = min(p['position'] for p in points_with_position) if points_with_position else None
-            analysis.worst_position = max(p['position'] for p in points_with_position) if points_with_position else None
-            analysis.visibility_rate = (len(points_with_position) / len(points) * 100) if points else 0
+            # Yanıttaki tüm işletmeleri rakip gözlemi olarak kaydet; nokta id'leri satır satır
+            # döndürmek yerine tek sorguda geri okunur ve koordinata göre yanıtla eşlenir
+            # (ekleme sırasının id sırasıyla aynı olduğu varsayılmaz)
+            if COMPETITOR_TRACKING_ENABLED:
+                point_ids = db.session.query(AnalysisPoint.id, AnalysisPoint.coordinates).filter(
+                    AnalysisPoint.analysis_id == analysis.id)
+                store_observations(
+                    observation
+                    for point_id, coords in point_ids
+                    for observation in observation_rows(project_id, analysis.id, point_id, point_places[coords])
+                )
+            
+            # Analiz sonuçlarını ve sıralama dağılımını güncelle
+            apply_summary(analysis, [p.get('position') for p in analyzer.get_all_points()])
             analysis.map_file_path = map_path.replace('static/', '')
             
             db.session.commit()
+            if progress:
+                progress.finish('completed', analysis.id)
             return analysis.id
             
         except Exception as e:
             print(f"Analiz sırasında hata oluştu: {str(e)}")
+            db.session.rollback()
             db.session.delete(analysis)
             db.session.commit()
+            if progress:
+                progress.finish('failed', error=str(e))
             return None
 
 def schedule_analysis(project_id, frequency):
-    """Analizi zamanlar"""
-    if frequency == 'daily':
-        scheduler.add_job(
-            run_analysis,
-            'interval',
-            days=1,
-            args=[project_id],
-            id=f'project_{project_id}_daily'
-        )
-    elif frequency == 'weekly':
-        scheduler.add_job(
-            run_analysis,
-            'interval',
-            weeks=1,
-            args=[project_id],
-            id=f'project_{project_id}_weekly'
-        )
-    elif frequency == 'monthly':
-        scheduler.add_job(
-            run_analysis,
-            'interval',
-            days=30,
-            args=[project_id],
-            id=f'project_{project_id}_monthly'
-        )
+    """Analizi zamanlar (zamanlamalar işçi süreçlerindeki zamanlayıcı tarafından çalıştırılır)"""
+    return schedule_project(project_id, frequency)
 
 @app.route('/logout', methods=['POST'])
 @login_required
@@ -296,36 +457,24 @@ def delete_project(project_id):
     if project.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    # Projeye ait analizleri sil
-    analyses = Analysis.query.filter_by(project_id=project_id).all()
-    for analysis in analyses:
-        # Analiz dosyalarını sil
-        if analysis.map_file_path:
-            try:
-                os.remove(os.path.join('static', analysis.map_file_path))
-            except:
-                pass
-        if analysis.analysis_file_path:
-            try:
-                os.remove(os.path.join('static', analysis.analysis_file_path))
-            except:
-                pass
-        
-        # Analiz noktalarını sil
-        AnalysisPoint.query.filter_by(analysis_id=analysis.id).delete()
-        db.session.delete(analysis)
+    # Projeye ait analiz dosyalarını ve klasörlerini sil
+    analysis_files = db.session.query(Analysis.id, Analysis.map_file_path, Analysis.analysis_file_path).filter_by(project_id=project_id).all()
+    for analysis_id, map_file_path, analysis_file_path in analysis_files:
+        remove_analysis_files(analysis_id, map_file_path, analysis_file_path)
+    
+    # Analiz noktalarını ve analizleri toplu olarak sil
+    analysis_ids = db.session.query(Analysis.id).filter_by(project_id=project_id)
+    payload_hashes = [h for (h,) in db.session.query(AnalysisPoint.payload_hash).filter(
+        AnalysisPoint.analysis_id.in_(analysis_ids), AnalysisPoint.payload_hash.isnot(None)).distinct()]
+    delete_observations(CompetitorObservation.project_id == project_id)
+    AnalysisPoint.query.filter(AnalysisPoint.analysis_id.in_(analysis_ids)).delete(synchronize_session=False)
+    prune_payloads(payload_hashes)
+    # İşler analizlere analysis_id ile bağlı olduğu için analizlerden önce silinir
+    AnalysisJob.query.filter_by(project_id=project_id).delete(synchronize_session=False)
+    Analysis.query.filter_by(project_id=project_id).delete(synchronize_session=False)
     
     # Zamanlanmış görevleri sil
-    scheduler_jobs = [
-        f'project_{project_id}_daily',
-        f'project_{project_id}_weekly',
-        f'project_{project_id}_monthly'
-    ]
-    for job_id in scheduler_jobs:
-        try:
-            scheduler.remove_job(job_id)
-        except:
-            pass
+    ScheduledAnalysis.query.filter_by(project_id=project_id).delete(synchronize_session=False)
     
     # Projeyi sil
     db.session.delete(project)
@@ -334,6 +483,16 @@ def delete_project(project_id):
     flash('Proje başarıyla silindi.')
     return redirect(url_for('dashboard'))
 
+def remove_analysis_files(analysis_id, *file_paths):
+    """Analize ait dosyaları ve static/analyses/<id> klasörünü (harita, PNG, PDF raporları) siler"""
+    for file_path in file_paths:
+        if file_path:
+            try:
+                os.remove(os.path.join(app.static_folder, file_path))
+            except:
+                pass
+    shutil.rmtree(os.path.join(app.static_folder, 'analyses', str(analysis_id)), ignore_errors=True)
+
 @app.route('/analysis/<int:analysis_id>/delete', methods=['POST'])
 @login_required
 def delete_analysis(analysis_id):
@@ -342,19 +501,17 @@ def delete_analysis(analysis_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     # Analiz dosyalarını sil
-    if analysis.map_file_path:
-        try:
-            os.remove(os.path.join('static', analysis.map_file_path))
-        except:
-            pass
-    if analysis.analysis_file_path:
-        try:
-            os.remove(os.path.join('static', analysis.analysis_file_path))
-        except:
-            pass
+    remove_analysis_files(analysis.id, analysis.map_file_path, analysis.analysis_file_path)
+    
+    # Analiz noktalarını ve başka analizlerin kullanmadığı ham yanıtları sil
+    payload_hashes = [h for (h,) in db.session.query(AnalysisPoint.payload_hash).filter(
+        AnalysisPoint.analysis_id == analysis_id, AnalysisPoint.payload_hash.isnot(None)).distinct()]
+    delete_observations(CompetitorObservation.analysis_id == analysis_id)
+    AnalysisPoint.query.filter_by(analysis_id=analysis_id).delete(synchronize_session=False)
+    prune_payloads(payload_hashes)
     
-    # Analiz noktalarını sil
-    AnalysisPoint.query.filter_by(analysis_id=analysis_id).delete()
+    # Analizi üreten işin bağlantısını kaldır, iş geçmişi korunur
+    AnalysisJob.query.filter_by(analysis_id=analysis_id).update({'analysis_id': None}, synchronize_session=False)
     
     # Analizi sil
     project_id = analysis.project_id
@@ -399,278 +556,59 @@ def download_pdf_report(analysis_id):
     if analysis.project.user_id != current_user.id:
         abort(403)
     
-    # Tablo satırlarını oluşturan yardımcı fonksiyon
-    def generate_table_rows(points):
-        rows = []
-        for point in points:
-            position_class = ''
-            if point['position']:
-                if point['position'] <= 3:
-                    position_class = 'color: #28a745;'
-                elif point['position'] <= 10:
-                    position_class = 'color: #ffc107;'
-                else:
-                    position_class = 'color: #dc3545;'
-            
-            rows.append(f"""
-            <tr>
-                <td>{point['coordinates']}</td>
-                <td style="{position_class}">
-                    {point['position'] if point['position'] else 'Görünmüyor'}
-                </td>
-                <td>{point['rating'] if point['rating'] else '-'}</td>
-                <td>{point['rating_count'] if point['rating_count'] else '-'}</td>
-            </tr>
-            """)
-        return '\n'.join(rows)
-    
-    # PDF rapor oluştur
-    static_dir = os.path.join(app.static_folder, f'analyses/{analysis.id}')
-    os.makedirs(static_dir, exist_ok=True)
+    # Rapor analiz klasöründe, verinin özetiyle adlandırılmış olarak saklanır
+    report_dir = os.path.join(app.static_folder, f'analyses/{analysis.id}')
+    map_png_path = report_map_png_path(analysis)
     
     try:
-        # Analiz noktalarını hazırla
-        points_data = []
-        for point in analysis.points:
-            points_data.append({
-                'coordinates': point.coordinates,
-                'position': point.position,
-                'rating': point.rating,
-                'rating_count': point.rating_count
-            })
-        
-        # Sıralama dağılımını hesapla
-        distribution = [0, 0, 0, 0, 0]  # [1-3, 4-10, 11-20, 20+, Görünmüyor]
-        for point in points_data:
-            if not point['position']:
-                distribution[4] += 1
-            elif point['position'] <= 3:
-                distribution[0] += 1
-            elif point['position'] <= 10:
-                distribution[1] += 1
-            elif point['position'] <= 20:
-                distribution[2] += 1
-            else:
-                distribution[3] += 1
-        
-        # PDF raporu oluştur
-        pdf_path = os.path.join(static_dir, 'report.pdf')
-        
-        # Harita PNG dosyasının yolu
-        map_png_path = os.path.join(app.root_path, 'static', analysis.map_file_path.replace('.html', '.png'))
-        
-        # HTML şablonu oluştur
-        html_template = f"""
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                h1 {{ color: #333; text-align: center; }}
-                .header {{ text-align: center; margin-bottom: 30px; }}
-                .section {{ margin: 20px 0; }}
-                .stats {{ 
-                    display: grid;
-                    grid-template-columns: repeat(4, 1fr);
-                    gap: 20px;
-                    margin: 20px 0;
-                }}
-                .stat-box {{ 
-                    padding: 20px; 
-                    background: #f8f9fa; 
-                    border-radius: 10px;
-                    text-align: center;
-                    box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-                }}
-                .stat-box h3 {{
-                    margin: 0;
-                    font-size: 16px;
-                    color: #666;
-                }}
-                .stat-box p {{
-                    margin: 10px 0 0 0;
-                    font-size: 24px;
-                    font-weight: bold;
-                    color: #333;
-                }}
-                .map-container {{ text-align: center; margin: 20px 0; }}
-                .map-container img {{ 
-                    width: 100%;
-                    max-width: 1200px;
-                    border-radius: 10px;
-                    box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-                }}
-                .distribution-container {{
-                    margin: 20px 0;
-                    padding: 20px;
-                    background: #f8f9fa;
-                    border-radius: 10px;
-                    box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-                }}
-                .distribution-item {{
-                    display: flex;
-                    align-items: center;
-                    margin: 10px 0;
-                }}
-                .distribution-label {{
-                    flex: 1;
-                    font-size: 14px;
-                }}
-                .distribution-bar {{
-                    flex: 3;
-                    height: 24px;
-                    background: #eee;
-                    border-radius: 12px;
-                    overflow: hidden;
-                    margin: 0 10px;
-                }}
-                .distribution-bar-fill {{
-                    height: 100%;
-                    transition: width 0.3s ease;
-                }}
-                .distribution-value {{
-                    flex: 0 0 50px;
-                    text-align: right;
-                    font-weight: bold;
-                }}
-                .footer {{ text-align: center; margin-top: 50px; color: #666; }}
-                table {{ 
-                    width: 100%; 
-                    border-collapse: collapse; 
-                    margin: 20px 0;
-                    font-size: 14px;
-                }}
-                th, td {{ 
-                    padding: 12px; 
-                    text-align: left; 
-                    border-bottom: 1px solid #ddd;
-                }}
-                th {{ 
-                    background-color: #f8f9fa;
-                    font-weight: bold;
-                }}
-                h2 {{
-                    color: #333;
-                    margin-top: 40px;
-                    margin-bottom: 20px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>Sıralama Analiz Raporu</h1>
-                <p>İşletme: {analysis.project.target_business}</p>
-                <p>Tarih: {datetime.now().strftime('%d.%m.%Y %H:%M')}</p>
-            </div>
-            
-            <div class="section">
-                <div class="stats">
-                    <div class="stat-box">
-                        <h3>Görünürlük Oranı</h3>
-                        <p>%{analysis.visibility_rate:.1f}</p>
-                    </div>
-                    <div class="stat-box">
-                        <h3>Ortalama Sıralama</h3>
-                        <p>{analysis.average_position:.1f}</p>
-                    </div>
-                    <div class="stat-box">
-                        <h3>En İyi Sıralama</h3>
-                        <p>{analysis.best_position}</p>
-                    </div>
-                    <div class="stat-box">
-                        <h3>En Kötü Sıralama</h3>
-                        <p>{analysis.worst_position}</p>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="section">
-                <h2>Sıralama Dağılımı</h2>
-                <div class="distribution-container">
-                    <div class="distribution-item">
-                        <span class="distribution-label">1-3. sıra</span>
-                        <div class="distribution-bar">
-                            <div class="distribution-bar-fill" style="width: {(distribution[0]/len(points_data))*100}%; background-color: #28a745;"></div>
-                        </div>
-                        <span class="distribution-value">{distribution[0]}</span>
-                    </div>
-                    <div class="distribution-item">
-                        <span class="distribution-label">4-10. sıra</span>
-                        <div class="distribution-bar">
-                            <div class="distribution-bar-fill" style="width: {(distribution[1]/len(points_data))*100}%; background-color: #ffc107;"></div>
-                        </div>
-                        <span class="distribution-value">{distribution[1]}</span>
-                    </div>
-                    <div class="distribution-item">
-                        <span class="distribution-label">11-20. sıra</span>
-                        <div class="distribution-bar">
-                            <div class="distribution-bar-fill" style="width: {(distribution[2]/len(points_data))*100}%; background-color: #fd7e14;"></div>
-                        </div>
-                        <span class="distribution-value">{distribution[2]}</span>
-                    </div>
-                    <div class="distribution-item">
-                        <span class="distribution-label">20+ sıra</span>
-                        <div class="distribution-bar">
-                            <div class="distribution-bar-fill" style="width: {(distribution[3]/len(points_data))*100}%; background-color: #dc3545;"></div>
-                        </div>
-                        <span class="distribution-value">{distribution[3]}</span>
-                    </div>
-                    <div class="distribution-item">
-                        <span class="distribution-label">Görünmüyor</span>
-                        <div class="distribution-bar">
-                            <div class="distribution-bar-fill" style="width: {(distribution[4]/len(points_data))*100}%; background-color: #6c757d;"></div>
-                        </div>
-                        <span class="distribution-value">{distribution[4]}</span>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="section">
-                <h2>Sıralama Haritası</h2>
-                <div class="map-container">
-                    <img src="file://{map_png_path}" alt="Sıralama Haritası">
-                </div>
-            </div>
-            
-            <div class="section">
-                <h2>Analiz Noktaları</h2>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Koordinatlar</th>
-                            <th>Sıralama</th>
-                            <th>Puan</th>
-                            <th>Değerlendirme Sayısı</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        {generate_table_rows(points_data)}
-                    </tbody>
-                </table>
-            </div>
-            
-            <div class="footer">
-                <p>© {datetime.now().year} Maps Rank Tracker. Tüm hakları saklıdır.</p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # HTML'i PDF'e dönüştür
-        HTML(string=html_template).write_pdf(pdf_path)
+        ensure_map_png(analysis, map_png_path)
+        pdf_path, fingerprint = get_report_pdf(analysis, report_dir, map_png_path)
         
-        # PDF'i indir
-        return send_file(
+        # Rapor değişmediyse tarayıcı If-None-Match ile 304 alır
+        response = send_file(
             pdf_path,
             mimetype='application/pdf',
             as_attachment=True,
-            download_name=f'analiz_raporu_{analysis.id}.pdf'
+            download_name=f'analiz_raporu_{analysis.id}.pdf',
+            etag=fingerprint,
+            conditional=True
         )
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     except Exception as e:
         print(f"PDF oluşturma hatası: {str(e)}")
         flash('PDF raporu oluşturulurken bir hata oluştu.')
         return redirect(url_for('analysis_detail', analysis_id=analysis_id))
 
+def report_map_png_path(analysis):
+    """Rapora gömülen harita PNG dosyasının mutlak yolunu döndürür"""
+    return os.path.join(app.root_path, 'static', os.path.dirname(analysis.map_file_path or ''), 'map.png')
+
+def ensure_map_png(analysis, map_png_path):
+    """Harita PNG'si yoksa (ör. yeniden eşleştirmeden sonra) kayıtlı noktalardan yeniden çizer"""
+    if os.path.exists(map_png_path):
+        return
+    points = [{'coordinates': coordinates, 'position': position} for coordinates, position in db.session.query(
+        AnalysisPoint.coordinates, AnalysisPoint.position
+    ).filter(AnalysisPoint.analysis_id == analysis.id).order_by(AnalysisPoint.id)]
+    os.makedirs(os.path.dirname(map_png_path), exist_ok=True)
+    render_rank_map(points, analysis.project.center_coordinates, map_png_path)
+
+def pregenerate_report(analysis_id):
+    """Tamamlanan analizin PDF raporunu önceden üretir; hata analizi etkilemez"""
+    if not REPORT_PREGENERATE:
+        return
+    with app.app_context():
+        analysis = Analysis.query.get(analysis_id)
+        if analysis is None:
+            return
+        try:
+            map_png_path = report_map_png_path(analysis)
+            ensure_map_png(analysis, map_png_path)
+            get_report_pdf(analysis, os.path.join(app.static_folder, f'analyses/{analysis.id}'), map_png_path)
+        except Exception as e:
+            print(f"PDF ön üretim hatası: {str(e)}")
+
 @app.route('/api/project/<int:project_id>/stats')
 @login_required
 def api_project_stats(project_id):
@@ -679,7 +617,7 @@ def api_project_stats(project_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     # En son analizi bul
-    latest_analysis = Analysis.query.filter_by(project_id=project_id).order_by(Analysis.analysis_date.desc()).first()
+    latest_analysis = history_page_query(project_id, limit=1).first()
     
     if latest_analysis:
         return jsonify({
@@ -694,49 +632,103 @@ def api_project_stats(project_id):
         'avgPosition': 0
     })
 
-@app.route('/api/dashboard/stats')
+@app.route('/api/project/<int:project_id>/analyses')
 @login_required
-def api_dashboard_stats():
-    # Tüm projelerin analizlerini al
-    analyses = Analysis.query.join(Project).filter(Project.user_id == current_user.id).all()
+def api_project_analyses(project_id):
+    """Projenin analiz geçmişini imleçle sayfalanmış olarak döndürür"""
+    project = Project.query.get_or_404(project_id)
+    if project.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    limit = request.args.get('limit', HISTORY_PAGE_SIZE, type=int)
+    analyses, next_cursor, _ = history_page(project_id, request.args.get('cursor'), limit)
+    
+    return jsonify({
+        'analyses': [{
+            'id': analysis.id,
+            'date': analysis.analysis_date.isoformat(),
+            'visibility': analysis.visibility_rate,
+            'avgPosition': analysis.average_position,
+            'url': url_for('analysis_detail', analysis_id=analysis.id)
+        } for analysis in analyses],
+        'nextCursor': next_cursor
+    })
+
+@app.route('/api/analysis/<int:analysis_id>/competitors')
+@login_required
+def api_analysis_competitors(analysis_id):
+    """Analizde ilk sıraları en çok noktada tutan işletmeleri döndürür (?top=3)"""
+    analysis = Analysis.query.get_or_404(analysis_id)
+    if analysis.project.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
     
-    # Temel istatistikler
-    total_analyses = len(analyses)
+    top = max(1, min(request.args.get('top', COMPETITOR_TOP_DEFAULT, type=int), 20))
+    return jsonify({
+        'analysisId': analysis_id,
+        'top': top,
+        'totalPoints': analysis.total_points,
+        'competitors': top_competitors(analysis_id, top)
+    })
+
+@app.route('/api/project/<int:project_id>/competitors')
+@login_required
+def api_project_competitor_history(project_id):
+    """Bir işletmenin projedeki analizlerde zaman içindeki sırasını döndürür (?title=...)"""
+    project = Project.query.get_or_404(project_id)
+    if project.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
     
-    if analyses:
-        avg_visibility = sum(a.visibility_rate for a in analyses) / total_analyses
-        avg_position = sum(a.average_position for a in analyses if a.average_position) / total_analyses
+    title = request.args.get('title', '').strip()
+    if not title:
+        return jsonify({'error': 'title parametresi gerekli'}), 400
+    return jsonify({
+        'title': title,
+        'history': competitor_history(project_id, title)
+    })
+
+@app.route('/api/dashboard/stats')
+@login_required
+def api_dashboard_stats():
+    # Temel istatistikler ve sıralama dağılımı tek sorguda; dağılım analizlerde saklanan
+    # sütunların toplamıdır, noktalar taranmaz (ortalamalar önceki gibi tüm analiz sayısına bölünür)
+    total_analyses, visibility_sum, position_sum, *distribution_sums = db.session.query(
+        func.count(Analysis.id),
+        func.sum(Analysis.visibility_rate),
+        func.sum(Analysis.average_position),
+        *[func.sum(column) for column in RANK_BUCKET_COLUMNS]
+    ).join(Project).filter(Project.user_id == current_user.id).one()
+    
+    if total_analyses:
+        avg_visibility = (visibility_sum or 0) / total_analyses
+        avg_position = (position_sum or 0) / total_analyses
     else:
         avg_visibility = 0
         avg_position = 0
     
-    # Görünürlük trendi için son 30 günlük veri
+    # Görünürlük trendi için son 30 günlük veri, gün bazında ortalanır
     thirty_days_ago = datetime.now() - timedelta(days=30)
-    trend_analyses = Analysis.query.join(Project).filter(
+    analysis_day = func.date(Analysis.analysis_date)
+    trend_rows = db.session.query(
+        analysis_day,
+        func.avg(Analysis.visibility_rate)
+    ).join(Project).filter(
         Project.user_id == current_user.id,
         Analysis.analysis_date >= thirty_days_ago
-    ).order_by(Analysis.analysis_date.asc()).all()
+    ).group_by(analysis_day).order_by(analysis_day.asc()).all()
+    
+    def format_day(day):
+        # SQLite tarihi metin, PostgreSQL date nesnesi olarak döndürür
+        if isinstance(day, str):
+            day = datetime.strptime(day, '%Y-%m-%d')
+        return day.strftime('%d.%m')
     
     visibility_trend = {
-        'dates': [a.analysis_date.strftime('%d.%m') for a in trend_analyses],
-        'values': [a.visibility_rate for a in trend_analyses]
+        'dates': [format_day(day) for day, _ in trend_rows],
+        'values': [value for _, value in trend_rows]
     }
     
-    # Sıralama dağılımı
-    ranking_distribution = [0, 0, 0, 0, 0]  # [1-3, 4-10, 11-20, 20+, Görünmüyor]
-    
-    for analysis in analyses:
-        for point in analysis.points:
-            if not point.position:
-                ranking_distribution[4] += 1  # Görünmüyor
-            elif point.position <= 3:
-                ranking_distribution[0] += 1
-            elif point.position <= 10:
-                ranking_distribution[1] += 1
-            elif point.position <= 20:
-                ranking_distribution[2] += 1
-            else:
-                ranking_distribution[3] += 1
+    # [1-3, 4-10, 11-20, 20+, Görünmüyor]
+    ranking_distribution = [count or 0 for count in distribution_sums]
     
     return jsonify({
         'totalAnalyses': total_analyses,
@@ -768,7 +760,7 @@ def admin_dashboard():
     
     # API key bilgilerini al
     settings = SystemSettings.query.order_by(SystemSettings.id.desc()).first()
-    current_api_key = settings.serper_api_key if settings else os.getenv('SERPER_API_KEY')
+    current_api_key = get_serper_api_key()
     api_key_updated_at = settings.updated_at if settings else None
     api_key_updated_by = settings.updated_by if settings else None
     
@@ -779,7 +771,16 @@ def admin_dashboard():
                          users=users,
                          current_api_key=current_api_key,
                          api_key_updated_at=api_key_updated_at,
-                         api_key_updated_by=api_key_updated_by)
+                         api_key_updated_by=api_key_updated_by,
+                         http_stats=get_session_stats(),
+                         cache_stats=get_serp_cache().stats(),
+                         usage_stats=get_serper_quota().usage(key_fingerprint(current_api_key)))
+
+@app.route('/admin/api/serper-usage')
+@login_required
+@admin_required
+def admin_serper_usage():
+    return jsonify(get_serper_quota().usage(key_fingerprint(get_serper_api_key())))
 
 @app.route('/admin/api-key', methods=['POST'])
 @login_required
@@ -843,6 +844,51 @@ def admin_make_admin(user_id):
     flash('Kullanıcı admin olarak atandı.')
     return redirect(url_for('admin_dashboard'))
 
+@app.cli.command('check-query-plans')
+@click.option('--seed', is_flag=True, help='Örnek veriyle doldurulmuş geçici SQLite veritabanında kontrol et')
+def check_query_plans_command(seed):
+    """Sık çalışan sorguların indeks kullandığını EXPLAIN ile doğrular"""
+    if not run_check(seed=seed):
+        raise SystemExit(1)
+
+@app.cli.command('rematch')
+@click.argument('project_id', type=int)
+@click.option('--target', help='Yeniden eşleştirmeden önce projenin hedef işletme adını değiştir')
+@click.option('--workers', type=int, default=REMATCH_WORKERS, show_default=True, help='Eşleştirme süreç sayısı')
+def rematch_command(project_id, target, workers):
+    """Projenin analiz geçmişini arşivlenmiş Serper yanıtlarından yeniden hesaplar"""
+    project = db.session.get(Project, project_id)
+    if project is None:
+        raise click.ClickException(f"Proje bulunamadı: {project_id}")
+    if target:
+        project.target_business = target
+        db.session.commit()
+    rematch_project(project_id, workers=workers, static_folder=app.static_folder)
+
+@app.cli.command('backfill-competitors')
+@click.argument('project_id', type=int, required=False)
+def backfill_competitors_command(project_id):
+    """Rakip gözlemlerini arşivlenmiş Serper yanıtlarından geçmiş analizler için doldurur"""
+    project_ids = [project_id] if project_id else [pid for (pid,) in db.session.query(Project.id).order_by(Project.id)]
+    for pid in project_ids:
+        inserted = backfill_observations(pid)
+        print(f"Proje {pid}: {inserted} rakip gözlemi eklendi")
+
+@app.cli.command('archive-stats')
+def archive_stats_command():
+    """Ham yanıt arşivinin kapladığı alanı ham JSON boyutuyla karşılaştırır"""
+    stats = archive_stats()
+    mb = 1024 * 1024
+    print(f"{stats['payloads']} tekil yük, {stats['points']} nokta")
+    for encoding, item in sorted(stats['encodings'].items()):
+        ratio = item['stored_bytes'] / item['raw_bytes'] if item['raw_bytes'] else 0
+        print(f"  {encoding}: {item['payloads']} yük, {item['raw_bytes'] / mb:.2f} MB ham -> "
+              f"{item['stored_bytes'] / mb:.2f} MB (%{ratio * 100:.1f})")
+    print(f"Sıkıştırma: tekil yüklerin %{stats['compression_ratio'] * 100:.1f}'i kadar yer")
+    print(f"Tekilleştirme: noktaların gördüğü {stats['referenced_raw_bytes'] / mb:.2f} MB yanıtın "
+          f"%{stats['dedup_ratio'] * 100:.1f}'i tekil")
+    print(f"Toplam: {stats['stored_bytes'] / mb:.2f} MB, ham yanıtların %{stats['overall_ratio'] * 100:.1f}'i")
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
@@ -0,0 +1,106 @@
+"""Analiz noktalarının tek tek ve toplu eklenme süresini, proje silme süresini ölçer
+
+Geçici bir SQLite veritabanı ve static klasörü kullanır, uygulamanın verilerine dokunmaz.
+
+Çalıştırma: python benchmarks/bench_bulk_insert.py [--points 5000] [--analyses 24] [--repeat 2]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORK_DIR = tempfile.mkdtemp(prefix='bench_bulk_insert_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORK_DIR, 'bench.db')
+
+from werkzeug.security import generate_password_hash
+from app import app
+from models import db, User, Project, Analysis, AnalysisPoint
+
+# Silme sırasında uygulamanın analiz dosyalarına dokunulmasın
+app.static_folder = WORK_DIR
+
+
+def point_rows(analysis_id, count):
+    return [{
+        'analysis_id': analysis_id,
+        'coordinates': f'@{41 + i * 1e-4:.6f},29.000000,14z',
+        'latitude': 41 + i * 1e-4,
+        'longitude': 29.0,
+        'position': (i % 25) or None,
+        'rating': 4.5,
+        'rating_count': i
+    } for i in range(count)]
+
+
+def new_analysis(project_id):
+    analysis = Analysis(project_id=project_id)
+    db.session.add(analysis)
+    db.session.commit()
+    return analysis.id
+
+
+def timed(function):
+    started = time.perf_counter()
+    function()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=5000, help='Analiz başına nokta sayısı')
+    parser.add_argument('--analyses', type=int, default=24, help='Silinecek projedeki analiz sayısı')
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password_hash=generate_password_hash('bench'))
+        db.session.add(user)
+        db.session.commit()
+        project = Project(name='bench', keyword='kuyumcu', target_business='Haldız Kuyumculuk',
+                          center_coordinates='@41.0,29.0,11z', radius_km=2, user_id=user.id)
+        db.session.add(project)
+        db.session.commit()
+        project_id = project.id
+
+        for _ in range(args.repeat):
+            rows = point_rows(new_analysis(project_id), args.points)
+
+            def add_objects():
+                for row in rows:
+                    db.session.add(AnalysisPoint(**row))
+                db.session.commit()
+
+            orm_ms = timed(add_objects)
+            rows = point_rows(new_analysis(project_id), args.points)
+
+            def bulk_insert():
+                db.session.bulk_insert_mappings(AnalysisPoint, rows)
+                db.session.commit()
+
+            bulk_ms = timed(bulk_insert)
+            print(f"{args.points} nokta: tek tek {orm_ms:.0f} ms, toplu {bulk_ms:.0f} ms")
+
+        # Silinecek projeyi istenen analiz sayısına tamamla
+        while Analysis.query.filter_by(project_id=project_id).count() < args.analyses:
+            db.session.bulk_insert_mappings(AnalysisPoint, point_rows(new_analysis(project_id), args.points))
+            db.session.commit()
+        total_points = AnalysisPoint.query.count()
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'bench', 'password': 'bench'})
+    delete_ms = timed(lambda: client.post(f'/project/{project_id}/delete'))
+    with app.app_context():
+        remaining = AnalysisPoint.query.count()
+    print(f"proje silme ({args.analyses} analiz, {total_points} nokta): {delete_ms:.0f} ms, kalan nokta {remaining}")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
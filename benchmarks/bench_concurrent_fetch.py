@@ -0,0 +1,98 @@
+"""33 noktalık ızgarada Serper verisinin sıralı ve eşzamanlı çekilme süresini ölçer
+
+Sabit gecikmeyle yanıt veren yerel bir Serper taklidi başlatır; önbellek ve hız
+sınırı kapatılır, gerçek API'ye istek gitmez.
+
+Çalıştırma: python benchmarks/bench_concurrent_fetch.py [--delay-ms 300] [--workers 16]
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORK_DIR = tempfile.mkdtemp(prefix='bench_concurrent_fetch_')
+PLACES = [{'title': f'Kuyumcu {i}', 'rating': 4.5, 'ratingCount': 10 * i, 'placeId': f'p{i}'} for i in range(20)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Her isteğe sabit gecikmeyle aynı yanıtı döndüren Serper taklidi"""
+    delay = 0.3
+    requests = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        with StubHandler.lock:
+            StubHandler.requests += 1
+        time.sleep(self.delay)
+        body = json.dumps({'places': PLACES}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(delay):
+    StubHandler.delay = delay
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--delay-ms', type=float, default=300, help='Taklidin yanıt gecikmesi')
+    parser.add_argument('--workers', type=int, default=None, help='Eşzamanlı istek sayısı (varsayılan ANALYSIS_MAX_CONCURRENCY)')
+    args = parser.parse_args()
+
+    server = start_stub(args.delay_ms / 1000)
+    # Ayarlar modüller içe aktarılmadan önce verilmelidir
+    os.environ.update({
+        'SERPER_API_URL': f'http://127.0.0.1:{server.server_port}/maps',
+        'SERPER_API_KEY': 'bench',
+        'SERP_CACHE_TTL': '0',
+        'SERPER_RATE_PER_SECOND': '0',
+        'SERPER_QUOTA_PATH': os.path.join(WORK_DIR, 'serper_quota.db'),
+        'COALESCE_LOCK_PATH': os.path.join(WORK_DIR, 'serper_inflight.lock')
+    })
+    from location_generator import LocationGenerator
+    from rank_analyzer import RankAnalyzer
+
+    coordinates = LocationGenerator(41.0, 29.0, 2).generate_coordinates('circle', 16)
+    analyzer = RankAnalyzer('Haldız Kuyumculuk')
+
+    def run(max_workers):
+        StubHandler.requests = 0
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = analyzer.fetch_all_serper_data('kuyumcu', coordinates, max_workers=max_workers)
+        elapsed = time.perf_counter() - started
+        failed = sum(result is None for result in results)
+        return elapsed, StubHandler.requests, failed
+
+    print(f"{len(coordinates)} nokta, yanıt gecikmesi {args.delay_ms:.0f} ms")
+    for label, max_workers in (('sıralı', 1), ('eşzamanlı', args.workers)):
+        elapsed, requests, failed = run(max_workers)
+        print(f"{label:10s} {elapsed:6.2f} sn  ({requests} istek, {failed} başarısız)")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
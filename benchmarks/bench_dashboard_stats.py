@@ -0,0 +1,123 @@
+"""Pano istatistikleri uç noktasının süresini ve sorgu sayısını ölçer
+
+Geçici bir SQLite veritabanına projeler, günlük analizler ve noktalar ekler;
+sonucu noktalardan Python'da hesaplanan değerlerle karşılaştırır.
+
+Çalıştırma: python benchmarks/bench_dashboard_stats.py [--projects 50] [--days 365] [--points 16]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORK_DIR = tempfile.mkdtemp(prefix='bench_dashboard_stats_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORK_DIR, 'bench.db')
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from app import app
+from models import db, User, Project, Analysis, AnalysisPoint
+from analysis_summary import apply_summary, rank_distribution
+
+POSITIONS = [None] + list(range(1, 30))
+
+
+def seed(projects, days, points, rng):
+    """Veritabanını doldurur, beklenen toplamları noktalardan hesaplayıp döndürür"""
+    user = User(username='bench', email='bench@example.com', password_hash=generate_password_hash('bench'))
+    db.session.add(user)
+    db.session.commit()
+
+    now = datetime.now()
+    visibility_sum, position_sum, distribution = 0, 0, [0, 0, 0, 0, 0]
+    for project_index in range(projects):
+        project = Project(name=f'bench {project_index}', keyword='kuyumcu', target_business='Haldız Kuyumculuk',
+                          center_coordinates='@41.0,29.0,11z', radius_km=2, user_id=user.id)
+        db.session.add(project)
+        db.session.flush()
+
+        analyses = []
+        for day in range(days):
+            analysis = Analysis(project_id=project.id, analysis_date=now - timedelta(days=day, minutes=project_index))
+            analysis.positions = [rng.choice(POSITIONS) for _ in range(points)]
+            apply_summary(analysis, analysis.positions)
+            visibility_sum += analysis.visibility_rate
+            position_sum += analysis.average_position or 0
+            for index, count in enumerate(rank_distribution(analysis.positions)):
+                distribution[index] += count
+            analyses.append(analysis)
+        db.session.add_all(analyses)
+        db.session.flush()
+
+        db.session.bulk_insert_mappings(AnalysisPoint, [{
+            'analysis_id': analysis.id,
+            'coordinates': '@41.0,29.0,14z',
+            'latitude': 41.0,
+            'longitude': 29.0,
+            'position': position
+        } for analysis in analyses for position in analysis.positions])
+        db.session.commit()
+
+    total = projects * days
+    return {
+        'totalAnalyses': total,
+        'avgVisibility': round(visibility_sum / total, 1) if total else 0,
+        'avgPosition': round(position_sum / total, 1) if total else 0,
+        'rankingDistribution': distribution
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--projects', type=int, default=50)
+    parser.add_argument('--days', type=int, default=365, help='Proje başına günlük analiz sayısı')
+    parser.add_argument('--points', type=int, default=16, help='Analiz başına nokta sayısı')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        expected = seed(args.projects, args.days, args.points, random.Random(1))
+        print(f"{args.projects} proje x {args.days} analiz x {args.points} nokta eklendi "
+              f"({time.perf_counter() - started:.1f} sn)")
+
+        queries = [0]
+
+        def count_query(*_):
+            queries[0] += 1
+
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'bench', 'password': 'bench'})
+    best = None
+    for _ in range(args.repeat):
+        queries[0] = 0
+        started = time.perf_counter()
+        response = client.get('/api/dashboard/stats')
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"/api/dashboard/stats: {best:.0f} ms, {queries[0]} sorgu")
+
+    stats = response.get_json()
+    mismatched = [key for key, value in expected.items() if stats[key] != value]
+    if mismatched:
+        for key in mismatched:
+            print(f"  farklı {key}: {stats[key]} != {expected[key]}")
+        return 1
+    print("sonuç noktalardan hesaplanan değerlerle aynı")
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
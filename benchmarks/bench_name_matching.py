@@ -0,0 +1,131 @@
+"""Sınırlı Levenshtein benzerliğinin ve tek geçişli eşleştirmenin eski koda göre hızını ölçer
+
+Çalıştırma: python benchmarks/bench_name_matching.py [--titles 2000] [--repeat 3]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import name_matching
+from name_matching import normalize_business_name, levenshtein_distance, similarity_at_least
+from rank_analyzer import RankAnalyzer, SIMILARITY_THRESHOLD
+
+TARGET = 'Haldız Kuyumculuk'
+NAMES = ['Haldız', 'Çelik', 'Yıldız', 'Güneş', 'Özdemir', 'Şahin', 'Altınbaş', 'Kaya', 'Demir', 'Aydın', 'Öztürk']
+KINDS = ['Kuyumculuk', 'Kuyumcu', 'Altın Evi', 'Mücevherat', 'Optik', 'Saat', 'Pırlanta', 'Gümüş']
+BRANCHES = ['', ' (Merkez)', ' - Kadıköy', ' Bağdat Cad.', ' Şubesi', ' & Co.']
+
+
+def build_titles(count, seed=0):
+    rng = random.Random(seed)
+    return [f"{rng.choice(NAMES)} {rng.choice(KINDS)}{rng.choice(BRANCHES)}" for _ in range(count)]
+
+
+def per_pair_us(function, target, titles, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for title in titles:
+            function(target, title)
+        elapsed = (time.perf_counter() - started) / len(titles) * 1e6
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def full_similarity(s1, s2):
+    max_length = max(len(s1), len(s2))
+    ratio = 1 - levenshtein_distance(s1, s2) / max_length if max_length else 0
+    return ratio if ratio >= SIMILARITY_THRESHOLD else None
+
+
+def legacy_normalize(name):
+    """user-005 öncesi normalizasyon (önbelleksiz)"""
+    if not name:
+        return ""
+    name = name.lower()
+    name = name.replace('ı', 'i').replace('ğ', 'g').replace('ü', 'u').replace('ş', 's').replace('ö', 'o').replace('ç', 'c')
+    name = re.sub(r'[^\w\s]', '', name)
+    return re.sub(r'\s+', ' ', name).strip()
+
+
+def legacy_lookup(data, business_name, value):
+    """user-004 öncesi get_position/get_rating/get_rating_count taraması (yazdırma hariç)
+
+    Her çağrı başlıkları ve hedefi yeniden normalize eder, tam Levenshtein mesafesi hesaplar.
+    """
+    places = data.get('places')
+    if not places:
+        return None
+    for i, place in enumerate(places):
+        if legacy_normalize(place.get('title', '')) == legacy_normalize(business_name):
+            return value(i, place)
+
+    highest_similarity = 0
+    best_match = None
+    for i, place in enumerate(places):
+        name1 = legacy_normalize(place.get('title', ''))
+        name2 = legacy_normalize(business_name)
+        if business_name.lower() in place.get('title', '').lower():
+            return value(i, place)
+        max_length = max(len(name1), len(name2))
+        similarity = 1 - (levenshtein_distance(name1, name2) / max_length) if max_length > 0 else 0
+        if similarity > highest_similarity:
+            highest_similarity = similarity
+            best_match = value(i, place)
+    return best_match if highest_similarity >= SIMILARITY_THRESHOLD else None
+
+
+def legacy_match(data, business_name):
+    """Eski run_analysis: add_location_data üç tarama yapar, veritabanı satırı için üçü tekrarlanır"""
+    for _ in range(2):
+        result = (
+            legacy_lookup(data, business_name, lambda i, place: i + 1),
+            legacy_lookup(data, business_name, lambda i, place: place.get('rating')),
+            legacy_lookup(data, business_name, lambda i, place: place.get('ratingCount'))
+        )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titles', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    titles = [normalize_business_name(t) for t in build_titles(args.titles)]
+    target = normalize_business_name(TARGET)
+    rapidfuzz = name_matching._rapidfuzz_levenshtein
+
+    print(f"{len(titles)} başlık, eşik {SIMILARITY_THRESHOLD}")
+    print(f"tam mesafe:            {per_pair_us(full_similarity, target, titles, args.repeat):8.2f} us/çift")
+    name_matching._rapidfuzz_levenshtein = None
+    print(f"sınırlı (saf Python):  {per_pair_us(lambda a, b: similarity_at_least(a, b, SIMILARITY_THRESHOLD), target, titles, args.repeat):8.2f} us/çift")
+    name_matching._rapidfuzz_levenshtein = rapidfuzz
+    if rapidfuzz is not None:
+        print(f"sınırlı (rapidfuzz):   {per_pair_us(lambda a, b: similarity_at_least(a, b, SIMILARITY_THRESHOLD), target, titles, args.repeat):8.2f} us/çift")
+    else:
+        print("sınırlı (rapidfuzz):   kurulu değil")
+
+    # 20 sonuçluk sentetik SERP yanıtlarında hedefin eşleştirilmesi
+    analyzer = RankAnalyzer(TARGET, verbose=False)
+    rng = random.Random(1)
+    payloads = [{'places': [{'title': t, 'rating': round(rng.uniform(3, 5), 1), 'ratingCount': rng.randint(1, 500)}
+                            for t in build_titles(20, seed=i)]} for i in range(200)]
+    started = time.perf_counter()
+    legacy = [legacy_match(payload, TARGET) for payload in payloads]
+    legacy_ms = (time.perf_counter() - started) / len(payloads) * 1000
+    started = time.perf_counter()
+    matches = [analyzer.match_business(payload) for payload in payloads]
+    new_ms = (time.perf_counter() - started) / len(payloads) * 1000
+    mismatches = sum(old != (m['position'], m['rating'], m['rating_count']) for old, m in zip(legacy, matches))
+    print(f"eski 6 tarama:         {legacy_ms:8.3f} ms/yanıt")
+    print(f"match_business:        {new_ms:8.3f} ms/yanıt ({legacy_ms / new_ms:.1f}x, {mismatches} farklı sonuç)")
+
+
+if __name__ == '__main__':
+    main()
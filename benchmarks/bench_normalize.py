@@ -0,0 +1,69 @@
+"""İşletme adı normalizasyonunun eski sürüme göre hızını ve çıktı eşitliğini ölçer
+
+Çalıştırma: python benchmarks/bench_normalize.py [--titles 2000] [--calls 200000]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from name_matching import normalize_business_name
+
+ALPHABET = 'abcçdefgğhıijklmnoöprsştuüvyzABCÇDEFGĞHIİJKLMNOÖPRSŞTUÜVYZ0123456789 .,-&()\'"!?\t'
+NAMES = ['Haldız', 'ÇELİK', 'Yıldız', 'Güneş', 'Özdemir', 'Şahin', 'Altınbaş', 'Kaya', 'IŞIK', 'Öztürk']
+KINDS = ['Kuyumculuk', 'Altın Evi', 'Mücevherat', 'Optik', 'Saat & Gözlük', 'Pırlanta', 'Gümüş']
+BRANCHES = ['', ' (Merkez)', ' - Kadıköy', '  Bağdat Cad.', ' Şubesi', ' & Co.']
+
+
+def legacy_normalize(name):
+    """user-005 öncesi RankAnalyzer.normalize_business_name"""
+    if not name:
+        return ""
+    name = name.lower()
+    name = name.replace('ı', 'i').replace('ğ', 'g').replace('ü', 'u').replace('ş', 's').replace('ö', 'o').replace('ç', 'c')
+    name = re.sub(r'[^\w\s]', '', name)
+    name = re.sub(r'\s+', ' ', name).strip()
+    return name
+
+
+def build_titles(count, seed=0):
+    rng = random.Random(seed)
+    titles = [f"{rng.choice(NAMES)} {rng.choice(KINDS)}{rng.choice(BRANCHES)}" for _ in range(count // 2)]
+    titles += [''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40))) for _ in range(count - len(titles))]
+    return titles
+
+
+def throughput(function, titles):
+    started = time.perf_counter()
+    for title in titles:
+        function(title)
+    return len(titles) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titles', type=int, default=2000, help='Farklı başlık sayısı')
+    parser.add_argument('--calls', type=int, default=200000, help='Ölçülen çağrı sayısı')
+    args = parser.parse_args()
+
+    corpus = build_titles(args.titles)
+    mismatches = [t for t in corpus if legacy_normalize(t) != normalize_business_name(t)]
+    print(f"eşitlik: {len(corpus) - len(mismatches)}/{len(corpus)} aynı")
+    for title in mismatches[:5]:
+        print(f"  farklı: {title!r}")
+
+    rng = random.Random(1)
+    calls = [rng.choice(corpus) for _ in range(args.calls)]
+    print(f"eski:           {throughput(legacy_normalize, calls) / 1000:8.0f} bin/sn")
+    print(f"yeni önbelleksiz: {throughput(normalize_business_name.__wrapped__, calls) / 1000:6.0f} bin/sn")
+    normalize_business_name.cache_clear()
+    print(f"yeni önbellekli:  {throughput(normalize_business_name, calls) / 1000:6.0f} bin/sn")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Ham Serper yanıt arşivinin kapladığı alanı ham JSON boyutuyla karşılaştırır
+
+Serper biçiminde yanıtlar üreten bir ızgara analizini iki kez çalıştırır (ikincisi
+önbellekten gelmiş gibi aynı yanıtları görür), yükleri geçici bir SQLite
+veritabanına arşivler ve archive_stats() ile sıkıştırma ve tekilleştirme oranlarını
+yazdırır. zstd (kuruluysa) ve zlib ayrıca karşılaştırılır.
+
+Çalıştırma: python benchmarks/bench_serp_archive.py [--points 401] [--runs 2]
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORK_DIR = tempfile.mkdtemp(prefix='bench_serp_archive_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(WORK_DIR, 'bench.db')
+
+from app import app
+from models import db, User, Project, Analysis, AnalysisPoint
+import serp_archive
+from serp_archive import encode_places, store_payloads, archive_stats, SERP_ARCHIVE_ZSTD_LEVEL, SERP_ARCHIVE_ZLIB_LEVEL
+
+NAMES = ['Haldız', 'Çelik', 'Yıldız', 'Güneş', 'Özdemir', 'Şahin', 'Altınbaş', 'Kaya', 'Demir', 'Aydın', 'Öztürk']
+KINDS = ['Kuyumculuk', 'Kuyumcu', 'Altın Evi', 'Mücevherat', 'Pırlanta', 'Saat']
+TYPES = ['Kuyumcu', 'Mücevher mağazası', 'Altın alım satım', 'Saat mağazası']
+STREETS = ['Bahariye Cd.', 'Moda Cd.', 'Söğütlüçeşme Cd.', 'Bağdat Cd.']
+DAYS = ['Pazartesi', 'Salı', 'Çarşamba', 'Perşembe', 'Cuma', 'Cumartesi', 'Pazar']
+
+
+def build_businesses(rng, count=300):
+    businesses = []
+    for i in range(count):
+        name = f"{rng.choice(NAMES)} {rng.choice(KINDS)}"
+        types = rng.sample(TYPES, 2)
+        businesses.append({
+            'title': name,
+            'address': f"{rng.choice(STREETS)} No:{rng.randint(1, 200)}, 34710 Kadıköy/İstanbul",
+            'latitude': 41 + rng.uniform(-0.05, 0.05),
+            'longitude': 29 + rng.uniform(-0.05, 0.05),
+            'rating': round(rng.uniform(3, 5), 1),
+            'ratingCount': rng.randint(1, 2000),
+            'type': types[0],
+            'types': types,
+            'website': f"https://www.{name.split()[0].lower()}{i}.com.tr/",
+            'phoneNumber': f"(0216) {rng.randint(200, 999)} {rng.randint(10, 99)} {rng.randint(10, 99)}",
+            'openingHours': {day: '09:00–20:00' for day in DAYS},
+            'thumbnailUrl': f"https://lh5.googleusercontent.com/p/AF1Qip{rng.getrandbits(160):040x}=w80-h106-k-no",
+            'cid': str(rng.getrandbits(63)),
+            'placeId': f"ChIJ{rng.getrandbits(128):032x}"[:27]
+        })
+    return businesses
+
+
+def grid_responses(rng, businesses, points):
+    """Komşu noktalar benzer işletme kümelerini farklı sırayla görür"""
+    responses = []
+    window = len(businesses) - 40
+    for k in range(points):
+        start = int(k / points * window)
+        chosen = rng.sample(businesses[start:start + 40], 20)
+        responses.append({'places': [dict(place, position=i + 1) for i, place in enumerate(chosen)]})
+    return responses
+
+
+def compare_codecs(responses):
+    """Tekil yükleri zlib ve (kuruluysa) zstd ile sıkıştırıp boyut ve süreyi döndürür"""
+    raws = {}
+    for data in responses:
+        raw = json.dumps(data['places'], ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        raws[raw] = True
+    codecs = [('zlib', lambda raw: zlib.compress(raw, SERP_ARCHIVE_ZLIB_LEVEL))]
+    if serp_archive.zstandard is not None:
+        compressor = serp_archive.zstandard.ZstdCompressor(level=SERP_ARCHIVE_ZSTD_LEVEL)
+        codecs.append(('zstd', compressor.compress))
+
+    raw_bytes = sum(len(raw) for raw in raws)
+    results = []
+    for name, compress in codecs:
+        started = time.perf_counter()
+        stored = sum(len(compress(raw)) for raw in raws)
+        results.append((name, stored, raw_bytes, (time.perf_counter() - started) * 1000 / len(raws)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', type=int, default=401, help='Analiz başına nokta sayısı')
+    parser.add_argument('--runs', type=int, default=2, help='Aynı yanıtları gören analiz sayısı')
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    responses = grid_responses(rng, build_businesses(rng), args.points)
+    mb = 1024 * 1024
+
+    for name, stored, raw_bytes, ms in compare_codecs(responses):
+        print(f"{name}: {raw_bytes / mb:.2f} MB ham -> {stored / mb:.2f} MB (%{stored / raw_bytes * 100:.1f}), "
+              f"{ms:.2f} ms/yük")
+    if serp_archive.zstandard is None:
+        print("zstd: zstandard paketi kurulu değil, arşiv zlib kullanır")
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        db.session.add(user)
+        db.session.flush()
+        project = Project(name='bench', keyword='kuyumcu', target_business='Haldız Kuyumculuk',
+                          center_coordinates='@41.0,29.0,11z', radius_km=2, user_id=user.id)
+        db.session.add(project)
+        db.session.flush()
+
+        for _ in range(args.runs):
+            analysis = Analysis(project_id=project.id)
+            db.session.add(analysis)
+            db.session.flush()
+            payloads = [encode_places(data) for data in responses]
+            store_payloads(payloads)
+            db.session.bulk_insert_mappings(AnalysisPoint, [{
+                'analysis_id': analysis.id,
+                'coordinates': f'@{41 + k * 1e-4:.6f},29.000000',
+                'latitude': 41 + k * 1e-4,
+                'longitude': 29.0,
+                'payload_hash': payload['hash']
+            } for k, payload in enumerate(payloads)])
+        db.session.commit()
+
+        stats = archive_stats()
+    print(f"{args.runs} analiz x {args.points} nokta: {stats['payloads']} tekil yük")
+    print(f"sıkıştırma: %{stats['compression_ratio'] * 100:.1f}, tekilleştirme: %{stats['dedup_ratio'] * 100:.1f}, "
+          f"toplam: {stats['stored_bytes'] / mb:.2f} MB / {stats['referenced_raw_bytes'] / mb:.2f} MB ham "
+          f"(%{stats['overall_ratio'] * 100:.1f})")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
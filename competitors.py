@@ -0,0 +1,131 @@
+import os
+from sqlalchemy import func
+from models import db, Analysis, CompetitorObservation
+from serp_archive import iter_analysis_payloads
+from name_matching import normalize_business_name
+
+# Rakip gözlemi ayarları
+COMPETITOR_TRACKING_ENABLED = os.getenv('COMPETITOR_TRACKING_ENABLED', '1') == '1'
+COMPETITOR_BATCH_SIZE = 1000
+COMPETITOR_TOP_DEFAULT = 3
+
+
+def observation_rows(project_id, analysis_id, point_id, places):
+    """Bir noktanın places listesini rakip gözlemi satırlarına çevirir
+
+    Sıra, hedef işletmenin eşleştirmesinde olduğu gibi listedeki yerinden alınır.
+    Ad, yazım farklarından bağımsız sorgulanabilsin diye normalize edilmiş haliyle de saklanır.
+    """
+    rows = []
+    for index, place in enumerate(places or []):
+        title = place.get('title')
+        if not title:
+            continue
+        rows.append({
+            'project_id': project_id,
+            'analysis_id': analysis_id,
+            'point_id': point_id,
+            'position': index + 1,
+            'title': title[:255],
+            'normalized_title': normalize_business_name(title)[:255],
+            'rating': place.get('rating'),
+            'rating_count': place.get('ratingCount'),
+            'place_id': place.get('placeId') or place.get('cid')
+        })
+    return rows
+
+
+def store_observations(rows):
+    """Gözlemleri gruplar halinde çok satırlı INSERT ile ekler (oturumun işlemi içinde)"""
+    rows = list(rows)
+    for start in range(0, len(rows), COMPETITOR_BATCH_SIZE):
+        db.session.execute(CompetitorObservation.__table__.insert(), rows[start:start + COMPETITOR_BATCH_SIZE])
+    return len(rows)
+
+
+def delete_observations(*criteria):
+    """Verilen koşullara uyan gözlemleri siler (analiz/proje silinmeden önce çağrılır)"""
+    CompetitorObservation.query.filter(*criteria).delete(synchronize_session=False)
+
+
+def top_competitors(analysis_id, top=COMPETITOR_TOP_DEFAULT):
+    """Analizde ilk top sırayı en çok noktada tutan işletmeleri döndürür
+
+    ix_competitor_observation_analysis_id_position üzerinden yalnızca ilk top
+    sıradaki gözlemler okunur.
+    """
+    points = func.count(CompetitorObservation.id)
+    # Aynı işletmenin farklı yazımları tek satırda toplanır
+    rows = db.session.query(
+        func.max(CompetitorObservation.title),
+        func.max(CompetitorObservation.place_id),
+        points,
+        func.avg(CompetitorObservation.position),
+        func.min(CompetitorObservation.position)
+    ).filter(
+        CompetitorObservation.analysis_id == analysis_id,
+        CompetitorObservation.position <= top
+    ).group_by(CompetitorObservation.normalized_title).order_by(points.desc(), func.avg(CompetitorObservation.position)).all()
+
+    return [{
+        'title': title,
+        'placeId': place_id,
+        'points': count,
+        'avgPosition': round(avg_position, 2),
+        'bestPosition': best_position
+    } for title, place_id, count, avg_position, best_position in rows]
+
+
+def competitor_history(project_id, title):
+    """İşletmenin projedeki analizlerde ortalama sırasını ve görüldüğü nokta sayısını tarihe göre döndürür
+
+    Ad normalize edilerek karşılaştırılır; büyük/küçük harf, Türkçe karakter ve
+    noktalama farkları aynı işletme sayılır.
+    """
+    history = db.session.query(
+        CompetitorObservation.analysis_id.label('analysis_id'),
+        func.count(CompetitorObservation.id).label('points'),
+        func.avg(CompetitorObservation.position).label('avg_position'),
+        func.min(CompetitorObservation.position).label('best_position')
+    ).filter(
+        CompetitorObservation.project_id == project_id,
+        CompetitorObservation.normalized_title == normalize_business_name(title)
+    ).group_by(CompetitorObservation.analysis_id).subquery()
+
+    rows = db.session.query(
+        Analysis.id,
+        Analysis.analysis_date,
+        Analysis.total_points,
+        history.c.points,
+        history.c.avg_position,
+        history.c.best_position
+    ).join(history, history.c.analysis_id == Analysis.id).order_by(Analysis.analysis_date, Analysis.id).all()
+
+    return [{
+        'analysisId': analysis_id,
+        'date': analysis_date.isoformat() if analysis_date else None,
+        'points': points,
+        'totalPoints': total_points,
+        'avgPosition': round(avg_position, 2),
+        'bestPosition': best_position
+    } for analysis_id, analysis_date, total_points, points, avg_position, best_position in rows]
+
+
+def backfill_observations(project_id):
+    """Gözlemi olmayan analizleri arşivlenmiş yanıtlardan doldurur, eklenen satır sayısını döndürür
+
+    Arşiv tutulmaya başlamadan önceki analizlerin yükü olmadığı için atlanır.
+    """
+    observed = db.session.query(CompetitorObservation.analysis_id).filter(
+        CompetitorObservation.project_id == project_id).distinct()
+    analysis_ids = [analysis_id for (analysis_id,) in db.session.query(Analysis.id).filter(
+        Analysis.project_id == project_id, Analysis.id.notin_(observed)).order_by(Analysis.id)]
+
+    inserted = 0
+    for analysis_id in analysis_ids:
+        rows = []
+        for point, places in iter_analysis_payloads(analysis_id):
+            rows.extend(observation_rows(project_id, analysis_id, point.id, places))
+        inserted += store_observations(rows)
+        db.session.commit()
+    return inserted
@@ -0,0 +1,115 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# Bağlantı havuzu ayarları
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', os.getenv('SERPER_MAX_CONCURRENCY', 32)))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 3))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', 0.5))
+
+_stats_lock = threading.Lock()
+_stats = {
+    'requests': 0,
+    'connections_opened': 0,
+    'bytes_sent': 0,
+    'bytes_received': 0,
+    'errors': 0
+}
+
+
+def _count(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count('connections_opened')
+        return super()._new_conn()
+
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count('connections_opened')
+        return super()._new_conn()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """Varsayılan zaman aşımı uygulayan ve trafik sayaçlarını tutan HTTP adaptörü"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool
+        }
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+        body = request.body or b''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        headers_size = sum(len(k) + len(v) + 4 for k, v in request.headers.items())
+        _count('requests')
+        _count('bytes_sent', len(body) + headers_size)
+
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            _count('errors')
+            raise
+
+        _count('bytes_received', len(response.content))
+        return response
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Süreç genelinde paylaşılan, keep-alive destekli HTTP oturumunu döndürür"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # Yalnızca sunucuya hiç ulaşmayan (bağlantısı kurulamayan) istekler burada
+                # yeniden denenir. Sunucuya ulaşan her istek (5xx, 429, okuma zaman aşımı)
+                # çağıranın hız sınırı ve kullanım kaydı döngüsünde tek tek denenir.
+                retry = Retry(
+                    total=HTTP_MAX_RETRIES,
+                    connect=HTTP_MAX_RETRIES,
+                    read=0,
+                    status=0,
+                    other=0,
+                    backoff_factor=HTTP_RETRY_BACKOFF,
+                    allowed_methods=frozenset(['GET', 'POST']),
+                    raise_on_status=False
+                )
+                adapter = PooledHTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=HTTP_POOL_SIZE,
+                    pool_block=True,
+                    max_retries=retry
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def get_session_stats():
+    """Bağlantı ve trafik sayaçlarını döndürür"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['connections_reused'] = max(stats['requests'] - stats['connections_opened'], 0)
+    stats['reuse_rate'] = (stats['connections_reused'] / stats['requests'] * 100) if stats['requests'] else 0
+    return stats
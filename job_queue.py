@@ -0,0 +1,165 @@
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+from models import db, AnalysisJob
+
+# Kuyruk ayarları
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 300))
+JOB_RETRY_BASE_SECONDS = int(os.getenv('JOB_RETRY_BASE_SECONDS', 30))
+JOB_RETRY_MAX_SECONDS = int(os.getenv('JOB_RETRY_MAX_SECONDS', 3600))
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def enqueue_analysis(project_id, run_after=None):
+    """Proje için analiz işi kuyruğa ekler, bekleyen bir iş varsa onu döndürür"""
+    return _enqueue(project_id, 'analysis', run_after)
+
+
+def enqueue_rematch(project_id):
+    """Projenin arşivlenmiş yanıtlarla yeniden eşleştirme işini kuyruğa ekler"""
+    return _enqueue(project_id, 'rematch')
+
+
+def _enqueue(project_id, kind, run_after=None):
+    job = get_active_job(project_id, kind)
+    if job:
+        return job
+
+    job = AnalysisJob(
+        project_id=project_id,
+        kind=kind,
+        status='queued',
+        attempts=0,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        run_after=run_after or datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def get_active_job(project_id, kind='analysis'):
+    """Projenin verilen türde kuyrukta bekleyen veya çalışan işini döndürür"""
+    return AnalysisJob.query.filter(
+        AnalysisJob.project_id == project_id,
+        AnalysisJob.kind == kind,
+        AnalysisJob.status.in_(ACTIVE_STATUSES)
+    ).order_by(AnalysisJob.id.desc()).first()
+
+
+def _claimable(now):
+    # Zamanı gelmiş bekleyen işler veya kirası dolmuş (çökmüş işçiye ait) çalışan işler
+    return or_(
+        and_(AnalysisJob.status == 'queued', AnalysisJob.run_after <= now),
+        and_(AnalysisJob.status == 'running', AnalysisJob.lease_expires_at < now)
+    )
+
+
+def claim_next_job(worker_id, batch_size=5):
+    """Sıradaki uygun işi kiralar ve {'id', 'kind', 'project_id', 'attempts'} döndürür, iş yoksa None"""
+    now = datetime.utcnow()
+    # Postgres'te satırları kilitleyip diğer işçilerin kilitlediklerini atlar, SQLite'ta yok sayılır
+    candidates = AnalysisJob.query.filter(_claimable(now)).order_by(
+        AnalysisJob.run_after, AnalysisJob.id
+    ).with_for_update(skip_locked=True).limit(batch_size).all()
+
+    for job in candidates:
+        if job.status == 'running' and job.attempts >= job.max_attempts:
+            # Kirası dolan iş deneme hakkını tüketmiş
+            AnalysisJob.query.filter(AnalysisJob.id == job.id, _claimable(now)).update({
+                'status': 'failed',
+                'locked_by': None,
+                'lease_expires_at': None,
+                'finished_at': now,
+                'last_error': 'Kira süresi doldu, deneme hakkı kalmadı'
+            }, synchronize_session=False)
+            db.session.commit()
+            continue
+
+        # Koşullu güncelleme: yalnızca başka bir işçi bu arada almadıysa kiralanır
+        claimed = AnalysisJob.query.filter(AnalysisJob.id == job.id, _claimable(now)).update({
+            'status': 'running',
+            'locked_by': worker_id,
+            'lease_expires_at': now + timedelta(seconds=JOB_LEASE_SECONDS),
+            'attempts': AnalysisJob.attempts + 1,
+            'started_at': now
+        }, synchronize_session=False)
+        db.session.commit()
+
+        if claimed == 1:
+            job = db.session.get(AnalysisJob, job.id)
+            return {'id': job.id, 'kind': job.kind, 'project_id': job.project_id, 'attempts': job.attempts}
+
+    db.session.rollback()
+    return None
+
+
+def extend_lease(job_id, worker_id):
+    """Çalışan işin kirasını uzatır, iş başka işçiye geçtiyse False döndürür"""
+    extended = AnalysisJob.query.filter(
+        AnalysisJob.id == job_id,
+        AnalysisJob.locked_by == worker_id,
+        AnalysisJob.status == 'running'
+    ).update({
+        'lease_expires_at': datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)
+    }, synchronize_session=False)
+    db.session.commit()
+    return extended == 1
+
+
+def complete_job(job_id, worker_id, analysis_id):
+    """İşi tamamlandı olarak işaretler"""
+    AnalysisJob.query.filter(
+        AnalysisJob.id == job_id,
+        AnalysisJob.locked_by == worker_id
+    ).update({
+        'status': 'completed',
+        'analysis_id': analysis_id,
+        'locked_by': None,
+        'lease_expires_at': None,
+        'finished_at': datetime.utcnow(),
+        'last_error': None
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+def fail_job(job_id, worker_id, error):
+    """İşi başarısız sayar; deneme hakkı varsa üstel geri çekilmeyle yeniden kuyruğa alır"""
+    job = db.session.get(AnalysisJob, job_id)
+    if job is None or job.locked_by != worker_id:
+        db.session.rollback()
+        return
+
+    now = datetime.utcnow()
+    job.locked_by = None
+    job.lease_expires_at = None
+    job.last_error = str(error)[:2000]
+
+    if job.attempts >= job.max_attempts:
+        job.status = 'failed'
+        job.finished_at = now
+    else:
+        delay = min(JOB_RETRY_BASE_SECONDS * (2 ** (job.attempts - 1)), JOB_RETRY_MAX_SECONDS)
+        job.status = 'queued'
+        job.run_after = now + timedelta(seconds=delay)
+
+    db.session.commit()
+
+
+def job_to_dict(job):
+    """İş durumunu API yanıtı için sözlüğe çevirir"""
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'projectId': job.project_id,
+        'analysisId': job.analysis_id,
+        'status': job.status,
+        'attempts': job.attempts,
+        'maxAttempts': job.max_attempts,
+        'runAfter': job.run_after.isoformat() if job.run_after else None,
+        'startedAt': job.started_at.isoformat() if job.started_at else None,
+        'finishedAt': job.finished_at.isoformat() if job.finished_at else None,
+        'lastError': job.last_error
+    }
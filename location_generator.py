@@ -1,101 +1,171 @@
+import os
 import math
+import numpy as np
 from geopy.distance import geodesic
 
+# Dünya'nın yaklaşık yarıçapı (km)
+EARTH_RADIUS_KM = 6371.0
+# 1 derece enlem yaklaşık 111.32 km
+KM_PER_DEGREE = 111.32
+# Desteklenen desenler
+PATTERNS = ('circle', 'square', 'rings', 'hex')
+# Halkalar/altıgen desenlerinde hedeflenen noktalar arası mesafe (km). Nokta sayısı bu
+# çözünürlükle yarıçaptan türetilir; num_points dış çemberdeki nokta sayısını, yani
+# analiz başına Serper çağrısı sayısının üst sınırını belirler.
+GRID_RESOLUTION_KM = float(os.getenv('GRID_RESOLUTION_KM', 0.5))
+
 class LocationGenerator:
     def __init__(self, center_lat, center_lon, radius_km):
         self.center_lat = float(center_lat)
         self.center_lon = float(center_lon)
         self.radius_km = float(radius_km)
 
+        # Merkez noktanın trigonometrik değerlerini bir kez hesapla
+        self._lat_rad = math.radians(self.center_lat)
+        self._lon_rad = math.radians(self.center_lon)
+        self._sin_lat = math.sin(self._lat_rad)
+        self._cos_lat = math.cos(self._lat_rad)
+
     def generate_coordinates(self, pattern="circle", num_points=16):
         """Belirtilen desende koordinat noktaları üretir"""
+        return self.format_coordinates(self.generate_coordinate_array(pattern, num_points))
+
+    def generate_coordinate_array(self, pattern="circle", num_points=16):
+        """Belirtilen desende koordinatları (N, 2) boyutlu enlem/boylam dizisi olarak üretir"""
         if pattern == "circle":
-            return self._generate_circle_coordinates(num_points)
+            return self._generate_circle_array(num_points)
         elif pattern == "square":
-            return self._generate_square_coordinates(num_points)
+            return self._generate_square_array(num_points)
+        elif pattern == "rings":
+            return self._generate_rings_array(num_points)
+        elif pattern == "hex":
+            return self._generate_hex_array(num_points)
         else:
             raise ValueError(f"Geçersiz desen: {pattern}")
 
-    def _generate_circle_coordinates(self, num_points):
+    @staticmethod
+    def format_coordinates(points):
+        """Enlem/boylam dizisini '@lat,lon' formatındaki metinlere çevirir"""
+        return [f"@{lat},{lon}" for lat, lon in points.tolist()]
+
+    def _generate_circle_array(self, num_points):
         """Daire şeklinde koordinat noktaları üretir"""
-        coordinates = []
-        
-        # Merkez noktayı ekle
-        coordinates.append(f"@{self.center_lat},{self.center_lon}")
-        
-        # Çemberdeki noktaları ekle
-        for i in range(num_points):
-            angle = (2 * math.pi * i) / num_points
-            point = self._get_point_at_distance(angle)
-            coordinates.append(f"@{point[0]},{point[1]}")
-            
-            # İç çemberde noktalar ekle (yarı yarıçapta)
-            if self.radius_km > 1:
-                inner_point = self._get_point_at_distance(angle, self.radius_km / 2)
-                coordinates.append(f"@{inner_point[0]},{inner_point[1]}")
-        
-        return coordinates
-
-    def _generate_square_coordinates(self, num_points):
+        angles = 2 * np.pi * np.arange(num_points) / num_points
+
+        if self.radius_km > 1:
+            # Her açı için önce dış çember, sonra iç çember (yarı yarıçapta) noktası
+            bearings = np.repeat(angles, 2)
+            distances = np.tile([self.radius_km, self.radius_km / 2], num_points)
+        else:
+            bearings = angles
+            distances = np.full(num_points, self.radius_km)
+
+        ring = self._get_points_at_distance(bearings, distances)
+        # Merkez noktayı başa ekle
+        return np.vstack(([[self.center_lat, self.center_lon]], ring))
+
+    def _generate_square_array(self, num_points):
         """Kare şeklinde koordinat noktaları üretir"""
-        coordinates = []
-        
-        # Merkez noktayı ekle
-        coordinates.append(f"@{self.center_lat},{self.center_lon}")
-        
         # Karenin kenar uzunluğunu hesapla (yarıçapın 2 katı)
         side_length = self.radius_km * 2
-        
+
         # Nokta sayısından ızgara boyutunu hesapla
         grid_size = int(math.sqrt(num_points))
-        
+
         # Izgara aralığını hesapla
         step = side_length / (grid_size - 1)
-        
+
         # Başlangıç noktasını hesapla (sol üst köşe)
-        start_lat = self.center_lat + (self.radius_km / 111.32)  # 1 derece yaklaşık 111.32 km
-        start_lon = self.center_lon - (self.radius_km / (111.32 * math.cos(math.radians(self.center_lat))))
-        
-        # Izgaradaki her nokta için
-        for i in range(grid_size):
-            for j in range(grid_size):
-                lat = start_lat - (i * step / 111.32)
-                lon = start_lon + (j * step / (111.32 * math.cos(math.radians(lat))))
-                coordinates.append(f"@{lat},{lon}")
-        
-        return coordinates
+        start_lat = self.center_lat + (self.radius_km / KM_PER_DEGREE)
+        start_lon = self.center_lon - (self.radius_km / (KM_PER_DEGREE * self._cos_lat))
+
+        # Satır enlemleri ve her satırın kendi enlemine göre boylam aralığı
+        index = np.arange(grid_size)
+        lats = start_lat - (index * step / KM_PER_DEGREE)
+        lons = start_lon + np.outer(step / (KM_PER_DEGREE * np.cos(np.radians(lats))), index)
+
+        grid = np.empty((grid_size * grid_size + 1, 2))
+        grid[0] = (self.center_lat, self.center_lon)
+        grid[1:, 0] = np.repeat(lats, grid_size)
+        grid[1:, 1] = lons.ravel()
+        return grid
+
+    def grid_spacing_km(self, num_points):
+        """Halkalar/altıgen desenleri için noktalar arası mesafeyi (çözünürlüğü) döndürür
+
+        Hedef GRID_RESOLUTION_KM'dir; dış çemberde num_points noktadan fazlası
+        gerekecekse aralık dış çemberde num_points nokta olacak şekilde açılır.
+        """
+        return max(GRID_RESOLUTION_KM, 2 * math.pi * self.radius_km / max(int(num_points), 1))
+
+    def estimate_points(self, pattern="circle", num_points=16):
+        """Desenin üreteceği nokta sayısını, yani analiz başına Serper çağrısını döndürür
+
+        Üst sınırda (yarıçap >= num_points * GRID_RESOLUTION_KM / 2π) halkalar deseni
+        num_points=16 için 33, 32 için 97; altıgen 19 ve 91; daire ise 33 ve 65 nokta üretir.
+        """
+        return len(self.generate_coordinate_array(pattern, num_points))
+
+    def _generate_rings_array(self, num_points):
+        """Eşit aralıklı eş merkezli halkalar üretir, halka başına nokta sayısı çevreyle orantılıdır"""
+        spacing = self.grid_spacing_km(num_points)
+        # Halkalar arası mesafe, halka üzerindeki noktalar arası mesafeye yakın olacak şekilde
+        num_rings = max(1, int(round(self.radius_km / spacing)))
+
+        bearings = []
+        distances = []
+        for k in range(1, num_rings + 1):
+            distance = self.radius_km * k / num_rings
+            ring_points = min(num_points, max(3, int(round(2 * math.pi * distance / spacing))))
+            # Komşu halkaların noktalarını aynı doğrultuya düşmemeleri için yarım adım kaydır
+            offset = (k % 2) * math.pi / ring_points
+            bearings.append(offset + 2 * np.pi * np.arange(ring_points) / ring_points)
+            distances.append(np.full(ring_points, distance))
+
+        rings = self._get_points_at_distance(np.concatenate(bearings), np.concatenate(distances))
+        return np.vstack(([[self.center_lat, self.center_lon]], rings))
+
+    def _generate_hex_array(self, num_points):
+        """Alanı altıgen (üçgen kafes) döşemeyle kaplayan noktalar üretir"""
+        spacing = self.grid_spacing_km(num_points)
+        n = int(math.ceil(self.radius_km / spacing)) + 1
+
+        # Kafes noktalarını merkeze göre doğu (x) / kuzey (y) km cinsinden üret
+        i, j = np.meshgrid(np.arange(-n, n + 1), np.arange(-n, n + 1))
+        x = spacing * (i + j / 2).ravel()
+        y = spacing * (j * math.sqrt(3) / 2).ravel()
+        distances = np.hypot(x, y)
+
+        # Yalnızca yarıçap içindekileri al, merkezden dışa doğru ve açıya göre sırala
+        inside = (distances <= self.radius_km * (1 + 1e-9)) & (distances > 0)
+        bearings = np.arctan2(x[inside], y[inside]) % (2 * np.pi)
+        distances = distances[inside]
+        order = np.lexsort((bearings, np.round(distances, 9)))
+
+        cells = self._get_points_at_distance(bearings[order], distances[order])
+        return np.vstack(([[self.center_lat, self.center_lon]], cells))
+
+    def _get_points_at_distance(self, bearings, distances_km):
+        """Açı ve mesafe dizileri için noktaları tek seferde üretir"""
+        # Mesafeyi radyana çevir
+        d = np.asarray(distances_km, dtype=float) / EARTH_RADIUS_KM
+        bearings = np.asarray(bearings, dtype=float)
+        sin_d = np.sin(d)
+        cos_d = np.cos(d)
+
+        # Yeni noktaların koordinatlarını hesapla
+        lat2 = np.arcsin(self._sin_lat * cos_d + self._cos_lat * sin_d * np.cos(bearings))
+        lon2 = self._lon_rad + np.arctan2(
+            np.sin(bearings) * sin_d * self._cos_lat,
+            cos_d - self._sin_lat * np.sin(lat2)
+        )
+
+        # Radyandan dereceye çevir
+        return np.column_stack((np.degrees(lat2), np.degrees(lon2)))
 
     def _get_point_at_distance(self, angle, distance_km=None):
         """Belirli bir açı ve mesafede nokta üretir"""
         if distance_km is None:
             distance_km = self.radius_km
-            
-        # Dünya'nın yaklaşık yarıçapı (km)
-        R = 6371.0
-        
-        # Açıyı radyandan dereceye çevir
-        brng = math.degrees(angle)
-        
-        # Mesafeyi radyana çevir
-        d = distance_km / R
-        
-        # Başlangıç noktasının koordinatlarını radyana çevir
-        lat1 = math.radians(self.center_lat)
-        lon1 = math.radians(self.center_lon)
-        
-        # Yeni noktanın koordinatlarını hesapla
-        lat2 = math.asin(
-            math.sin(lat1) * math.cos(d) +
-            math.cos(lat1) * math.sin(d) * math.cos(math.radians(brng))
-        )
-        
-        lon2 = lon1 + math.atan2(
-            math.sin(math.radians(brng)) * math.sin(d) * math.cos(lat1),
-            math.cos(d) - math.sin(lat1) * math.sin(lat2)
-        )
-        
-        # Radyandan dereceye çevir
-        lat2 = math.degrees(lat2)
-        lon2 = math.degrees(lon2)
-        
-        return lat2, lon2
\ No newline at end of file
+        lat2, lon2 = self._get_points_at_distance([angle], [distance_km])[0].tolist()
+        return lat2, lon2
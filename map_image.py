@@ -0,0 +1,230 @@
+import io
+import os
+import math
+import threading
+import numpy as np
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.lines import Line2D
+from matplotlib.font_manager import FontProperties, findfont
+from http_session import get_session
+
+# PNG harita ayarları
+MAP_IMAGE_WIDTH = int(os.getenv('MAP_IMAGE_WIDTH', 1200))  # piksel
+MAP_IMAGE_HEIGHT = int(os.getenv('MAP_IMAGE_HEIGHT', 900))
+MAP_IMAGE_DPI = 100
+# Altlık harita için XYZ karo adresi, ör. https://tile.openstreetmap.org/{z}/{x}/{y}.png (boşsa altlık çizilmez)
+MAP_TILE_URL = os.getenv('MAP_TILE_URL', '')
+MAP_TILE_CACHE_DIR = os.getenv('MAP_TILE_CACHE_DIR', os.path.join('instance', 'tiles'))
+MAP_TILE_ATTRIBUTION = os.getenv('MAP_TILE_ATTRIBUTION', '© OpenStreetMap contributors')
+MAP_TILE_USER_AGENT = os.getenv('MAP_TILE_USER_AGENT', 'MapsRankTracker/1.0')
+MAP_TILE_MAX_ZOOM = 18
+TILE_SIZE = 256
+
+# matplotlib'in yazı tipi önbelleği iş parçacıkları arasında paylaşılır; süreç içinde çizimler sıralanır,
+# ayrı işçi süreçleri birbirini beklemez
+_render_lock = threading.Lock()
+
+EARTH_RADIUS_M = 6378137.0
+WORLD_SIZE_M = 2 * math.pi * EARTH_RADIUS_M
+
+RANK_STYLES = (
+    # (renk, yarıçap px, lejant)
+    ('#28a745', 25, '1-3. sıra'),
+    ('#ffc107', 20, '4-10. sıra'),
+    ('#dc3545', 15, '10+ sıra'),
+    ('#6c757d', 12, 'Görünmüyor')
+)
+
+
+def rank_style(position):
+    """Sıraya göre (renk, yarıçap) döndürür, folium haritasındaki renklerle aynıdır"""
+    if position:
+        if position <= 3:
+            return RANK_STYLES[0][:2]
+        if position <= 10:
+            return RANK_STYLES[1][:2]
+        return RANK_STYLES[2][:2]
+    return RANK_STYLES[3][:2]
+
+
+@lru_cache(maxsize=1)
+def _label_font():
+    """Sıra etiketleri için matplotlib ile gelen kalın DejaVu Sans yazı tipini yükler"""
+    return ImageFont.truetype(findfont(FontProperties(family='DejaVu Sans', weight='bold')), 13)
+
+
+def to_web_mercator(lat, lon):
+    """Enlem/boylam dizilerini Web Mercator (EPSG:3857) metre koordinatlarına çevirir"""
+    lat = np.clip(np.asarray(lat, dtype=float), -85.0511, 85.0511)
+    lon = np.asarray(lon, dtype=float)
+    x = EARTH_RADIUS_M * np.radians(lon)
+    y = EARTH_RADIUS_M * np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+    return x, y
+
+
+def _tile_path(z, x, y):
+    return os.path.join(MAP_TILE_CACHE_DIR, str(z), str(x), f"{y}.png")
+
+
+def _load_tile(z, x, y):
+    """Karoyu yerel önbellekten, yoksa MAP_TILE_URL'den okur; alınamazsa None döndürür"""
+    path = _tile_path(z, x, y)
+    try:
+        with open(path, 'rb') as f:
+            return Image.open(io.BytesIO(f.read())).convert('RGB')
+    except OSError:
+        pass
+
+    try:
+        response = get_session().get(MAP_TILE_URL.format(z=z, x=x, y=y),
+                                     headers={'User-Agent': MAP_TILE_USER_AGENT})
+        response.raise_for_status()
+        image = Image.open(io.BytesIO(response.content)).convert('RGB')
+    except Exception as e:
+        print(f"Harita karosu alınamadı ({z}/{x}/{y}): {str(e)}")
+        return None
+
+    # Aynı karoyu yazan işçiler birbirini bozmasın diye geçici dosya üzerinden yazılır
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(response.content)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Harita karosu önbelleğe yazılamadı: {str(e)}")
+    return image
+
+
+def _basemap(x_min, x_max, y_min, y_max, width_px, height_px):
+    """Görünen alanı kaplayan karoları birleştirip çıktı boyutunda görüntü döndürür, karo yoksa None"""
+    meters_per_px = (x_max - x_min) / width_px
+    zoom = int(math.floor(math.log2(WORLD_SIZE_M / (TILE_SIZE * meters_per_px))))
+    zoom = max(0, min(zoom, MAP_TILE_MAX_ZOOM))
+    tiles_per_side = 2 ** zoom
+    tile_m = WORLD_SIZE_M / tiles_per_side
+
+    def tile_x(x):
+        return int(math.floor((x + WORLD_SIZE_M / 2) / tile_m))
+
+    def tile_y(y):
+        return int(math.floor((WORLD_SIZE_M / 2 - y) / tile_m))
+
+    tx_min, tx_max = max(tile_x(x_min), 0), min(tile_x(x_max), tiles_per_side - 1)
+    ty_min, ty_max = max(tile_y(y_max), 0), min(tile_y(y_min), tiles_per_side - 1)
+
+    mosaic = Image.new('RGB', ((tx_max - tx_min + 1) * TILE_SIZE, (ty_max - ty_min + 1) * TILE_SIZE), '#f2efe9')
+    loaded = 0
+    for tx in range(tx_min, tx_max + 1):
+        for ty in range(ty_min, ty_max + 1):
+            tile = _load_tile(zoom, tx, ty)
+            if tile is not None:
+                mosaic.paste(tile, ((tx - tx_min) * TILE_SIZE, (ty - ty_min) * TILE_SIZE))
+                loaded += 1
+    if not loaded:
+        return None
+
+    # Mozaikten görünen alanı kesip çıktı boyutuna ölçekle
+    left = tx_min * tile_m - WORLD_SIZE_M / 2
+    top = WORLD_SIZE_M / 2 - ty_min * tile_m
+    scale = TILE_SIZE / tile_m
+    box = ((x_min - left) * scale, (top - y_max) * scale, (x_max - left) * scale, (top - y_min) * scale)
+    return mosaic.resize((width_px, height_px), Image.BILINEAR, box=box)
+
+
+def render_rank_map(points, center_coordinates, output_path,
+                    width=MAP_IMAGE_WIDTH, height=MAP_IMAGE_HEIGHT):
+    """Nokta sıralamalarını tarayıcı kullanmadan PNG haritaya çizer
+
+    points, RankAnalyzer.locations_data biçimindedir ('coordinates' ve 'position').
+    pyplot yerine nesne yönelimli Agg API kullanıldığı için global figür durumu yoktur.
+    """
+    with _render_lock:
+        _render_rank_map(points, center_coordinates, output_path, width, height)
+
+
+def _render_rank_map(points, center_coordinates, output_path, width, height):
+    center_lat, center_lon = (float(v) for v in center_coordinates.replace('@', '').split(',')[:2])
+    lats, lons, positions = [], [], []
+    for point in points:
+        lat, lon = point['coordinates'].replace('@', '').split(',')[:2]
+        lats.append(float(lat))
+        lons.append(float(lon))
+        positions.append(point['position'])
+
+    xs, ys = to_web_mercator(lats + [center_lat], lons + [center_lon])
+    center_x, center_y = xs[-1], ys[-1]
+    xs, ys = xs[:-1], ys[:-1]
+
+    # Tüm noktaları kapsayan ve görüntü oranını koruyan alan
+    half_w = max(np.max(np.abs(xs - center_x)) if len(xs) else 0, 500.0) * 1.15
+    half_h = max(np.max(np.abs(ys - center_y)) if len(ys) else 0, 500.0) * 1.15
+    aspect = width / height
+    if half_w / half_h < aspect:
+        half_w = half_h * aspect
+    else:
+        half_h = half_w / aspect
+    x_min, x_max = center_x - half_w, center_x + half_w
+    y_min, y_max = center_y - half_h, center_y + half_h
+
+    fig = Figure(figsize=(width / MAP_IMAGE_DPI, height / MAP_IMAGE_DPI), dpi=MAP_IMAGE_DPI)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+    # Figür saydam çizilir, altlık harita Pillow ile altına yerleştirilir
+    fig.patch.set_alpha(0)
+    ax.patch.set_alpha(0)
+
+    basemap = _basemap(x_min, x_max, y_min, y_max, width, height) if MAP_TILE_URL else None
+    if basemap is not None:
+        ax.text(0.995, 0.005, MAP_TILE_ATTRIBUTION, transform=ax.transAxes, ha='right', va='bottom',
+                fontsize=7, color='#333333', zorder=5,
+                bbox={'facecolor': 'white', 'alpha': 0.7, 'edgecolor': 'none', 'pad': 1})
+
+    # Daireler: yarıçaplar folium haritasındaki piksel değerleriyle aynı
+    styles = [rank_style(position) for position in positions]
+    colors = [color for color, _ in styles]
+    sizes = [(2 * radius * 72 / MAP_IMAGE_DPI) ** 2 for _, radius in styles]
+    ax.scatter(xs, ys, s=sizes, c=colors, alpha=0.7, edgecolors=colors, linewidths=3, zorder=2)
+
+    ax.scatter([center_x], [center_y], marker='*', s=320, c='#d63e2a', edgecolors='white', linewidths=1.5, zorder=4)
+
+    handles = [
+        Line2D([], [], marker='o', linestyle='', markersize=12, markerfacecolor=color, markeredgecolor=color, label=label)
+        for color, _, label in RANK_STYLES
+    ]
+    handles.append(Line2D([], [], marker='*', linestyle='', markersize=14, markerfacecolor='#d63e2a',
+                          markeredgecolor='white', label='Merkez'))
+    legend = ax.legend(handles=handles, title='Sıralama Göstergeleri', loc='lower right',
+                       frameon=True, fontsize=11, title_fontsize=12, borderpad=1)
+    legend.get_frame().set_edgecolor('#cccccc')
+    legend.set_zorder(6)
+
+    ax.set_xlim(x_min, x_max)
+    ax.set_ylim(y_min, y_max)
+    ax.set_aspect('equal')
+
+    canvas.draw()
+    overlay = Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+    background = basemap.convert('RGBA') if basemap is not None else Image.new('RGBA', (width, height), '#f2efe9')
+    image = Image.alpha_composite(background, overlay).convert('RGB')
+
+    # Sıra numaraları matplotlib Text nesneleri yerine doğrudan Pillow ile yazılır;
+    # yoğun ızgaralarda her etiketi ayrı düzenlemek çizim süresinin çoğunu alıyordu
+    draw = ImageDraw.Draw(image)
+    font = _label_font()
+    legend_box = legend.get_window_extent(canvas.get_renderer())
+    pixels = ax.transData.transform(np.column_stack([xs, ys])) if len(xs) else []
+    for (px, py), position, (color, _) in zip(pixels, positions, styles):
+        if not position or legend_box.contains(px, py):
+            continue
+        draw.text((px, height - py), str(position), font=font, anchor='mm',
+                  fill='#333333' if color == RANK_STYLES[1][0] else 'white')
+
+    # Yarım yazılmış dosya okunmasın diye geçici dosyaya kaydedip taşı
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    image.save(tmp_path, format='PNG', compress_level=1)
+    os.replace(tmp_path, output_path)
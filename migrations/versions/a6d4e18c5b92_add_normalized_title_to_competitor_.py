@@ -0,0 +1,55 @@
+"""add normalized_title to competitor_observation
+
+Revision ID: a6d4e18c5b92
+Revises: f3b8c26d0a47
+Create Date: 2026-10-18 17:19:51.118306
+
+"""
+import re
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d4e18c5b92'
+down_revision = 'f3b8c26d0a47'
+branch_labels = None
+depends_on = None
+
+# Doldurma, uygulama kodu sonradan değişse de aynı sonucu versin diye
+# name_matching.normalize_business_name'in bu revizyondaki hali buraya kopyalanmıştır
+_TURKISH_TABLE = str.maketrans({'ı': 'i', 'ğ': 'g', 'ü': 'u', 'ş': 's', 'ö': 'o', 'ç': 'c'})
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+
+def _normalize_title(name):
+    if not name:
+        return ""
+    name = _PUNCTUATION_RE.sub('', name.lower().translate(_TURKISH_TABLE))
+    return ' '.join(name.split())
+
+
+def upgrade():
+    with op.batch_alter_table('competitor_observation', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('normalized_title', sa.String(length=255), nullable=True))
+
+    # Mevcut gözlemler farklı adlar üzerinden toplu olarak doldurulur
+    connection = op.get_bind()
+    titles = [title for (title,) in connection.execute(sa.text('SELECT DISTINCT title FROM competitor_observation'))]
+    for start in range(0, len(titles), 1000):
+        connection.execute(
+            sa.text('UPDATE competitor_observation SET normalized_title = :normalized WHERE title = :title'),
+            [{'title': title, 'normalized': _normalize_title(title)[:255]} for title in titles[start:start + 1000]]
+        )
+
+    with op.batch_alter_table('competitor_observation', schema=None) as batch_op:
+        batch_op.alter_column('normalized_title', existing_type=sa.String(length=255), nullable=False)
+        batch_op.drop_index('ix_competitor_observation_project_id_title')
+        batch_op.create_index('ix_competitor_observation_project_id_normalized_title', ['project_id', 'normalized_title', 'analysis_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('competitor_observation', schema=None) as batch_op:
+        batch_op.drop_index('ix_competitor_observation_project_id_normalized_title')
+        batch_op.create_index('ix_competitor_observation_project_id_title', ['project_id', 'title', 'analysis_id'], unique=False)
+        batch_op.drop_column('normalized_title')
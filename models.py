@@ -37,6 +37,10 @@ class Project(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     analyses = db.relationship('Analysis', backref='project', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_project_user_id', 'user_id'),
+    )
+
 class Analysis(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
@@ -47,10 +51,20 @@ class Analysis(db.Model):
     best_position = db.Column(db.Integer)
     worst_position = db.Column(db.Integer)
     visibility_rate = db.Column(db.Float)
+    # Sıralama dağılımı analiz tamamlanırken yazılır (bkz. analysis_summary)
+    rank_1_3 = db.Column(db.Integer)
+    rank_4_10 = db.Column(db.Integer)
+    rank_11_20 = db.Column(db.Integer)
+    rank_20_plus = db.Column(db.Integer)
+    rank_not_visible = db.Column(db.Integer)
     map_file_path = db.Column(db.String(200))
     analysis_file_path = db.Column(db.String(200))
     points = db.relationship('AnalysisPoint', backref='analysis', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_analysis_project_id_analysis_date', 'project_id', 'analysis_date'),
+    )
+
 class AnalysisPoint(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     analysis_id = db.Column(db.Integer, db.ForeignKey('analysis.id'), nullable=False)
@@ -60,8 +74,40 @@ class AnalysisPoint(db.Model):
     position = db.Column(db.Integer)
     rating = db.Column(db.Float)
     rating_count = db.Column(db.Integer)
+    payload_hash = db.Column(db.String(32))  # ham Serper yanıtı (bkz. SerpPayload)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_analysis_point_analysis_id', 'analysis_id'),
+        db.Index('ix_analysis_point_payload_hash', 'payload_hash'),
+    )
+
+class SerpPayload(db.Model):
+    # Noktalarda görülen places listeleri içerik özetine göre tekilleştirilip sıkıştırılmış saklanır
+    hash = db.Column(db.String(32), primary_key=True)
+    encoding = db.Column(db.String(10), nullable=False)  # zstd, zlib
+    raw_size = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class CompetitorObservation(db.Model):
+    # Her noktadaki Serper yanıtında görülen tüm işletmeler, sıralarıyla birlikte
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    analysis_id = db.Column(db.Integer, db.ForeignKey('analysis.id'), nullable=False)
+    point_id = db.Column(db.Integer, db.ForeignKey('analysis_point.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    normalized_title = db.Column(db.String(255), nullable=False)  # normalize_business_name(title), sorgular bunu kullanır
+    rating = db.Column(db.Float)
+    rating_count = db.Column(db.Integer)
+    place_id = db.Column(db.String(100))
+
+    __table_args__ = (
+        db.Index('ix_competitor_observation_project_id_normalized_title', 'project_id', 'normalized_title', 'analysis_id'),
+        db.Index('ix_competitor_observation_analysis_id_position', 'analysis_id', 'position'),
+    )
+
 class ScheduledAnalysis(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
@@ -69,4 +115,30 @@ class ScheduledAnalysis(db.Model):
     last_run = db.Column(db.DateTime)
     next_run = db.Column(db.DateTime)
     is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow) 
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_scheduled_analysis_is_active_next_run', 'is_active', 'next_run'),
+    )
+
+class AnalysisJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    analysis_id = db.Column(db.Integer, db.ForeignKey('analysis.id'))
+    kind = db.Column(db.String(20), nullable=False, default='analysis', server_default='analysis')  # analysis, rematch
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    lease_expires_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    project = db.relationship('Project', backref=db.backref('jobs', lazy=True))
+
+    __table_args__ = (
+        db.Index('ix_analysis_job_status_run_after', 'status', 'run_after'),
+        db.Index('ix_analysis_job_project_id_status', 'project_id', 'status'),
+    )
@@ -0,0 +1,129 @@
+import os
+import re
+from functools import lru_cache
+
+# rapidfuzz kuruluysa hızlandırılmış Levenshtein kullanılır, yoksa saf Python sürümüne düşülür
+try:
+    from rapidfuzz.distance import Levenshtein as _rapidfuzz_levenshtein
+except ImportError:
+    _rapidfuzz_levenshtein = None
+
+NORMALIZE_CACHE_SIZE = int(os.getenv('NORMALIZE_CACHE_SIZE', 16384))
+
+# Türkçe karakterleri ASCII karşılıklarına çeviren tablo
+_TURKISH_TABLE = str.maketrans({
+    'ı': 'i',
+    'ğ': 'g',
+    'ü': 'u',
+    'ş': 's',
+    'ö': 'o',
+    'ç': 'c'
+})
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_business_name(name):
+    """İşletme adını normalize eder"""
+    if not name:
+        return ""
+    # Küçük harfe çevir ve Türkçe karakterleri değiştir
+    name = name.lower().translate(_TURKISH_TABLE)
+    # Noktalama işaretlerini ve fazla boşlukları temizle
+    name = _PUNCTUATION_RE.sub('', name)
+    return ' '.join(name.split())
+
+
+def levenshtein_distance(s1, s2):
+    """İki string arasındaki Levenshtein mesafesini hesaplar"""
+    if len(s1) < len(s2):
+        return levenshtein_distance(s2, s1)
+
+    if len(s2) == 0:
+        return len(s1)
+
+    previous_row = range(len(s2) + 1)
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        previous_row = current_row
+
+    return previous_row[-1]
+
+
+def bounded_levenshtein(s1, s2, max_distance):
+    """Mesafe max_distance'ı aşıyorsa erken çıkar ve max_distance + 1 döndürür"""
+    if s1 == s2:
+        return 0
+    if max_distance <= 0:
+        return max_distance + 1
+
+    len1, len2 = len(s1), len(s2)
+    # Uzunluk farkı sınırı aşıyorsa hesaplamaya gerek yok
+    if abs(len1 - len2) > max_distance:
+        return max_distance + 1
+
+    if _rapidfuzz_levenshtein is not None:
+        return _rapidfuzz_levenshtein.distance(s1, s2, score_cutoff=max_distance)
+
+    if len1 < len2:
+        s1, s2 = s2, s1
+        len1, len2 = len2, len1
+    if len2 == 0:
+        return len1
+
+    # Ukkonen bandı: yalnızca |i - j| <= max_distance olan hücreler hesaplanır
+    limit = max_distance + 1
+    previous_row = [j if j <= max_distance else limit for j in range(len2 + 1)]
+    for i in range(1, len1 + 1):
+        c1 = s1[i - 1]
+        current_row = [limit] * (len2 + 1)
+        current_row[0] = i if i <= max_distance else limit
+        row_min = current_row[0]
+        for j in range(max(1, i - max_distance), min(len2, i + max_distance) + 1):
+            value = min(
+                previous_row[j] + 1,
+                current_row[j - 1] + 1,
+                previous_row[j - 1] + (c1 != s2[j - 1])
+            )
+            if value > limit:
+                value = limit
+            current_row[j] = value
+            if value < row_min:
+                row_min = value
+        # Satırın en küçük değeri sınırı aştıysa eşik artık sağlanamaz
+        if row_min > max_distance:
+            return limit
+        previous_row = current_row
+
+    return min(previous_row[len2], limit)
+
+
+def max_distance_for(max_length, threshold):
+    """1 - d / max_length >= threshold koşulunu sağlayan en büyük mesafeyi döndürür"""
+    distance = int((1 - threshold) * max_length)
+    while distance < max_length and 1 - ((distance + 1) / max_length) >= threshold:
+        distance += 1
+    while distance >= 0 and 1 - (distance / max_length) < threshold:
+        distance -= 1
+    return distance
+
+
+def similarity_at_least(s1, s2, threshold):
+    """Benzerlik oranı eşiği geçiyorsa oranı, geçmiyorsa None döndürür"""
+    max_length = max(len(s1), len(s2))
+    if max_length == 0:
+        return 0 if 0 >= threshold else None
+
+    max_distance = max_distance_for(max_length, threshold)
+    if max_distance < 0:
+        return None
+
+    distance = bounded_levenshtein(s1, s2, max_distance)
+    if distance > max_distance:
+        return None
+    return 1 - (distance / max_length)
@@ -0,0 +1,361 @@
+import os
+import glob
+import json
+import hashlib
+import threading
+from weasyprint import HTML
+from sqlalchemy import func
+from models import db, AnalysisPoint
+from analysis_summary import analysis_distribution, RANK_BUCKETS
+
+# fcntl yalnızca POSIX sistemlerde var; yoksa süreçler arası kilit devre dışı kalır
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Şablon değiştiğinde artırılır, böylece önbellekteki eski raporlar yeniden üretilir
+REPORT_TEMPLATE_VERSION = 1
+# Analiz tamamlanınca raporun işçide hemen üretilip üretilmeyeceği
+REPORT_PREGENERATE = os.getenv('REPORT_PREGENERATE', '1') == '1'
+
+# WeasyPrint aynı süreçte paralel çizim için güvenli değil; süreçler arası kilit ayrıca alınır
+_render_lock = threading.Lock()
+
+
+def report_points(analysis):
+    """Rapor tablosu için analiz noktalarını sözlük listesi olarak döndürür"""
+    return [{
+        'coordinates': coordinates,
+        'position': position,
+        'rating': rating,
+        'rating_count': rating_count
+    } for coordinates, position, rating, rating_count in db.session.query(
+        AnalysisPoint.coordinates,
+        AnalysisPoint.position,
+        AnalysisPoint.rating,
+        AnalysisPoint.rating_count
+    ).filter(AnalysisPoint.analysis_id == analysis.id).order_by(AnalysisPoint.id)]
+
+
+def points_checksum(analysis_id):
+    """Noktaların sıra/puan değerlerinin SQL'de hesaplanan özetini döndürür
+
+    Değerler nokta kimliğiyle ağırlıklandırılır; yeniden eşleştirmede iki noktanın
+    sırası yer değiştirse de özet değişir. Koordinatlar nokta eklendikten sonra değişmez.
+    """
+    position = func.coalesce(AnalysisPoint.position, 0)
+    rating = func.coalesce(AnalysisPoint.rating, 0)
+    rating_count = func.coalesce(AnalysisPoint.rating_count, 0)
+    row = db.session.query(
+        func.count(AnalysisPoint.id),
+        func.max(AnalysisPoint.id),
+        func.sum(position),
+        func.sum(AnalysisPoint.id * position),
+        func.sum(AnalysisPoint.id * rating),
+        func.sum(AnalysisPoint.id * rating_count)
+    ).filter(AnalysisPoint.analysis_id == analysis_id).one()
+    return [round(value, 6) if isinstance(value, float) else value for value in row]
+
+
+def report_fingerprint(analysis, map_png_path):
+    """Raporu etkileyen tüm verinin özetini döndürür; ETag ve dosya adı olarak kullanılır
+
+    Noktalar yüklenmez: analizde saklanan özet sütunları ve noktaların SQL özeti kullanılır.
+    """
+    try:
+        stat = os.stat(map_png_path)
+        map_state = [stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        map_state = None
+    payload = {
+        'template': REPORT_TEMPLATE_VERSION,
+        'analysis': [
+            analysis.id,
+            analysis.project.target_business,
+            analysis.analysis_date.isoformat() if analysis.analysis_date else None,
+            analysis.visibility_rate,
+            analysis.average_position,
+            analysis.best_position,
+            analysis.worst_position,
+            analysis.total_points,
+            analysis.visible_points
+        ] + [getattr(analysis, name) for name, _ in RANK_BUCKETS],
+        'points': points_checksum(analysis.id),
+        'map': map_state
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+def _table_rows(points):
+    rows = []
+    for point in points:
+        position_class = ''
+        if point['position']:
+            if point['position'] <= 3:
+                position_class = 'color: #28a745;'
+            elif point['position'] <= 10:
+                position_class = 'color: #ffc107;'
+            else:
+                position_class = 'color: #dc3545;'
+
+        rows.append(f"""
+        <tr>
+            <td>{point['coordinates']}</td>
+            <td style="{position_class}">
+                {point['position'] if point['position'] else 'Görünmüyor'}
+            </td>
+            <td>{point['rating'] if point['rating'] else '-'}</td>
+            <td>{point['rating_count'] if point['rating_count'] else '-'}</td>
+        </tr>
+        """)
+    return '\n'.join(rows)
+
+
+def _format_stat(value, pattern='{:.1f}'):
+    return pattern.format(value) if value is not None else '-'
+
+
+def build_report_html(analysis, points, map_png_path):
+    """Rapor HTML'ini üretir; tarih analiz tarihinden alınır ki aynı veri aynı raporu versin"""
+    distribution = analysis_distribution(analysis)
+    total = sum(distribution) or 1
+    report_date = analysis.analysis_date
+
+    def distribution_item(index, label, color):
+        return f"""
+                <div class="distribution-item">
+                    <span class="distribution-label">{label}</span>
+                    <div class="distribution-bar">
+                        <div class="distribution-bar-fill" style="width: {(distribution[index]/total)*100}%; background-color: {color};"></div>
+                    </div>
+                    <span class="distribution-value">{distribution[index]}</span>
+                </div>"""
+
+    return f"""
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 40px; }}
+            h1 {{ color: #333; text-align: center; }}
+            .header {{ text-align: center; margin-bottom: 30px; }}
+            .section {{ margin: 20px 0; }}
+            .stats {{
+                display: grid;
+                grid-template-columns: repeat(4, 1fr);
+                gap: 20px;
+                margin: 20px 0;
+            }}
+            .stat-box {{
+                padding: 20px;
+                background: #f8f9fa;
+                border-radius: 10px;
+                text-align: center;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+            }}
+            .stat-box h3 {{
+                margin: 0;
+                font-size: 16px;
+                color: #666;
+            }}
+            .stat-box p {{
+                margin: 10px 0 0 0;
+                font-size: 24px;
+                font-weight: bold;
+                color: #333;
+            }}
+            .map-container {{ text-align: center; margin: 20px 0; }}
+            .map-container img {{
+                width: 100%;
+                max-width: 1200px;
+                border-radius: 10px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+            }}
+            .distribution-container {{
+                margin: 20px 0;
+                padding: 20px;
+                background: #f8f9fa;
+                border-radius: 10px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+            }}
+            .distribution-item {{
+                display: flex;
+                align-items: center;
+                margin: 10px 0;
+            }}
+            .distribution-label {{
+                flex: 1;
+                font-size: 14px;
+            }}
+            .distribution-bar {{
+                flex: 3;
+                height: 24px;
+                background: #eee;
+                border-radius: 12px;
+                overflow: hidden;
+                margin: 0 10px;
+            }}
+            .distribution-bar-fill {{
+                height: 100%;
+                transition: width 0.3s ease;
+            }}
+            .distribution-value {{
+                flex: 0 0 50px;
+                text-align: right;
+                font-weight: bold;
+            }}
+            .footer {{ text-align: center; margin-top: 50px; color: #666; }}
+            table {{
+                width: 100%;
+                border-collapse: collapse;
+                margin: 20px 0;
+                font-size: 14px;
+            }}
+            th, td {{
+                padding: 12px;
+                text-align: left;
+                border-bottom: 1px solid #ddd;
+            }}
+            th {{
+                background-color: #f8f9fa;
+                font-weight: bold;
+            }}
+            h2 {{
+                color: #333;
+                margin-top: 40px;
+                margin-bottom: 20px;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>Sıralama Analiz Raporu</h1>
+            <p>İşletme: {analysis.project.target_business}</p>
+            <p>Tarih: {report_date.strftime('%d.%m.%Y %H:%M') if report_date else '-'}</p>
+        </div>
+
+        <div class="section">
+            <div class="stats">
+                <div class="stat-box">
+                    <h3>Görünürlük Oranı</h3>
+                    <p>%{_format_stat(analysis.visibility_rate)}</p>
+                </div>
+                <div class="stat-box">
+                    <h3>Ortalama Sıralama</h3>
+                    <p>{_format_stat(analysis.average_position)}</p>
+                </div>
+                <div class="stat-box">
+                    <h3>En İyi Sıralama</h3>
+                    <p>{_format_stat(analysis.best_position, '{}')}</p>
+                </div>
+                <div class="stat-box">
+                    <h3>En Kötü Sıralama</h3>
+                    <p>{_format_stat(analysis.worst_position, '{}')}</p>
+                </div>
+            </div>
+        </div>
+
+        <div class="section">
+            <h2>Sıralama Dağılımı</h2>
+            <div class="distribution-container">
+                {distribution_item(0, '1-3. sıra', '#28a745')}
+                {distribution_item(1, '4-10. sıra', '#ffc107')}
+                {distribution_item(2, '11-20. sıra', '#fd7e14')}
+                {distribution_item(3, '20+ sıra', '#dc3545')}
+                {distribution_item(4, 'Görünmüyor', '#6c757d')}
+            </div>
+        </div>
+
+        <div class="section">
+            <h2>Sıralama Haritası</h2>
+            <div class="map-container">
+                <img src="file://{map_png_path}" alt="Sıralama Haritası">
+            </div>
+        </div>
+
+        <div class="section">
+            <h2>Analiz Noktaları</h2>
+            <table>
+                <thead>
+                    <tr>
+                        <th>Koordinatlar</th>
+                        <th>Sıralama</th>
+                        <th>Puan</th>
+                        <th>Değerlendirme Sayısı</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {_table_rows(points)}
+                </tbody>
+            </table>
+        </div>
+
+        <div class="footer">
+            <p>© {report_date.year if report_date else ''} Maps Rank Tracker. Tüm hakları saklıdır.</p>
+        </div>
+    </body>
+    </html>
+    """
+
+
+def _lock_file(path):
+    """Rapor klasöründeki kilit dosyasını açıp kilitler, kilitlenemezse None döndürür"""
+    if fcntl is None:
+        return None
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError as e:
+        print(f"Rapor kilidi açılamadı: {str(e)}")
+        return None
+    try:
+        fcntl.lockf(fd, fcntl.LOCK_EX)
+    except OSError as e:
+        print(f"Rapor kilidi alınamadı: {str(e)}")
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock_file(fd):
+    if fd is None:
+        return
+    try:
+        fcntl.lockf(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def get_report_pdf(analysis, report_dir, map_png_path):
+    """Analizin PDF raporunu gerekirse üretir, (dosya yolu, özet) döndürür
+
+    Rapor report-<özet>.pdf adıyla saklanır; veri ya da şablon değişmedikçe yeniden
+    üretilmez. Aynı raporu isteyen iş parçacıkları ve süreçler kilitte bekler,
+    kilidi sonradan alan taraf hazır dosyayı kullanır.
+    """
+    fingerprint = report_fingerprint(analysis, map_png_path)
+    pdf_path = os.path.join(report_dir, f'report-{fingerprint}.pdf')
+    if os.path.exists(pdf_path):
+        return pdf_path, fingerprint
+
+    os.makedirs(report_dir, exist_ok=True)
+    with _render_lock:
+        fd = _lock_file(os.path.join(report_dir, 'report.lock'))
+        try:
+            if not os.path.exists(pdf_path):
+                # Yarım yazılmış dosya sunulmasın diye geçici dosyaya yazıp taşı
+                tmp_path = f"{pdf_path}.{os.getpid()}.tmp"
+                HTML(string=build_report_html(analysis, report_points(analysis), map_png_path)).write_pdf(tmp_path)
+                os.replace(tmp_path, pdf_path)
+
+                # Eski özetlere ait raporları temizle
+                for old_path in glob.glob(os.path.join(report_dir, 'report*.pdf')):
+                    if old_path != pdf_path:
+                        try:
+                            os.remove(old_path)
+                        except OSError:
+                            pass
+        finally:
+            _unlock_file(fd)
+    return pdf_path, fingerprint
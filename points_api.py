@@ -0,0 +1,113 @@
+import os
+import json
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from models import db, AnalysisPoint
+
+# orjson ve brotli isteğe bağlıdır; yoksa standart json ve yalnızca gzip kullanılır
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Nokta API'si ayarları
+POINTS_GZIP_LEVEL = int(os.getenv('POINTS_GZIP_LEVEL', 6))
+POINTS_BROTLI_QUALITY = int(os.getenv('POINTS_BROTLI_QUALITY', 5))
+POINTS_MIN_COMPRESS_BYTES = 1024  # bundan küçük yanıtlar sıkıştırılmaz
+POINTS_CACHE_SIZE = int(os.getenv('POINTS_CACHE_SIZE', 256))  # süreç başına sıkıştırılmış yanıt sayısı
+
+
+def dumps(obj):
+    """Nesneyi UTF-8 JSON baytlarına çevirir, varsa orjson kullanılır"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def points_payload(analysis_id):
+    """Analiz noktalarını paralel diziler halinde döndürür
+
+    Her nokta için sözlük ve ORM nesnesi yerine yalnızca gereken sütunlar okunur;
+    coordinates metni enlem/boylamın tekrarı olduğu için gönderilmez.
+    """
+    rows = db.session.query(
+        AnalysisPoint.latitude,
+        AnalysisPoint.longitude,
+        AnalysisPoint.position,
+        AnalysisPoint.rating,
+        AnalysisPoint.rating_count
+    ).filter(AnalysisPoint.analysis_id == analysis_id).order_by(AnalysisPoint.id).all()
+
+    lat, lon, position, rating, rating_count = (list(column) for column in zip(*rows)) if rows else ([], [], [], [], [])
+    return {
+        'v': 1,
+        'analysisId': analysis_id,
+        'count': len(rows),
+        'lat': lat,
+        'lon': lon,
+        'position': position,
+        'rating': rating,
+        'ratingCount': rating_count
+    }
+
+
+def payload_etag(body):
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def available_encodings():
+    """Sunucunun desteklediği sıkıştırmalar, tercih sırasıyla"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=POINTS_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=POINTS_GZIP_LEVEL, mtime=0)
+
+
+class CompressedCache:
+    """Sıkıştırılmış yanıtları (etag, kodlama) anahtarıyla tutan küçük LRU önbellek
+
+    Tamamlanan analizlerin noktaları değişmediğinden aynı yanıtı her istekte
+    yeniden sıkıştırmak gerekmez; veri değişirse etag da değişir.
+    """
+
+    def __init__(self, max_size=POINTS_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compress(self, etag, encoding, body):
+        key = (etag, encoding)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        data = compress(body, encoding)
+        with self._lock:
+            self._items[key] = data
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return data
+
+
+_compressed_cache = CompressedCache()
+
+
+def encode_response(body, etag, accept_encodings):
+    """Gövdeyi istemcinin kabul ettiği en iyi kodlamayla döndürür: (veri, kodlama ya da None)"""
+    if len(body) < POINTS_MIN_COMPRESS_BYTES:
+        return body, None
+    encoding = accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return body, None
+    return _compressed_cache.get_or_compress(etag, encoding, body), encoding
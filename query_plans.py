@@ -0,0 +1,154 @@
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+import sqlalchemy as sa
+from models import db, User, Project, Analysis, AnalysisPoint, CompetitorObservation
+
+# Sık çalışan sorgular ve kullanmaları gereken indeksler; bir şema değişikliği
+# bu sorgulardan birini tam tablo taramasına düşürürse kontrol başarısız olur
+HOT_QUERIES = (
+    (
+        'Projenin son analizleri (project_detail, api_project_stats)',
+        lambda: sa.select(Analysis.__table__).where(Analysis.project_id == 1)
+        .order_by(Analysis.analysis_date.desc(), Analysis.id.desc()).limit(21),
+        'ix_analysis_project_id_analysis_date'
+    ),
+    (
+        'Analiz geçmişinin sonraki sayfası (project_detail, api_project_analyses)',
+        lambda: sa.select(Analysis.__table__).where(
+            Analysis.project_id == 1,
+            sa.tuple_(Analysis.analysis_date, Analysis.id) < (datetime(2024, 1, 1), 1000)
+        ).order_by(Analysis.analysis_date.desc(), Analysis.id.desc()).limit(21),
+        'ix_analysis_project_id_analysis_date'
+    ),
+    (
+        'Analizin noktaları',
+        lambda: sa.select(AnalysisPoint.__table__).where(AnalysisPoint.analysis_id == 1),
+        'ix_analysis_point_analysis_id'
+    ),
+    (
+        'Kullanıcının projeleri (dashboard)',
+        lambda: sa.select(Project.__table__).where(Project.user_id == 1),
+        'ix_project_user_id'
+    ),
+    (
+        'Analizde ilk sıraları tutan rakipler (api_analysis_competitors)',
+        lambda: sa.select(CompetitorObservation.title, sa.func.count()).where(
+            CompetitorObservation.analysis_id == 1,
+            CompetitorObservation.position <= 3
+        ).group_by(CompetitorObservation.title),
+        'ix_competitor_observation_analysis_id_position'
+    ),
+    (
+        'Rakibin zaman içindeki sırası (api_project_competitor_history)',
+        lambda: sa.select(CompetitorObservation.analysis_id, sa.func.avg(CompetitorObservation.position)).where(
+            CompetitorObservation.project_id == 1,
+            CompetitorObservation.normalized_title == 'rakip'
+        ).group_by(CompetitorObservation.analysis_id),
+        'ix_competitor_observation_project_id_normalized_title'
+    )
+)
+
+
+def explain(connection, statement):
+    """Sorgu planını satır listesi olarak döndürür (SQLite ve PostgreSQL)"""
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    if connection.dialect.name == 'sqlite':
+        return [row[-1] for row in connection.execute(sa.text(f'EXPLAIN QUERY PLAN {sql}'))]
+    return [row[0] for row in connection.execute(sa.text(f'EXPLAIN {sql}'))]
+
+
+def plan_problems(plan, index_name):
+    """Plan beklenen indeksi kullanmıyorsa sorunları döndürür"""
+    problems = []
+    if not any(index_name in line for line in plan):
+        problems.append(f"{index_name} indeksi kullanılmıyor")
+    for line in plan:
+        if (line.startswith('SCAN ') and ' USING ' not in line) or 'Seq Scan' in line:
+            problems.append(f"tam tablo taraması: {line.strip()}")
+        elif 'USE TEMP B-TREE FOR ORDER BY' in line:
+            problems.append(f"sıralama indeksten gelmiyor: {line.strip()}")
+    return problems
+
+
+def check_query_plans(connection):
+    """Tüm sık sorguları kontrol eder, [(ad, plan, sorunlar), ...] döndürür"""
+    results = []
+    for name, build_statement, index_name in HOT_QUERIES:
+        plan = explain(connection, build_statement())
+        results.append((name, plan, plan_problems(plan, index_name)))
+    return results
+
+
+def seed_database(connection, users=20, projects_per_user=10, analyses_per_project=50, points_per_analysis=16):
+    """Planlayıcının gerçekçi istatistik görmesi için boş veritabanını örnek veriyle doldurur"""
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    connection.execute(User.__table__.insert(), [
+        {'id': u, 'username': f'user{u}', 'email': f'user{u}@example.com'} for u in range(1, users + 1)
+    ])
+
+    project_rows = []
+    for u in range(1, users + 1):
+        for _ in range(projects_per_user):
+            project_rows.append({
+                'id': len(project_rows) + 1, 'user_id': u, 'name': 'proje', 'keyword': 'anahtar',
+                'target_business': 'işletme', 'center_coordinates': '@41.0,29.0,11z'
+            })
+    connection.execute(Project.__table__.insert(), project_rows)
+
+    analysis_id = 0
+    for project in project_rows:
+        analysis_rows, point_rows = [], []
+        for day in range(analyses_per_project):
+            analysis_id += 1
+            analysis_rows.append({
+                'id': analysis_id, 'project_id': project['id'], 'analysis_date': now - timedelta(days=day),
+                'visibility_rate': rng.uniform(0, 100)
+            })
+            point_rows.extend({
+                'analysis_id': analysis_id, 'coordinates': '@41.0,29.0', 'latitude': 41.0, 'longitude': 29.0,
+                'position': rng.choice([None, rng.randint(1, 30)])
+            } for _ in range(points_per_analysis))
+        connection.execute(Analysis.__table__.insert(), analysis_rows)
+        connection.execute(AnalysisPoint.__table__.insert(), point_rows)
+
+    connection.execute(sa.text('ANALYZE'))
+
+
+def run_check(seed=False):
+    """Kontrolü çalıştırıp sonucu yazdırır; tüm sorgular indeks kullanıyorsa True döndürür
+
+    seed verilirse modellerden geçici bir SQLite veritabanı oluşturulup örnek veriyle
+    doldurulur, aksi halde uygulamanın yapılandırılmış veritabanı (migrasyonlar
+    uygulanmış haliyle) kontrol edilir.
+    """
+    if seed:
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        engine = sa.create_engine(f'sqlite:///{path}')
+    else:
+        path = None
+        engine = db.engine
+
+    try:
+        with engine.begin() as connection:
+            if seed:
+                db.metadata.create_all(connection)
+                seed_database(connection)
+            results = check_query_plans(connection)
+    finally:
+        if path:
+            engine.dispose()
+            os.remove(path)
+
+    ok = True
+    for name, plan, problems in results:
+        print(f"{'HATA' if problems else 'OK'}  {name}")
+        for line in plan:
+            print(f"      {line}")
+        for problem in problems:
+            print(f"    - {problem}")
+        ok = ok and not problems
+    return ok
@@ -1,27 +1,52 @@
-import requests
 import folium
 import os
-import re
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from http_session import get_session, HTTP_MAX_RETRIES, HTTP_RETRY_BACKOFF
+from serp_cache import get_serp_cache
+from request_coalescer import get_request_coalescer, COALESCE_LOCK_TIMEOUT
+from serper_quota import get_serper_quota, key_fingerprint, RateLimitTimeout
+from map_image import render_rank_map
+from name_matching import normalize_business_name, levenshtein_distance, similarity_at_least
+
+SERPER_API_URL = os.getenv('SERPER_API_URL', 'https://google.serper.dev/maps')
+SERPER_HL = 'tr'
+SERPER_ZOOM = '11z'  # Zoom seviyesini 11 olarak sabitliyoruz
+SIMILARITY_THRESHOLD = 0.85
+
+# Tüm analizlerin aynı anda açabileceği toplam Serper isteği sınırı (süreç genelinde)
+SERPER_MAX_CONCURRENCY = int(os.getenv('SERPER_MAX_CONCURRENCY', 32))
+# Tek bir analizin aynı anda açabileceği Serper isteği sınırı
+ANALYSIS_MAX_CONCURRENCY = int(os.getenv('ANALYSIS_MAX_CONCURRENCY', 16))
+
+# Harita çıktısı: 'leaflet' paylaşılan static/map/viewer.html + analiz başına points.json,
+# 'folium' ise analiz başına kendi içinde tam map.html üretir
+MAP_RENDERER = os.getenv('MAP_RENDERER', 'leaflet')
+MAP_COORDINATE_SCALE = 100000  # points.json koordinat hassasiyeti (1e-5 derece, ~1 m)
+
+# 429 yanıtında yeniden deneme sayısı ve Retry-After yoksa kullanılacak bekleme
+SERPER_RATE_LIMIT_RETRIES = int(os.getenv('SERPER_RATE_LIMIT_RETRIES', 3))
+SERPER_RATE_LIMIT_BACKOFF = float(os.getenv('SERPER_RATE_LIMIT_BACKOFF', 5))
+# Yeniden denenen sunucu hataları (en fazla HTTP_MAX_RETRIES kez)
+SERPER_SERVER_ERROR_STATUSES = (500, 502, 503, 504)
+
+_serper_semaphore = threading.BoundedSemaphore(SERPER_MAX_CONCURRENCY)
 
 class RankAnalyzer:
-    def __init__(self, target_business):
+    def __init__(self, target_business, serper_api_key=None, verbose=True):
         self.target_business = target_business
+        self.verbose = verbose  # eşleştirme ayrıntılarını yazdır (toplu yeniden eşleştirmede kapalı)
+        self.normalized_target = normalize_business_name(target_business)
         self.locations_data = []
-        self.serper_api_key = os.getenv('SERPER_API_KEY')
+        self.serper_api_key = serper_api_key or os.getenv('SERPER_API_KEY')
+        self.key_id = key_fingerprint(self.serper_api_key)
 
     def normalize_business_name(self, name):
         """İşletme adını normalize eder"""
-        if not name:
-            return ""
-        # Küçük harfe çevir
-        name = name.lower()
-        # Türkçe karakterleri değiştir
-        name = name.replace('ı', 'i').replace('ğ', 'g').replace('ü', 'u').replace('ş', 's').replace('ö', 'o').replace('ç', 'c')
-        # Noktalama işaretlerini ve fazla boşlukları temizle
-        name = re.sub(r'[^\w\s]', '', name)
-        name = re.sub(r'\s+', ' ', name).strip()
-        return name
+        return normalize_business_name(name)
 
     def business_names_match(self, name1, name2, similarity_threshold=0.85):
         """İki işletme isminin benzerliğini kontrol eder"""
@@ -57,42 +82,62 @@ class RankAnalyzer:
         if match_ratio >= 0.8:
             return True
             
-        # Levenshtein mesafesi kontrolü
-        distance = self.levenshtein_distance(name1, name2)
-        max_length = max(len(name1), len(name2))
-        if max_length == 0:
-            return False
-            
-        similarity = 1 - (distance / max_length)
-        return similarity >= similarity_threshold
+        # Levenshtein benzerlik kontrolü
+        return similarity_at_least(name1, name2, similarity_threshold) is not None
 
     def levenshtein_distance(self, s1, s2):
         """İki string arasındaki Levenshtein mesafesini hesaplar"""
-        if len(s1) < len(s2):
-            return self.levenshtein_distance(s2, s1)
+        return levenshtein_distance(s1, s2)
 
-        if len(s2) == 0:
-            return len(s1)
+    def get_serper_data(self, keyword, lat, lon):
+        """Serper API'den veri çeker, istek başarısız olursa None döndürür"""
+        cache = get_serp_cache()
+        cached = cache.get(keyword, lat, lon, SERPER_ZOOM, SERPER_HL)
+        if cached is not None:
+            print(f"\nÖnbellekten okundu: {lat}, {lon}")
+            return cached
 
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
+        # Kovada beklemeden verilebilecek hak varsa birleştirme kilidi alınmadan ayrılır.
+        # Yoksa yalnızca önbellekte bulamayan lider kilit içinde bekler; bu bekleme
+        # COALESCE_LOCK_TIMEOUT'un yarısıyla sınırlı olduğundan kilidi bekleyenler
+        # zaman aşımına uğramaz ve aynı anahtarı bekleyenler hak için uyumaz
+        quota = get_serper_quota()
+        prepaid = {'waited': 0.0} if quota.try_acquire(self.key_id) else {}
 
-        return previous_row[-1]
+        def fetch():
+            return self._fetch_serper_data(keyword, lat, lon, prepaid.pop('waited', None))
 
-    def get_serper_data(self, keyword, lat, lon):
-        """Serper API'den veri çeker"""
-        url = "https://google.serper.dev/maps"
+        # Aynı sorgu başka bir iş parçacığında veya süreçte sürüyorsa onun sonucu beklenir
+        key = cache.make_key(keyword, lat, lon, SERPER_ZOOM, SERPER_HL)
+        try:
+            data, waited = get_request_coalescer().run(
+                key,
+                fetch,
+                lookup=lambda: cache.get(keyword, lat, lon, SERPER_ZOOM, SERPER_HL, record_miss=False)
+            )
+        finally:
+            # Sonuç başka bir istekten geldiyse ayrılan hak kullanılmadı
+            if 'waited' in prepaid:
+                quota.refund(self.key_id)
+        if waited:
+            cache.incr('coalesced')
+            print(f"\nEş zamanlı istekle paylaşıldı: {lat}, {lon}")
+        return data
+
+    def _fetch_serper_data(self, keyword, lat, lon, waited=None):
+        """Hız sınırına uyarak Serper API'ye istek atar ve başarılı yanıtı önbelleğe yazar
+
+        waited verilirse ilk deneme için istek hakkı önceden ayrılmış demektir. 429 ve
+        5xx yanıtları burada yeniden denenir; her deneme ayrı bir istek hakkı harcar ve
+        kullanım kaydına ayrı bir çağrı olarak geçer. Yeniden denemeler birleştirme
+        kilidi tutulurken yapıldığından toplam hız sınırı beklemesi kilit süresinin
+        yarısıyla sınırlanır.
+        """
+        url = SERPER_API_URL
         payload = {
             "q": keyword,
-            "hl": "tr",
-            "ll": f"@{lat},{lon},11z",  # Zoom seviyesini 11 olarak sabitliyoruz
+            "hl": SERPER_HL,
+            "ll": f"@{lat},{lon},{SERPER_ZOOM}",
             "type": "maps",
             "limit": 20  # Sonuç limitini 20'ye çıkarıyoruz
         }
@@ -100,171 +145,273 @@ class RankAnalyzer:
             "X-API-KEY": self.serper_api_key,
             "Content-Type": "application/json"
         }
-        
+        quota = get_serper_quota()
+        retry_deadline = time.monotonic() + COALESCE_LOCK_TIMEOUT / 2
+        rate_limited = server_errors = 0
+
+        while True:
+            if waited is None:
+                try:
+                    waited = quota.acquire(self.key_id, max_wait=max(retry_deadline - time.monotonic(), 0))
+                except RateLimitTimeout as e:
+                    print(f"API hatası: {str(e)}")
+                    return None
+
+            status = None
+            started = time.perf_counter()
+            try:
+                response = get_session().post(url, json=payload, headers=headers)
+                status = response.status_code
+                fetch_ms = (time.perf_counter() - started) * 1000
+
+                if status == 429 or status in SERPER_SERVER_ERROR_STATUSES:
+                    quota.record(self.key_id, status, False, fetch_ms, waited * 1000)
+                    waited = None
+                    if status == 429:
+                        rate_limited += 1
+                        if rate_limited > SERPER_RATE_LIMIT_RETRIES:
+                            print(f"API hatası: hız sınırı nedeniyle istek tamamlanamadı: {lat}, {lon}")
+                            return None
+                        # Sağlayıcı sınırına takıldık: tüm süreçler için kovayı beklet ve yeniden dene
+                        retry_after = self._retry_after(response, rate_limited - 1)
+                        quota.penalize(self.key_id, retry_after)
+                        print(f"Hız sınırı aşıldı, {retry_after:.0f} sn sonra yeniden denenecek: {lat}, {lon}")
+                    else:
+                        server_errors += 1
+                        if server_errors > HTTP_MAX_RETRIES:
+                            print(f"API hatası: sunucu hatası ({status}) nedeniyle istek tamamlanamadı: {lat}, {lon}")
+                            return None
+                        # Sunucu hatası yalnızca bu isteği geciktirir, kovayı etkilemez
+                        delay = HTTP_RETRY_BACKOFF * (2 ** (server_errors - 1))
+                        print(f"Sunucu hatası ({status}), {delay:.1f} sn sonra yeniden denenecek: {lat}, {lon}")
+                        time.sleep(delay)
+                    continue
+
+                response.raise_for_status()  # HTTP hatalarını kontrol et
+                data = response.json()
+                quota.record(self.key_id, status, True, fetch_ms, waited * 1000)
+                get_serp_cache().set(keyword, lat, lon, SERPER_ZOOM, SERPER_HL, data, fetch_ms=fetch_ms)
+                
+                # Debug bilgisi
+                print(f"\nAPI İsteği yapıldı: {lat}, {lon}")
+                print(f"Toplam sonuç sayısı: {len(data.get('places', []))}")
+                
+                return data
+            except Exception as e:
+                quota.record(self.key_id, status, False, (time.perf_counter() - started) * 1000, waited * 1000)
+                print(f"API hatası: {str(e)}")
+                return None
+
+    def _retry_after(self, response, attempt):
+        """Retry-After başlığını saniye olarak döndürür, yoksa üstel bekleme uygular"""
         try:
-            response = requests.post(url, json=payload, headers=headers)
-            response.raise_for_status()  # HTTP hatalarını kontrol et
-            data = response.json()
-            
-            # Debug bilgisi
-            print(f"\nAPI İsteği yapıldı: {lat}, {lon}")
-            print(f"Toplam sonuç sayısı: {len(data.get('places', []))}")
-            
+            return max(float(response.headers.get('Retry-After')), 0.0)
+        except (TypeError, ValueError):
+            return SERPER_RATE_LIMIT_BACKOFF * (2 ** attempt)
+
+    def fetch_all_serper_data(self, keyword, coordinates_list, max_workers=None, on_result=None):
+        """Tüm koordinatlar için Serper verisini eşzamanlı çeker, sonuçları ızgara sırasıyla döndürür
+
+        Verisi alınamayan noktalar için None döner; bu noktalar "görünmüyor" sayılmamalıdır.
+        on_result verilirse her nokta tamamlandığında on_result(index, coords, data) çağrılır.
+        """
+        if max_workers is None:
+            max_workers = ANALYSIS_MAX_CONCURRENCY
+        max_workers = max(1, min(max_workers, len(coordinates_list) or 1))
+
+        def fetch(index, coords):
+            lat, lon = coords.replace('@', '').split(',')[:2]
+            # Süreç genelindeki eşzamanlılık sınırını aşmamak için bekle
+            with _serper_semaphore:
+                data = self.get_serper_data(keyword, lat, lon)
+            if on_result is not None:
+                try:
+                    on_result(index, coords, data)
+                except Exception as e:
+                    print(f"İlerleme bildirimi hatası: {str(e)}")
             return data
-        except Exception as e:
-            print(f"API hatası: {str(e)}")
-            return {"places": []}
 
-    def get_position(self, data, business_name):
-        """Verilen işletmenin sıralamasını bulur"""
-        if 'places' not in data or not data['places']:
-            print("API'den veri alınamadı veya sonuç bulunamadı.")
-            return None
-            
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(fetch, index, coords) for index, coords in enumerate(coordinates_list)]
+        # Analiz boyunca biriken önbellek okumaları tek işlemde yazılır
+        get_serp_cache().flush()
+
+        results = []
+        for coords, future in zip(coordinates_list, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Hata: {coords} için veri alınamadı - {str(e)}")
+                results.append(None)
+        return results
+
+    def match_business(self, data, business_name=None):
+        """SERP yanıtını tek geçişte tarar ve hedef işletmenin eşleşme sonucunu döndürür"""
+        if business_name is None:
+            business_name = self.target_business
+
+        result = {
+            'position': None,
+            'rating': None,
+            'rating_count': None,
+            'title': None,
+            'similarity': None,
+            'method': None
+        }
+
+        places = data.get('places') if data else None
+        if not places:
+            if self.verbose:
+                print("API'den veri alınamadı veya sonuç bulunamadı.")
+            return result
+
         # Debug bilgisi
-        print(f"\nAranan işletme: {business_name}")
-        print(f"API'den gelen toplam işletme sayısı: {len(data['places'])}")
-        print("API'den gelen işletmeler:")
-        
-        # Tüm işletmeleri listele
-        all_businesses = []
-        for i, place in enumerate(data['places'], 1):
-            title = place.get('title', '')
-            print(f"{i}. {title}")
-            all_businesses.append({
-                'title': title,
-                'position': i,
-                'rating': place.get('rating', 0),
-                'rating_count': place.get('ratingCount', 0)
+        if self.verbose:
+            print(f"\nAranan işletme: {business_name}")
+            print(f"API'den gelen toplam işletme sayısı: {len(places)}")
+
+        def found(position, place, similarity, method):
+            result.update({
+                'position': position,
+                'rating': place.get('rating'),
+                'rating_count': place.get('ratingCount'),
+                'title': place.get('title', ''),
+                'similarity': similarity,
+                'method': method
             })
-            
+            return result
+
+        # Başlıkları bir kez normalize et
+        if business_name == self.target_business:
+            target_name = self.normalized_target
+        else:
+            target_name = self.normalize_business_name(business_name)
+        target_lower = business_name.lower()
+        titles = [place.get('title', '') for place in places]
+        normalized_titles = [self.normalize_business_name(title) for title in titles]
+
         # Önce tam eşleşme ara
-        for business in all_businesses:
-            if self.normalize_business_name(business['title']) == self.normalize_business_name(business_name):
-                print(f"TAM EŞLEŞME BULUNDU: {business['title']} (Pozisyon: {business['position']})")
-                return business['position']
-        
+        for i, name in enumerate(normalized_titles):
+            if name == target_name:
+                if self.verbose:
+                    print(f"TAM EŞLEŞME BULUNDU: {titles[i]} (Pozisyon: {i + 1})")
+                return found(i + 1, places[i], 1.0, 'exact')
+
         # Tam eşleşme bulunamazsa, benzerlik kontrolü yap
         highest_similarity = 0
-        best_match = None
-        
-        for business in all_businesses:
-            name1 = self.normalize_business_name(business['title'])
-            name2 = self.normalize_business_name(business_name)
-            
-            # Kelime bazlı karşılaştırma
-            words1 = set(name1.split())
-            words2 = set(name2.split())
-            
+        best_index = None
+
+        for i, name in enumerate(normalized_titles):
             # Tam kelime eşleşmesi kontrolü
-            if business_name.lower() in business['title'].lower():
-                print(f"Kelime eşleşmesi bulundu: {business['title']} (Pozisyon: {business['position']})")
-                return business['position']
-            
-            # Benzerlik oranı hesapla
-            distance = self.levenshtein_distance(name1, name2)
-            max_length = max(len(name1), len(name2))
-            similarity = 1 - (distance / max_length) if max_length > 0 else 0
-            
-            if similarity > highest_similarity:
+            if target_lower in titles[i].lower():
+                if self.verbose:
+                    print(f"Kelime eşleşmesi bulundu: {titles[i]} (Pozisyon: {i + 1})")
+                return found(i + 1, places[i], None, 'contains')
+
+            # Benzerlik oranı hesapla (eşiğin altında kalanlar erken elenir)
+            similarity = similarity_at_least(name, target_name, SIMILARITY_THRESHOLD)
+
+            if similarity is not None and similarity > highest_similarity:
                 highest_similarity = similarity
-                best_match = business
-        
+                best_index = i
+
         # Sadece yüksek benzerlik oranında eşleştir
-        if highest_similarity >= 0.85 and best_match:
-            print(f"Yüksek benzerlik bulundu: {best_match['title']} (Benzerlik: {highest_similarity:.2f}, Pozisyon: {best_match['position']})")
-            return best_match['position']
-        
-        print("Eşleşme bulunamadı.")
-        return None
+        if best_index is not None:
+            if self.verbose:
+                print(f"Yüksek benzerlik bulundu: {titles[best_index]} (Benzerlik: {highest_similarity:.2f}, Pozisyon: {best_index + 1})")
+            return found(best_index + 1, places[best_index], highest_similarity, 'similarity')
+
+        if self.verbose:
+            print("Eşleşme bulunamadı.")
+        return result
+
+    def get_position(self, data, business_name):
+        """Verilen işletmenin sıralamasını bulur"""
+        return self.match_business(data, business_name)['position']
 
     def get_rating(self, data, business_name):
         """Verilen işletmenin puanını bulur"""
-        if 'places' not in data:
-            return None
-            
-        # Önce tam eşleşme ara
-        for place in data['places']:
-            if self.normalize_business_name(place.get('title', '')) == self.normalize_business_name(business_name):
-                return place.get('rating')
-        
-        # Tam eşleşme yoksa benzerlik kontrolü yap
-        highest_similarity = 0
-        best_match_rating = None
-        
-        for place in data['places']:
-            name1 = self.normalize_business_name(place.get('title', ''))
-            name2 = self.normalize_business_name(business_name)
-            
-            if business_name.lower() in place.get('title', '').lower():
-                return place.get('rating')
-            
-            distance = self.levenshtein_distance(name1, name2)
-            max_length = max(len(name1), len(name2))
-            similarity = 1 - (distance / max_length) if max_length > 0 else 0
-            
-            if similarity > highest_similarity:
-                highest_similarity = similarity
-                best_match_rating = place.get('rating')
-        
-        if highest_similarity >= 0.85:
-            return best_match_rating
-            
-        return None
+        return self.match_business(data, business_name)['rating']
 
     def get_rating_count(self, data, business_name):
         """Verilen işletmenin değerlendirme sayısını bulur"""
-        if 'places' not in data:
-            return None
-            
-        # Önce tam eşleşme ara
-        for place in data['places']:
-            if self.normalize_business_name(place.get('title', '')) == self.normalize_business_name(business_name):
-                return place.get('ratingCount')
-        
-        # Tam eşleşme yoksa benzerlik kontrolü yap
-        highest_similarity = 0
-        best_match_count = None
-        
-        for place in data['places']:
-            name1 = self.normalize_business_name(place.get('title', ''))
-            name2 = self.normalize_business_name(business_name)
-            
-            if business_name.lower() in place.get('title', '').lower():
-                return place.get('ratingCount')
-            
-            distance = self.levenshtein_distance(name1, name2)
-            max_length = max(len(name1), len(name2))
-            similarity = 1 - (distance / max_length) if max_length > 0 else 0
-            
-            if similarity > highest_similarity:
-                highest_similarity = similarity
-                best_match_count = place.get('ratingCount')
-        
-        if highest_similarity >= 0.85:
-            return best_match_count
-            
-        return None
+        return self.match_business(data, business_name)['rating_count']
+
+    def add_location_data(self, coordinates, data, match=None):
+        """Konum verisini ekler ve eşleşme sonucunu döndürür (match önceden hesaplandıysa yeniden hesaplanmaz)"""
+        if match is None:
+            match = self.match_business(data)
 
-    def add_location_data(self, coordinates, data):
-        """Konum verisini ekler"""
-        position = self.get_position(data, self.target_business)
-        rating = self.get_rating(data, self.target_business)
-        rating_count = self.get_rating_count(data, self.target_business)
-        
         self.locations_data.append({
             'coordinates': coordinates,
-            'position': position,
-            'rating': rating,
-            'rating_count': rating_count
+            'position': match['position'],
+            'rating': match['rating'],
+            'rating_count': match['rating_count'],
+            'matched_title': match['title'],
+            'similarity': match['similarity'],
+            'match_method': match['method']
         })
+        return match
 
     def get_all_points(self):
         """Tüm noktaların verilerini döndürür"""
         return self.locations_data
 
+    def create_position_data(self, output_path, center_coordinates):
+        """Paylaşılan Leaflet sayfası için noktaları sıkıştırılmış points.json olarak yazar
+
+        Koordinatlar merkeze göre 1e-5 derecelik tamsayı farkları olarak, puan ve
+        değerlendirme sayısı ise tekrar etmemesi için ayrı bir sözlükten indeksle saklanır.
+        """
+        center_lat, center_lon = (float(v) for v in center_coordinates.replace('@', '').split(',')[:2])
+        data = {
+            'v': 1,
+            'center': [center_lat, center_lon],
+            'lat': [],
+            'lon': [],
+            'position': [],
+            'ratingIndex': [],
+            'ratings': []
+        }
+        rating_indexes = {}
+        previous_lat = previous_lon = 0
+        for point in self.locations_data:
+            lat, lon = point['coordinates'].replace('@', '').split(',')[:2]
+            lat_offset = round((float(lat) - center_lat) * MAP_COORDINATE_SCALE)
+            lon_offset = round((float(lon) - center_lon) * MAP_COORDINATE_SCALE)
+            data['lat'].append(lat_offset - previous_lat)
+            data['lon'].append(lon_offset - previous_lon)
+            previous_lat, previous_lon = lat_offset, lon_offset
+            data['position'].append(point['position'])
+
+            rating = (point['rating'], point['rating_count'])
+            if rating == (None, None):
+                data['ratingIndex'].append(None)
+                continue
+            if rating not in rating_indexes:
+                rating_indexes[rating] = len(data['ratings'])
+                data['ratings'].append(list(rating))
+            data['ratingIndex'].append(rating_indexes[rating])
+
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+
+    def create_position_png(self, output_path, center_coordinates):
+        """Rapor için sıralama haritasının PNG görüntüsünü tarayıcı kullanmadan oluşturur"""
+        render_rank_map(self.locations_data, center_coordinates, output_path)
+
     def create_position_map(self, output_path, center_coordinates):
         """Sıralama haritası oluşturur"""
+        m = self._build_folium_map(center_coordinates)
+        
+        # Haritayı HTML olarak kaydet
+        m.save(output_path)
+        
+        # PNG versiyonunu oluştur
+        self.create_position_png(output_path.replace('.html', '.png'), center_coordinates)
+
+    def _build_folium_map(self, center_coordinates):
+        """Noktaları, etiketleri ve lejantı içeren folium haritasını kurar"""
         lat, lon = center_coordinates.replace('@', '').split(',')[:2]
         
         # Harita boyutunu ve başlangıç zoom seviyesini ayarla
@@ -419,24 +566,4 @@ class RankAnalyzer:
         # CSS ve JavaScript eklemeleri
         m.get_root().html.add_child(folium.Element(map_container_css))
         m.get_root().html.add_child(folium.Element(legend_html))
-        
-        # Haritayı HTML olarak kaydet
-        m.save(output_path)
-        
-        # PNG versiyonunu oluştur
-        png_path = output_path.replace('.html', '.png')
-        
-        # Folium plugins.Draw kullanarak PNG oluştur
-        from folium import plugins
-        
-        # Draw kontrolünü ekle
-        draw = plugins.Draw()
-        draw.add_to(m)
-        
-        # Haritayı PNG olarak kaydet
-        import io
-        from PIL import Image
-        
-        img_data = m._to_png()
-        img = Image.open(io.BytesIO(img_data))
-        img.save(png_path)
\ No newline at end of file
+        return m
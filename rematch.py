@@ -0,0 +1,151 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from models import db, Project, Analysis, AnalysisPoint, SerpPayload
+from rank_analyzer import RankAnalyzer
+from serp_archive import decode_places, SERP_ARCHIVE_BATCH_SIZE
+from analysis_summary import apply_summary
+
+# Yeniden eşleştirme ayarları
+REMATCH_WORKERS = int(os.getenv('REMATCH_WORKERS', os.cpu_count() or 1))
+REMATCH_CHUNK_ANALYSES = int(os.getenv('REMATCH_CHUNK_ANALYSES', 16))  # süreç havuzuna tek seferde gönderilen analiz sayısı
+
+
+def rematch_chunk(target_business, center_coordinates, tasks, payloads):
+    """Bir grup analizin noktalarını arşivlenmiş yanıtlarla yeniden eşleştirir
+
+    Süreç havuzunda çalışır, veritabanına dokunmaz. tasks her analiz için
+    {'id', 'map_path', 'points': [(id, koordinat, sıra, puan, değ. sayısı, özet), ...]},
+    payloads ise {özet: (kodlama, veri)} sözlüğüdür. Aynı yanıt yalnızca bir kez
+    eşleştirilir. Değişen analizlerin harita dosyaları da yeniden yazılır.
+    """
+    analyzer = RankAnalyzer(target_business, verbose=False)
+    matches = {}
+    results = []
+    for task in tasks:
+        positions, updates, locations = [], [], []
+        for point_id, coordinates, position, rating, rating_count, payload_hash in task['points']:
+            if payload_hash in payloads:
+                if payload_hash not in matches:
+                    match = analyzer.match_business({'places': decode_places(*payloads[payload_hash])})
+                    matches[payload_hash] = (match['position'], match['rating'], match['rating_count'])
+                values = matches[payload_hash]
+                if values != (position, rating, rating_count):
+                    updates.append({'id': point_id, 'position': values[0], 'rating': values[1], 'rating_count': values[2]})
+                    position, rating, rating_count = values
+            positions.append(position)
+            locations.append({'coordinates': coordinates, 'position': position,
+                              'rating': rating, 'rating_count': rating_count})
+
+        if updates and task['map_path']:
+            _write_map(analyzer, locations, task['map_path'], center_coordinates)
+        results.append({'id': task['id'], 'positions': positions, 'updates': updates})
+    return results
+
+
+def _write_map(analyzer, locations, map_path, center_coordinates):
+    """Analizin mevcut harita biçimini yeni sıralamalarla yeniden yazar"""
+    analyzer.locations_data = locations
+    try:
+        if map_path.endswith('.html'):
+            analyzer.create_position_map(map_path, center_coordinates)
+        else:
+            analyzer.create_position_data(map_path, center_coordinates)
+            # Rapor PNG'si pahalıdır; silinir ve ilk rapor isteğinde yeniden çizilir
+            png_path = os.path.join(os.path.dirname(map_path), 'map.png')
+            if os.path.exists(png_path):
+                os.remove(png_path)
+    except Exception as e:
+        print(f"Harita güncellenemedi ({map_path}): {str(e)}")
+
+
+def _load_chunk(analyses, static_folder):
+    """Analiz grubunun noktalarını ve kullandıkları yükleri okuyup havuz görevlerine çevirir"""
+    tasks = {analysis_id: {
+        'id': analysis_id,
+        'map_path': os.path.join(static_folder, map_file_path) if map_file_path else None,
+        'points': []
+    } for analysis_id, map_file_path in analyses}
+
+    rows = db.session.query(
+        AnalysisPoint.analysis_id,
+        AnalysisPoint.id,
+        AnalysisPoint.coordinates,
+        AnalysisPoint.position,
+        AnalysisPoint.rating,
+        AnalysisPoint.rating_count,
+        AnalysisPoint.payload_hash
+    ).filter(AnalysisPoint.analysis_id.in_(list(tasks))).order_by(AnalysisPoint.id)
+    hashes = set()
+    for analysis_id, *point in rows:
+        tasks[analysis_id]['points'].append(tuple(point))
+        if point[-1]:
+            hashes.add(point[-1])
+
+    payloads = {}
+    hashes = list(hashes)
+    for start in range(0, len(hashes), SERP_ARCHIVE_BATCH_SIZE):
+        for payload_hash, encoding, data in db.session.query(
+            SerpPayload.hash, SerpPayload.encoding, SerpPayload.data
+        ).filter(SerpPayload.hash.in_(hashes[start:start + SERP_ARCHIVE_BATCH_SIZE])):
+            payloads[payload_hash] = (encoding, data)
+    return list(tasks.values()), payloads
+
+
+def rematch_project(project_id, workers=REMATCH_WORKERS, static_folder='static'):
+    """Projenin tüm analizlerini API çağrısı yapmadan arşivlenmiş yanıtlardan yeniden hesaplar
+
+    Hedef işletme adı düzeltildiğinde ya da eşleştirme mantığı değiştiğinde geçmişi
+    güncellemek için kullanılır. Eşleştirme analiz grupları halinde süreç havuzunda
+    yapılır; noktalar ve analiz özetleri ana süreçte toplu olarak güncellenir ve her
+    gruptan sonra kaydedilir. Yükü arşivlenmemiş noktalar olduğu gibi kalır.
+    """
+    started = time.time()
+    project = db.session.get(Project, project_id)
+    if project is None:
+        raise ValueError(f"Proje bulunamadı: {project_id}")
+    target_business, center_coordinates = project.target_business, project.center_coordinates
+
+    # Yalnızca arşivlenmiş en az bir yanıtı olan analizler yeniden eşleştirilir
+    archived = db.session.query(AnalysisPoint.analysis_id).filter(AnalysisPoint.payload_hash.isnot(None))
+    analyses = db.session.query(Analysis.id, Analysis.map_file_path).filter(
+        Analysis.project_id == project_id,
+        Analysis.id.in_(archived)
+    ).order_by(Analysis.id).all()
+    total_analyses = Analysis.query.filter(Analysis.project_id == project_id).count()
+    chunks = [analyses[i:i + REMATCH_CHUNK_ANALYSES] for i in range(0, len(analyses), REMATCH_CHUNK_ANALYSES)]
+    stats = {'analyses': len(analyses), 'skipped': total_analyses - len(analyses), 'points': 0, 'changed': 0}
+
+    def apply(results):
+        for result in results:
+            if result['updates']:
+                db.session.bulk_update_mappings(AnalysisPoint, result['updates'])
+            apply_summary(db.session.get(Analysis, result['id']), result['positions'])
+            stats['points'] += len(result['positions'])
+            stats['changed'] += len(result['updates'])
+        db.session.commit()
+
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            apply(rematch_chunk(target_business, center_coordinates, *_load_chunk(chunk, static_folder)))
+    else:
+        # Uygulama durumu kopyalanmasın diye havuz süreçleri sıfırdan başlar; bellekte
+        # aynı anda en fazla işçi sayısının iki katı grup tutulur
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context) as pool:
+            pending = set()
+            for chunk in chunks:
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        apply(future.result())
+                tasks, payloads = _load_chunk(chunk, static_folder)
+                pending.add(pool.submit(rematch_chunk, target_business, center_coordinates, tasks, payloads))
+            for future in pending:
+                apply(future.result())
+
+    stats['seconds'] = round(time.time() - started, 2)
+    print(f"Proje {project_id} yeniden eşleştirildi: {stats['analyses']} analiz, {stats['points']} nokta, "
+          f"{stats['changed']} değişiklik, {stats['skipped']} arşivsiz analiz atlandı ({stats['seconds']} sn)")
+    return stats
@@ -0,0 +1,125 @@
+import os
+import time
+import zlib
+import threading
+from concurrent.futures import Future
+
+# fcntl yalnızca POSIX sistemlerde var; yoksa süreçler arası kilit devre dışı kalır
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Birleştirme ayarları
+COALESCE_LOCK_PATH = os.getenv('COALESCE_LOCK_PATH', os.path.join('instance', 'serper_inflight.lock'))
+COALESCE_LOCK_TIMEOUT = float(os.getenv('COALESCE_LOCK_TIMEOUT', 60))  # saniye
+COALESCE_LOCK_SLOTS = 1 << 30  # kilit dosyasındaki bayt aralığı sayısı
+
+
+class RequestCoalescer:
+    """Aynı anahtar için eşzamanlı istekleri tek bir upstream isteğinde birleştirir
+
+    Aynı süreçteki iş parçacıkları lideri bir Future üzerinden bekler. Farklı
+    süreçler ise paylaşılan kilit dosyasında anahtara ait bayt aralığını kilitler;
+    kilidi sonradan alan süreç önce önbelleğe bakar ve liderin sonucunu oradan okur.
+    """
+
+    def __init__(self, lock_path=COALESCE_LOCK_PATH, lock_timeout=COALESCE_LOCK_TIMEOUT):
+        self.lock_path = lock_path
+        self.lock_timeout = lock_timeout
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._fd = None
+        self._fd_lock = threading.Lock()
+
+    def _lock_fd(self):
+        # POSIX kayıt kilitleri, dosyanın herhangi bir tanımlayıcısı kapanınca düşer;
+        # bu yüzden süreç boyunca tek bir tanımlayıcı açık tutulur
+        if self._fd is None:
+            with self._fd_lock:
+                if self._fd is None:
+                    directory = os.path.dirname(self.lock_path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._fd
+
+    def _acquire_process_lock(self, key):
+        """Anahtarın bayt aralığını kilitler, kilitlenemezse None döndürür"""
+        if fcntl is None:
+            return None
+        try:
+            fd = self._lock_fd()
+        except OSError as e:
+            print(f"Kilit dosyası açılamadı: {str(e)}")
+            return None
+
+        offset = zlib.crc32(key.encode('utf-8')) % COALESCE_LOCK_SLOTS
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+                return offset
+            except OSError:
+                # Kilit başka süreçte; süre dolarsa kilitsiz devam edilir
+                if time.monotonic() >= deadline:
+                    print(f"Kilit beklemesi zaman aşımına uğradı: {key}")
+                    return None
+                time.sleep(0.05)
+
+    def _release_process_lock(self, offset):
+        if offset is None:
+            return
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+        except OSError as e:
+            print(f"Kilit bırakılamadı: {str(e)}")
+
+    def run(self, key, fetch, lookup=None):
+        """Anahtar için fetch() sonucunu döndürür, aynı anda gelen çağrılar tek sonucu paylaşır
+
+        lookup verilirse süreçler arası kilit alındıktan sonra çağrılır; None dışında
+        bir değer dönerse (örneğin başka bir sürecin önbelleğe yazdığı yanıt) fetch atlanır.
+        Dönen ikinci değer, sonucun aynı süreçte süren başka bir isteği bekleyerek
+        alınıp alınmadığını belirtir (lookup ile bulunan sonuçlar önbellek isabeti sayılır).
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            offset = self._acquire_process_lock(key)
+            try:
+                result = lookup() if lookup is not None else None
+                if result is None:
+                    result = fetch()
+            finally:
+                self._release_process_lock(offset)
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+
+def get_request_coalescer():
+    """Süreç genelinde paylaşılan birleştirici nesnesini döndürür"""
+    global _coalescer
+    if _coalescer is None:
+        with _coalescer_lock:
+            if _coalescer is None:
+                _coalescer = RequestCoalescer()
+    return _coalescer
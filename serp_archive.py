@@ -0,0 +1,181 @@
+import os
+import json
+import zlib
+import hashlib
+from sqlalchemy import func
+from sqlalchemy.dialects import sqlite, postgresql
+from models import db, AnalysisPoint, SerpPayload
+
+# zstandard isteğe bağlıdır; yoksa yükler zlib ile sıkıştırılır
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# orjson isteğe bağlıdır; toplu yeniden eşleştirmede çözme süresinin çoğu JSON ayrıştırmadır
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Ham yanıt arşivi ayarları
+SERP_ARCHIVE_ENABLED = os.getenv('SERP_ARCHIVE_ENABLED', '1') == '1'
+SERP_ARCHIVE_ZSTD_LEVEL = int(os.getenv('SERP_ARCHIVE_ZSTD_LEVEL', 10))
+SERP_ARCHIVE_ZLIB_LEVEL = 9
+SERP_ARCHIVE_BATCH_SIZE = 500
+
+
+def _compress(raw):
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=SERP_ARCHIVE_ZSTD_LEVEL).compress(raw)
+    return 'zlib', zlib.compress(raw, SERP_ARCHIVE_ZLIB_LEVEL)
+
+
+def _decompress(encoding, data):
+    if encoding == 'zlib':
+        return zlib.decompress(data)
+    if encoding == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('zstd ile sıkıştırılmış yükü okumak için zstandard paketi gerekli')
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Bilinmeyen yük kodlaması: {encoding}")
+
+
+def decode_places(encoding, data):
+    """Arşiv satırındaki sıkıştırılmış places listesini çözer"""
+    raw = _decompress(encoding, data)
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def encode_places(data):
+    """Serper yanıtındaki places listesini arşiv satırına çevirir
+
+    İçerik özeti anahtar sırasından bağımsızdır; aynı yanıt (ör. önbellekten gelen)
+    kaç noktada ya da analizde görülürse görülsün tek satır olarak saklanır.
+    Sıkıştırma iş parçacıklarında yapılabilir, zlib ve zstd GIL'i bırakır.
+    """
+    places = data.get('places', []) if data else []
+    raw = json.dumps(places, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    encoding, compressed = _compress(raw)
+    return {
+        'hash': hashlib.sha256(raw).hexdigest()[:32],
+        'encoding': encoding,
+        'raw_size': len(raw),
+        'data': compressed
+    }
+
+
+def store_payloads(rows):
+    """Arşiv satırlarını ekler, zaten var olan özetleri atlar (oturumun işlemi içinde)"""
+    unique = {}
+    for row in rows:
+        unique.setdefault(row['hash'], row)
+    if not unique:
+        return 0
+
+    # Aynı yükü eşzamanlı yazan işçiler birbirini bozmasın diye çakışmalar yok sayılır
+    dialect = db.session.get_bind().dialect.name
+    values = list(unique.values())
+    for start in range(0, len(values), SERP_ARCHIVE_BATCH_SIZE):
+        batch = values[start:start + SERP_ARCHIVE_BATCH_SIZE]
+        if dialect == 'sqlite':
+            statement = sqlite.insert(SerpPayload.__table__).on_conflict_do_nothing()
+        elif dialect == 'postgresql':
+            statement = postgresql.insert(SerpPayload.__table__).on_conflict_do_nothing()
+        else:
+            existing = {h for (h,) in db.session.query(SerpPayload.hash).filter(
+                SerpPayload.hash.in_([row['hash'] for row in batch]))}
+            batch = [row for row in batch if row['hash'] not in existing]
+            statement = SerpPayload.__table__.insert()
+        if batch:
+            db.session.execute(statement, batch)
+    return len(values)
+
+
+def load_places(payload_hash):
+    """Tek bir yükün places listesini döndürür, yoksa None"""
+    row = db.session.query(SerpPayload.encoding, SerpPayload.data).filter(SerpPayload.hash == payload_hash).first()
+    if row is None:
+        return None
+    return decode_places(row.encoding, row.data)
+
+
+def iter_analysis_payloads(analysis_id, batch_size=SERP_ARCHIVE_BATCH_SIZE):
+    """Analiz noktalarını ham places listeleriyle birlikte sırayla üretir: (nokta, places)
+
+    Noktalar id üzerinde anahtar tabanlı gruplar halinde okunur ve her grup için
+    yalnızca gereken yükler açılır; bellek kullanımı analiz boyutundan bağımsızdır.
+    Yükü arşivlenmemiş noktalarda places None olur.
+    """
+    last_id = 0
+    while True:
+        points = AnalysisPoint.query.filter(
+            AnalysisPoint.analysis_id == analysis_id,
+            AnalysisPoint.id > last_id
+        ).order_by(AnalysisPoint.id).limit(batch_size).all()
+        if not points:
+            return
+        last_id = points[-1].id
+
+        hashes = {point.payload_hash for point in points if point.payload_hash}
+        payloads = {}
+        if hashes:
+            for payload_hash, encoding, data in db.session.query(
+                SerpPayload.hash, SerpPayload.encoding, SerpPayload.data
+            ).filter(SerpPayload.hash.in_(hashes)):
+                payloads[payload_hash] = (encoding, data)
+
+        for point in points:
+            payload = payloads.get(point.payload_hash)
+            yield point, decode_places(*payload) if payload else None
+
+
+def prune_payloads(hashes):
+    """Verilen özetlerden artık hiçbir noktanın kullanmadığı yükleri siler"""
+    hashes = [h for h in set(hashes) if h]
+    for start in range(0, len(hashes), SERP_ARCHIVE_BATCH_SIZE):
+        batch = hashes[start:start + SERP_ARCHIVE_BATCH_SIZE]
+        in_use = {h for (h,) in db.session.query(AnalysisPoint.payload_hash).filter(
+            AnalysisPoint.payload_hash.in_(batch)).distinct()}
+        unused = [h for h in batch if h not in in_use]
+        if unused:
+            SerpPayload.query.filter(SerpPayload.hash.in_(unused)).delete(synchronize_session=False)
+
+
+def archive_stats():
+    """Arşivin sıkıştırılmış boyutunu ham JSON boyutuna ve tekilleştirme oranına göre döndürür
+
+    raw_bytes/stored_bytes tekil yüklerin ham ve sıkıştırılmış toplamıdır;
+    referenced_raw_bytes noktaların gördüğü tüm yanıtların (tekrarlar dahil) ham toplamıdır.
+    """
+    encodings = {}
+    for encoding, payloads, raw_bytes, stored_bytes in db.session.query(
+        SerpPayload.encoding,
+        func.count(SerpPayload.hash),
+        func.sum(SerpPayload.raw_size),
+        func.sum(func.length(SerpPayload.data))
+    ).group_by(SerpPayload.encoding):
+        encodings[encoding] = {'payloads': payloads, 'raw_bytes': raw_bytes or 0, 'stored_bytes': stored_bytes or 0}
+
+    points, referenced_raw_bytes = db.session.query(
+        func.count(AnalysisPoint.id),
+        func.sum(SerpPayload.raw_size)
+    ).join(SerpPayload, SerpPayload.hash == AnalysisPoint.payload_hash).one()
+
+    raw_bytes = sum(item['raw_bytes'] for item in encodings.values())
+    stored_bytes = sum(item['stored_bytes'] for item in encodings.values())
+    referenced_raw_bytes = referenced_raw_bytes or 0
+    return {
+        'payloads': sum(item['payloads'] for item in encodings.values()),
+        'points': points,
+        'raw_bytes': raw_bytes,
+        'stored_bytes': stored_bytes,
+        'referenced_raw_bytes': referenced_raw_bytes,
+        # Sıkıştırma oranı tekil yüklerde, toplam oran tekrarlar dahil tüm yanıtlara göre
+        'compression_ratio': stored_bytes / raw_bytes if raw_bytes else 0,
+        'dedup_ratio': raw_bytes / referenced_raw_bytes if referenced_raw_bytes else 0,
+        'overall_ratio': stored_bytes / referenced_raw_bytes if referenced_raw_bytes else 0,
+        'encodings': encodings
+    }
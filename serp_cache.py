@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from collections import Counter
+
+# Önbellek ayarları
+SERP_CACHE_PATH = os.getenv('SERP_CACHE_PATH', os.path.join('instance', 'serp_cache.db'))
+SERP_CACHE_TTL = int(os.getenv('SERP_CACHE_TTL', 6 * 60 * 60))  # saniye, 0 önbelleği kapatır
+SERP_CACHE_MAX_ENTRIES = int(os.getenv('SERP_CACHE_MAX_ENTRIES', 50000))
+SERP_CACHE_PRECISION = int(os.getenv('SERP_CACHE_PRECISION', 4))  # ondalık basamak (~11 m)
+SERP_CACHE_FLUSH_HITS = int(os.getenv('SERP_CACHE_FLUSH_HITS', 64))  # bu kadar okumada bir erişim zamanları ve sayaçlar yazılır
+
+STAT_NAMES = ('hits', 'misses', 'evictions', 'expired', 'stores', 'fetch_ms', 'coalesced')
+
+
+class SerpCache:
+    """Serper yanıtlarını SQLite üzerinde TTL ve LRU tahliyesiyle saklar
+
+    Okumalar yazma işlemi açmaz: erişim zamanları ve sayaçlar bellekte biriktirilir,
+    flush_hits okumada bir, her yazmada ve flush() çağrısında tek işlemde yazılır.
+    """
+
+    def __init__(self, path=SERP_CACHE_PATH, ttl=SERP_CACHE_TTL,
+                 max_entries=SERP_CACHE_MAX_ENTRIES, precision=SERP_CACHE_PRECISION,
+                 flush_hits=SERP_CACHE_FLUSH_HITS):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.precision = precision
+        self.flush_hits = flush_hits
+        self._pending_access = {}
+        self._pending_stats = Counter()
+        self._pending_count = 0
+        self._pending_lock = threading.Lock()
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute('''CREATE TABLE IF NOT EXISTS entries (
+                        key TEXT PRIMARY KEY,
+                        payload TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )''')
+                    conn.execute('CREATE INDEX IF NOT EXISTS ix_entries_accessed_at ON entries (accessed_at)')
+                    conn.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+                    conn.executemany('INSERT OR IGNORE INTO stats (name, value) VALUES (?, 0)',
+                                     [(name,) for name in STAT_NAMES])
+                    self._schema_ready = True
+        return conn
+
+    def make_key(self, keyword, lat, lon, zoom, hl):
+        """Anahtar kelime ve yuvarlanmış koordinatlardan önbellek anahtarı üretir"""
+        lat = f"{float(lat):.{self.precision}f}"
+        lon = f"{float(lon):.{self.precision}f}"
+        keyword = ' '.join((keyword or '').lower().split())
+        return f"{keyword}|{lat}|{lon}|{zoom}|{hl}"
+
+    def _incr(self, conn, name, amount=1):
+        conn.execute('UPDATE stats SET value = value + ? WHERE name = ?', (amount, name))
+
+    def _record(self, name, amount=1, key=None, accessed_at=None):
+        """Sayacı ve erişim zamanını biriktirir, eşik aşılınca yazar"""
+        with self._pending_lock:
+            self._pending_stats[name] += amount
+            if key is not None:
+                self._pending_access[key] = accessed_at
+            self._pending_count += 1
+            due = self._pending_count >= self.flush_hits
+        if due:
+            self.flush()
+
+    def _take_pending(self):
+        with self._pending_lock:
+            access, stats = self._pending_access, self._pending_stats
+            self._pending_access, self._pending_stats = {}, Counter()
+            self._pending_count = 0
+        return access, stats
+
+    def _write_pending(self, conn, access, stats):
+        if access:
+            conn.executemany('UPDATE entries SET accessed_at = MAX(accessed_at, ?) WHERE key = ?',
+                             [(accessed_at, key) for key, accessed_at in access.items()])
+        if stats:
+            conn.executemany('UPDATE stats SET value = value + ? WHERE name = ?',
+                             [(amount, name) for name, amount in stats.items() if amount])
+
+    def flush(self):
+        """Biriken erişim zamanlarını ve sayaçları tek işlemde yazar"""
+        access, stats = self._take_pending()
+        if not access and not stats:
+            return
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._write_pending(conn, access, stats)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            print(f"Önbellek sayaç hatası: {str(e)}")
+
+    def incr(self, name, amount=1):
+        """Paylaşılan sayaçlardan birini artırır (bir sonraki yazmada kaydedilir)"""
+        if not self.enabled:
+            return
+        self._record(name, amount)
+
+    def get(self, keyword, lat, lon, zoom, hl, record_miss=True):
+        """Önbellekteki yanıtı döndürür, yoksa veya süresi dolmuşsa None döndürür"""
+        if not self.enabled:
+            return None
+        try:
+            conn = self._connect()
+            key = self.make_key(keyword, lat, lon, zoom, hl)
+            now = time.time()
+            row = conn.execute('SELECT payload, created_at FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                if record_miss:
+                    self._record('misses')
+                return None
+            if now - row[1] > self.ttl:
+                conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._record('expired')
+                if record_miss:
+                    self._record('misses')
+                return None
+            self._record('hits', key=key, accessed_at=now)
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            print(f"Önbellek okuma hatası: {str(e)}")
+            return None
+
+    def set(self, keyword, lat, lon, zoom, hl, data, fetch_ms=0):
+        """Yanıtı önbelleğe yazar ve gerekiyorsa en eski kayıtları tahliye eder"""
+        if not self.enabled:
+            return
+        try:
+            conn = self._connect()
+            key = self.make_key(keyword, lat, lon, zoom, hl)
+            now = time.time()
+            access, stats = self._take_pending()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Biriken okumalar bu işlemle birlikte yazılır; tahliye güncel erişim zamanlarını görür
+                self._write_pending(conn, access, stats)
+                conn.execute(
+                    'INSERT OR REPLACE INTO entries (key, payload, created_at, accessed_at) VALUES (?, ?, ?, ?)',
+                    (key, json.dumps(data, ensure_ascii=False), now, now)
+                )
+                self._incr(conn, 'stores')
+                self._incr(conn, 'fetch_ms', int(fetch_ms))
+
+                overflow = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        'DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at LIMIT ?)',
+                        (overflow,)
+                    )
+                    self._incr(conn, 'evictions', overflow)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            print(f"Önbellek yazma hatası: {str(e)}")
+
+    def stats(self):
+        """Önbellek sayaçlarını ve tahmini tasarrufu döndürür"""
+        stats = {name: 0 for name in STAT_NAMES}
+        stats['entries'] = 0
+        self.flush()
+        try:
+            conn = self._connect()
+            stats.update(dict(conn.execute('SELECT name, value FROM stats').fetchall()))
+            stats['entries'] = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Önbellek istatistik hatası: {str(e)}")
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] / lookups * 100) if lookups else 0
+        avg_fetch_ms = (stats['fetch_ms'] / stats['stores']) if stats['stores'] else 0
+        stats['avg_fetch_ms'] = avg_fetch_ms
+        # Birleştirilen istekler de upstream'e gitmediği için tasarrufa dahildir
+        stats['saved_seconds'] = (stats['hits'] + stats['coalesced']) * avg_fetch_ms / 1000
+        stats['enabled'] = self.enabled
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_serp_cache():
+    """Süreç genelinde paylaşılan önbellek nesnesini döndürür"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SerpCache()
+                # Süreç kapanırken biriken sayaçlar kaybolmasın
+                atexit.register(_cache.flush)
+    return _cache
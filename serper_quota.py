@@ -0,0 +1,244 @@
+import os
+import time
+import random
+import hashlib
+import sqlite3
+import threading
+
+# Hız sınırı ve kullanım kaydı ayarları
+SERPER_QUOTA_PATH = os.getenv('SERPER_QUOTA_PATH', os.path.join('instance', 'serper_quota.db'))
+SERPER_RATE_PER_SECOND = float(os.getenv('SERPER_RATE_PER_SECOND', 5))  # 0 sınırı kapatır
+SERPER_RATE_BURST = int(os.getenv('SERPER_RATE_BURST', 10))
+SERPER_RATE_MAX_WAIT = float(os.getenv('SERPER_RATE_MAX_WAIT', 600))  # saniye
+SERPER_USAGE_RETENTION_DAYS = int(os.getenv('SERPER_USAGE_RETENTION_DAYS', 30))
+
+USAGE_WINDOWS = {
+    'last_minute': 60,
+    'last_hour': 60 * 60,
+    'last_day': 24 * 60 * 60,
+    'last_30_days': 30 * 24 * 60 * 60
+}
+
+
+class RateLimitTimeout(Exception):
+    """Hız sınırı nedeniyle izin verilen bekleme süresi aşıldı"""
+    pass
+
+
+def key_fingerprint(api_key):
+    """API anahtarının kayıtlarda kullanılan kısa özetini döndürür"""
+    if not api_key:
+        return 'anonymous'
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
+
+class SerperQuota:
+    """API anahtarı başına token kovası ve çağrı kaydını SQLite üzerinde tutar
+
+    Kova GCRA biçiminde saklanır: her anahtar için bir sonraki isteğin teorik
+    varış zamanı (tat) tutulur. Bir istek kendi zaman dilimini BEGIN IMMEDIATE
+    içinde ayırır ve o ana kadar bekler; böylece aynı makinedeki tüm işçi
+    süreçleri tek bir kovayı paylaşır ve istekler sürdürülebilir hızda sıraya girer.
+    """
+
+    def __init__(self, path=SERPER_QUOTA_PATH, rate=SERPER_RATE_PER_SECOND,
+                 burst=SERPER_RATE_BURST, max_wait=SERPER_RATE_MAX_WAIT,
+                 retention_days=SERPER_USAGE_RETENTION_DAYS):
+        self.path = path
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_wait = max_wait
+        self.retention_days = retention_days
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute('''CREATE TABLE IF NOT EXISTS buckets (
+                        key_id TEXT PRIMARY KEY,
+                        tat REAL NOT NULL
+                    )''')
+                    conn.execute('''CREATE TABLE IF NOT EXISTS calls (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        key_id TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        status INTEGER,
+                        ok INTEGER NOT NULL,
+                        latency_ms INTEGER NOT NULL,
+                        waited_ms INTEGER NOT NULL
+                    )''')
+                    conn.execute('CREATE INDEX IF NOT EXISTS ix_calls_key_id_created_at ON calls (key_id, created_at)')
+                    self._schema_ready = True
+        return conn
+
+    @property
+    def _interval(self):
+        return 1.0 / self.rate
+
+    def acquire(self, key_id, max_wait=None):
+        """Anahtar için bir istek hakkı ayırır, gerekirse bekler ve beklenen süreyi döndürür
+
+        max_wait verilirse genel üst sınırdan küçük olanı uygulanır.
+        """
+        if not self.enabled:
+            return 0.0
+        max_wait = self.max_wait if max_wait is None else min(max_wait, self.max_wait)
+        interval = self._interval
+        tolerance = (self.burst - 1) * interval
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                row = conn.execute('SELECT tat FROM buckets WHERE key_id = ?', (key_id,)).fetchone()
+                tat = max(row[0] if row else now, now)
+                wait = max(tat - tolerance - now, 0.0)
+                if wait > max_wait:
+                    conn.execute('ROLLBACK')
+                    raise RateLimitTimeout(f"Hız sınırı için {wait:.0f} sn beklemek gerekiyor")
+                conn.execute('INSERT OR REPLACE INTO buckets (key_id, tat) VALUES (?, ?)',
+                             (key_id, tat + interval))
+                conn.execute('COMMIT')
+            except RateLimitTimeout:
+                raise
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            # Kova okunamıyorsa istekler sınırsız devam eder, analiz durmaz
+            print(f"Hız sınırı hatası: {str(e)}")
+            return 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def try_acquire(self, key_id):
+        """Beklemeden verilebilecek bir istek hakkı varsa ayırır ve True döndürür"""
+        try:
+            self.acquire(key_id, max_wait=0)
+            return True
+        except RateLimitTimeout:
+            return False
+
+    def refund(self, key_id):
+        """Kullanılmadan kalan bir istek hakkını kovaya geri verir"""
+        if not self.enabled:
+            return
+        try:
+            conn = self._connect()
+            conn.execute('UPDATE buckets SET tat = MAX(tat - ?, ?) WHERE key_id = ?',
+                         (self._interval, time.time(), key_id))
+        except sqlite3.Error as e:
+            print(f"Hız sınırı hatası: {str(e)}")
+
+    def penalize(self, key_id, retry_after):
+        """429 yanıtından sonra kovayı retry_after saniye boyunca boşaltır"""
+        if not self.enabled:
+            return
+        tolerance = (self.burst - 1) * self._interval
+        try:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                blocked_tat = time.time() + retry_after + tolerance
+                row = conn.execute('SELECT tat FROM buckets WHERE key_id = ?', (key_id,)).fetchone()
+                if row is None or row[0] < blocked_tat:
+                    conn.execute('INSERT OR REPLACE INTO buckets (key_id, tat) VALUES (?, ?)',
+                                 (key_id, blocked_tat))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            print(f"Hız sınırı hatası: {str(e)}")
+
+    def record(self, key_id, status, ok, latency_ms, waited_ms=0):
+        """Anahtara yapılan bir çağrıyı kayda geçirir"""
+        try:
+            conn = self._connect()
+            now = time.time()
+            conn.execute(
+                'INSERT INTO calls (key_id, created_at, status, ok, latency_ms, waited_ms) VALUES (?, ?, ?, ?, ?, ?)',
+                (key_id, now, status, 1 if ok else 0, int(latency_ms), int(waited_ms))
+            )
+            # Eski kayıtlar ara sıra temizlenir
+            if random.random() < 0.001:
+                conn.execute('DELETE FROM calls WHERE created_at < ?',
+                             (now - self.retention_days * 24 * 60 * 60,))
+        except sqlite3.Error as e:
+            print(f"Kullanım kaydı hatası: {str(e)}")
+
+    def usage(self, key_id):
+        """Anahtarın zaman pencerelerine göre tüketimini ve kova durumunu döndürür"""
+        usage = {name: 0 for name in USAGE_WINDOWS}
+        usage.update({
+            'key_id': key_id,
+            'errors_last_day': 0,
+            'rate_limited_last_day': 0,
+            'avg_latency_ms': 0,
+            'avg_wait_ms': 0,
+            'queue_delay': 0.0,
+            'rate': self.rate,
+            'burst': self.burst,
+            'enabled': self.enabled
+        })
+        try:
+            conn = self._connect()
+            now = time.time()
+            for name, seconds in USAGE_WINDOWS.items():
+                usage[name] = conn.execute(
+                    'SELECT COUNT(*) FROM calls WHERE key_id = ? AND created_at >= ?',
+                    (key_id, now - seconds)
+                ).fetchone()[0]
+            errors, rate_limited = conn.execute(
+                'SELECT COALESCE(SUM(1 - ok), 0), COALESCE(SUM(status = 429), 0) '
+                'FROM calls WHERE key_id = ? AND created_at >= ?',
+                (key_id, now - USAGE_WINDOWS['last_day'])
+            ).fetchone()
+            usage['errors_last_day'] = errors
+            usage['rate_limited_last_day'] = rate_limited
+            avg_latency, avg_wait = conn.execute(
+                'SELECT AVG(latency_ms), AVG(waited_ms) FROM calls WHERE key_id = ? AND created_at >= ?',
+                (key_id, now - USAGE_WINDOWS['last_hour'])
+            ).fetchone()
+            usage['avg_latency_ms'] = avg_latency or 0
+            usage['avg_wait_ms'] = avg_wait or 0
+
+            row = conn.execute('SELECT tat FROM buckets WHERE key_id = ?', (key_id,)).fetchone()
+            if row and self.enabled:
+                # Yeni bir isteğin şu an sıraya girse ne kadar bekleyeceği
+                usage['queue_delay'] = max(row[0] - (self.burst - 1) * self._interval - now, 0.0)
+        except sqlite3.Error as e:
+            print(f"Kullanım istatistik hatası: {str(e)}")
+        return usage
+
+
+_quota = None
+_quota_lock = threading.Lock()
+
+
+def get_serper_quota():
+    """Süreç genelinde paylaşılan kota nesnesini döndürür"""
+    global _quota
+    if _quota is None:
+        with _quota_lock:
+            if _quota is None:
+                _quota = SerperQuota()
+    return _quota
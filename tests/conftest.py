@@ -0,0 +1,37 @@
+import os
+import sys
+import pytest
+
+# Testler depo kökündeki modülleri doğrudan içe aktarır
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models import db
+
+
+@pytest.fixture
+def db_app(tmp_path):
+    """Geçici SQLite veritabanına bağlı, şeması modellerden kurulmuş uygulama bağlamı"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def project(db_app):
+    """Kullanıcısıyla birlikte kaydedilmiş örnek proje"""
+    from models import User, Project
+    user = User(username='test', email='test@example.com')
+    db.session.add(user)
+    db.session.flush()
+    project = Project(name='test', keyword='kuyumcu', target_business='Haldız Kuyumculuk',
+                      center_coordinates='@41.0,29.0,11z', radius_km=2, user_id=user.id)
+    db.session.add(project)
+    db.session.commit()
+    return project
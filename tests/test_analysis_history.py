@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+from models import db, Analysis
+from analysis_history import history_page, encode_cursor, decode_cursor
+
+
+def add_analyses(project, dates):
+    analyses = [Analysis(project_id=project.id, analysis_date=date) for date in dates]
+    db.session.add_all(analyses)
+    db.session.commit()
+    return analyses
+
+
+def test_cursor_round_trip():
+    analysis = Analysis(id=42, analysis_date=datetime(2026, 10, 18, 17, 30, 5, 123456))
+    assert decode_cursor(encode_cursor(analysis)) == (analysis.analysis_date, 42)
+    assert decode_cursor('bozuk') is None
+    assert decode_cursor(None) is None
+
+
+def test_pages_cover_ties_on_analysis_date(project):
+    # Aynı analysis_date'e sahip analizler sayfa sınırına denk gelse de atlanmamalı
+    tied = datetime(2026, 10, 18, 12, 0)
+    dates = [tied - timedelta(days=1)] + [tied] * 5 + [tied + timedelta(days=1)]
+    analyses = add_analyses(project, dates)
+    expected = [a.id for a in sorted(analyses, key=lambda a: (a.analysis_date, a.id), reverse=True)]
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor, latest = history_page(project.id, cursor, limit=2)
+        seen.extend(a.id for a in page)
+        pages += 1
+        assert latest.id == expected[0]
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert pages == 4
+
+
+def test_last_full_page_has_no_next_cursor(project):
+    add_analyses(project, [datetime(2026, 10, 18)] * 4)
+    first, cursor, _ = history_page(project.id, limit=2)
+    second, cursor, _ = history_page(project.id, cursor, limit=2)
+    assert len(first) == len(second) == 2
+    assert cursor is None
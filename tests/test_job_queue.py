@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+import job_queue
+from job_queue import enqueue_analysis, claim_next_job, extend_lease, complete_job, fail_job
+from models import db, AnalysisJob
+
+
+def expire_lease(job_id):
+    """İşçinin çöktüğünü taklit etmek için kirayı geçmişe çeker"""
+    AnalysisJob.query.filter_by(id=job_id).update({'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+
+
+def test_enqueue_returns_existing_active_job(project):
+    job = enqueue_analysis(project.id)
+    assert enqueue_analysis(project.id).id == job.id
+
+
+def test_claim_leases_job_once(project):
+    job = enqueue_analysis(project.id)
+
+    claimed = claim_next_job('worker-1')
+    assert claimed == {'id': job.id, 'kind': 'analysis', 'project_id': project.id, 'attempts': 1}
+    # Kirası süren iş başka işçiye verilmez
+    assert claim_next_job('worker-2') is None
+
+    assert extend_lease(job.id, 'worker-1')
+    assert not extend_lease(job.id, 'worker-2')
+    complete_job(job.id, 'worker-1', None)
+    assert db.session.get(AnalysisJob, job.id).status == 'completed'
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(project):
+    job = enqueue_analysis(project.id)
+    claim_next_job('worker-1')
+    expire_lease(job.id)
+
+    claimed = claim_next_job('worker-2')
+    assert claimed['id'] == job.id
+    assert claimed['attempts'] == 2
+    db.session.expire_all()
+    assert db.session.get(AnalysisJob, job.id).locked_by == 'worker-2'
+    # Kirayı kaybeden işçi artık işi uzatamaz veya tamamlayamaz
+    assert not extend_lease(job.id, 'worker-1')
+    complete_job(job.id, 'worker-1', None)
+    db.session.expire_all()
+    assert db.session.get(AnalysisJob, job.id).status == 'running'
+
+
+def test_expired_lease_without_attempts_left_fails(project):
+    job = enqueue_analysis(project.id)
+    for attempt in range(job.max_attempts):
+        assert claim_next_job(f'worker-{attempt}')['attempts'] == attempt + 1
+        expire_lease(job.id)
+
+    assert claim_next_job('worker-last') is None
+    db.session.expire_all()
+    job = db.session.get(AnalysisJob, job.id)
+    assert job.status == 'failed'
+    assert job.locked_by is None
+
+
+def test_failed_job_is_requeued_with_backoff(project, monkeypatch):
+    monkeypatch.setattr(job_queue, 'JOB_RETRY_BASE_SECONDS', 30)
+    job = enqueue_analysis(project.id)
+    claim_next_job('worker-1')
+
+    before = datetime.utcnow()
+    fail_job(job.id, 'worker-1', RuntimeError('Serper zaman aşımı'))
+    db.session.expire_all()
+    job = db.session.get(AnalysisJob, job.id)
+    assert job.status == 'queued'
+    assert job.last_error == 'Serper zaman aşımı'
+    assert job.run_after >= before + timedelta(seconds=30)
+    # Geri çekilme süresi dolmadan iş alınmaz, dolunca yeniden kiralanır
+    assert claim_next_job('worker-2') is None
+    job.run_after = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert claim_next_job('worker-2')['attempts'] == 2
+
+
+def test_last_failed_attempt_marks_job_failed(project):
+    job = enqueue_analysis(project.id)
+    for attempt in range(job.max_attempts):
+        AnalysisJob.query.filter_by(id=job.id).update({'run_after': datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+        claim_next_job('worker-1')
+        fail_job(job.id, 'worker-1', 'hata')
+
+    db.session.expire_all()
+    job = db.session.get(AnalysisJob, job.id)
+    assert job.status == 'failed'
+    assert job.attempts == job.max_attempts
+    assert job.finished_at is not None
@@ -0,0 +1,61 @@
+import random
+import pytest
+import name_matching
+from name_matching import levenshtein_distance, bounded_levenshtein, similarity_at_least
+
+ALPHABET = 'abcçdefgğhıijklmnoöprsştuüvyz  .-'
+THRESHOLDS = (0.0, 0.5, 0.7, 0.8, 0.85, 0.9, 1.0)
+
+
+def random_pairs(count, seed=0):
+    """Benzer ve rastgele dizelerden oluşan çiftler üretir"""
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        s1 = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 16)))
+        if rng.random() < 0.5:
+            # s1'in birkaç düzenlemeyle bozulmuş hali, küçük mesafeleri sınamak için
+            s2 = list(s1)
+            for _ in range(rng.randint(0, 4)):
+                op = rng.randint(0, 2)
+                index = rng.randint(0, len(s2))
+                if op == 0:
+                    s2.insert(index, rng.choice(ALPHABET))
+                elif s2 and index < len(s2):
+                    if op == 1:
+                        del s2[index]
+                    else:
+                        s2[index] = rng.choice(ALPHABET)
+            s2 = ''.join(s2)
+        else:
+            s2 = ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 16)))
+        pairs.append((s1, s2))
+    return pairs
+
+
+@pytest.fixture(params=['python', 'rapidfuzz'])
+def backend(request, monkeypatch):
+    """Sınırlı mesafeyi hem saf Python hem de (kuruluysa) rapidfuzz ile sınar"""
+    if request.param == 'python':
+        monkeypatch.setattr(name_matching, '_rapidfuzz_levenshtein', None)
+    else:
+        rapidfuzz = pytest.importorskip('rapidfuzz.distance')
+        monkeypatch.setattr(name_matching, '_rapidfuzz_levenshtein', rapidfuzz.Levenshtein)
+    return request.param
+
+
+def test_bounded_levenshtein_matches_full_distance(backend):
+    for s1, s2 in random_pairs(3000):
+        distance = levenshtein_distance(s1, s2)
+        for max_distance in range(8):
+            expected = distance if distance <= max_distance else max_distance + 1
+            assert bounded_levenshtein(s1, s2, max_distance) == expected, (s1, s2, max_distance)
+
+
+def test_similarity_at_least_matches_full_ratio(backend):
+    for s1, s2 in random_pairs(3000, seed=1):
+        max_length = max(len(s1), len(s2))
+        ratio = 1 - levenshtein_distance(s1, s2) / max_length if max_length else 0
+        for threshold in THRESHOLDS:
+            expected = ratio if ratio >= threshold else None
+            assert similarity_at_least(s1, s2, threshold) == expected, (s1, s2, threshold)
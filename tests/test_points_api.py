@@ -0,0 +1,89 @@
+import os
+import gzip
+import json
+import pytest
+from models import db, User, Project, Analysis, AnalysisPoint
+
+
+@pytest.fixture(scope='module')
+def web_app(tmp_path_factory):
+    """Geçici veritabanına bağlı gerçek uygulama; PDF bağımlılıkları yoksa atlanır"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{tmp_path_factory.mktemp('web') / 'app.db'}"
+    try:
+        from app import app
+    except (ImportError, OSError) as e:
+        pytest.skip(f"uygulama içe aktarılamadı: {e}")
+    finally:
+        del os.environ['DATABASE_URL']
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        user = User(username='points', email='points@example.com')
+        db.session.add(user)
+        db.session.flush()
+        project = Project(name='test', keyword='kuyumcu', target_business='Haldız Kuyumculuk',
+                          center_coordinates='@41.0,29.0,11z', radius_km=2, user_id=user.id)
+        db.session.add(project)
+        db.session.commit()
+        app.config['TEST_USER_ID'] = user.id
+        app.config['TEST_PROJECT_ID'] = project.id
+    return app
+
+
+@pytest.fixture
+def points_url(web_app):
+    """60 noktalı yeni bir analiz kaydeder, nokta API'sinin adresini ve analiz id'sini döndürür"""
+    with web_app.app_context():
+        analysis = Analysis(project_id=web_app.config['TEST_PROJECT_ID'])
+        db.session.add(analysis)
+        db.session.flush()
+        db.session.add_all([
+            AnalysisPoint(analysis_id=analysis.id, coordinates=f'{41 + i / 1000},{29 + i / 1000}',
+                          latitude=41 + i / 1000, longitude=29 + i / 1000, position=i % 25 or None,
+                          rating=4.5, rating_count=100)
+            for i in range(60)
+        ])
+        db.session.commit()
+        return f'/api/analysis/{analysis.id}/points', analysis.id
+
+
+@pytest.fixture
+def client(web_app):
+    client = web_app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(web_app.config['TEST_USER_ID'])
+        session['_fresh'] = True
+    return client
+
+
+def test_points_returns_304_on_matching_etag(client, points_url):
+    url, analysis_id = points_url
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    payload = json.loads(gzip.decompress(response.data))
+    assert payload['analysisId'] == analysis_id
+    assert payload['count'] == 60
+    etag = response.headers['ETag']
+
+    cached = client.get(url, headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == etag
+
+    stale = client.get(url, headers={'If-None-Match': '"eski"'})
+    assert stale.status_code == 200
+    assert 'Content-Encoding' not in stale.headers
+    assert json.loads(stale.data) == payload
+
+
+def test_points_etag_changes_with_data(web_app, client, points_url):
+    url, analysis_id = points_url
+    etag = client.get(url).headers['ETag']
+    with web_app.app_context():
+        AnalysisPoint.query.filter_by(analysis_id=analysis_id).first().position = 1
+        db.session.commit()
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
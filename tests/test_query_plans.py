@@ -0,0 +1,30 @@
+import pytest
+import sqlalchemy as sa
+from models import db
+from query_plans import HOT_QUERIES, seed_database, check_query_plans, plan_problems
+
+
+@pytest.fixture(scope='module')
+def plan_results(tmp_path_factory):
+    """Modellerden oluşturulup örnek veriyle doldurulmuş SQLite'ta sık sorguların planları"""
+    engine = sa.create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    try:
+        with engine.begin() as connection:
+            db.metadata.create_all(connection)
+            seed_database(connection)
+            return {name: (plan, problems) for name, plan, problems in check_query_plans(connection)}
+    finally:
+        engine.dispose()
+
+
+@pytest.mark.parametrize('name', [name for name, _, _ in HOT_QUERIES])
+def test_hot_query_uses_index(plan_results, name):
+    plan, problems = plan_results[name]
+    assert not problems, '\n'.join(plan)
+    assert not any(line.startswith('SCAN ') and ' USING ' not in line for line in plan), '\n'.join(plan)
+
+
+def test_plan_problems_detects_full_scan():
+    assert plan_problems(['SCAN analysis'], 'ix_analysis_project_id_analysis_date')
+    assert not plan_problems(['SEARCH analysis USING INDEX ix_analysis_project_id_analysis_date (project_id=?)'],
+                             'ix_analysis_project_id_analysis_date')
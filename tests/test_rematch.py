@@ -0,0 +1,66 @@
+import random
+import pytest
+import rematch
+from models import db, Analysis, AnalysisPoint
+from rank_analyzer import RankAnalyzer
+from serp_archive import encode_places, store_payloads, load_places
+
+NAMES = ['Haldız Kuyumculuk', 'HALDIZ KUYUMCULUK', 'Haldiz Kuyumculuk Ltd.', 'Haldız Kuyumcu',
+         'Altın Sarayı', 'Kuyumcu Mehmet', 'Pırlanta Evi', 'Zümrüt Kuyumculuk']
+
+
+def random_serp(rng):
+    """Hedef işletmenin farklı yazımlarla farklı sıralarda geçtiği (ya da hiç geçmediği) yanıt"""
+    names = rng.sample(NAMES, rng.randint(0, len(NAMES)))
+    return {'places': [{'title': name, 'rating': round(rng.uniform(3, 5), 1), 'ratingCount': rng.randint(1, 500)}
+                       for name in names]}
+
+
+@pytest.fixture
+def archived_analyses(project):
+    """Arşivlenmiş yanıtları olan ama sıralamaları eski kalmış üç analiz"""
+    rng = random.Random(7)
+    serps = [random_serp(rng) for _ in range(12)]
+    rows = [encode_places(serp) for serp in serps]
+    store_payloads(rows)
+    for index in range(3):
+        analysis = Analysis(project_id=project.id)
+        db.session.add(analysis)
+        db.session.flush()
+        db.session.add_all([
+            AnalysisPoint(analysis_id=analysis.id, coordinates=f'{41 + i / 100},{29 + i / 100}',
+                          latitude=41 + i / 100, longitude=29 + i / 100, position=99, rating=1.0, rating_count=1,
+                          payload_hash=rows[rng.randrange(len(rows))]['hash'])
+            for i in range(20)
+        ])
+        # Yanıtı arşivlenmemiş nokta olduğu gibi kalmalı
+        db.session.add(AnalysisPoint(analysis_id=analysis.id, coordinates='41.5,29.5', latitude=41.5,
+                                     longitude=29.5, position=5, rating=4.0, rating_count=10))
+    db.session.commit()
+    return project
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_rematch_matches_match_business(archived_analyses, monkeypatch, tmp_path, workers):
+    monkeypatch.setattr(rematch, 'REMATCH_CHUNK_ANALYSES', 1)
+    stats = rematch.rematch_project(archived_analyses.id, workers=workers, static_folder=str(tmp_path))
+    db.session.expire_all()
+
+    analyzer = RankAnalyzer(archived_analyses.target_business, verbose=False)
+    points = AnalysisPoint.query.order_by(AnalysisPoint.id).all()
+    for point in points:
+        if point.payload_hash is None:
+            assert (point.position, point.rating, point.rating_count) == (5, 4.0, 10)
+            continue
+        match = analyzer.match_business({'places': load_places(point.payload_hash)})
+        assert (point.position, point.rating, point.rating_count) == \
+            (match['position'], match['rating'], match['rating_count'])
+
+    assert stats['analyses'] == 3
+    assert stats['points'] == len(points)
+    assert stats['changed'] == 60
+    # Özetler de yeni sıralamalardan yeniden hesaplanır
+    for analysis in Analysis.query.all():
+        visible = [p.position for p in analysis.points if p.position]
+        assert analysis.visible_points == len(visible)
+        assert analysis.best_position == min(visible)
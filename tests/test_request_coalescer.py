@@ -0,0 +1,80 @@
+import os
+import time
+import threading
+import multiprocessing
+from request_coalescer import RequestCoalescer
+
+KEY = 'kuyumcu|41.0|29.0'
+
+
+def counting_fetch(counter_path, result_path):
+    """Çağrı sayısını dosyaya ekleyen, sonucu 'önbelleğe' yazan yavaş upstream"""
+    def fetch():
+        with open(counter_path, 'a') as f:
+            f.write(f'{os.getpid()}\n')
+        time.sleep(0.3)
+        result = {'places': [{'title': 'Haldız Kuyumculuk'}]}
+        with open(result_path, 'w') as f:
+            f.write('cached')
+        return result
+
+    def lookup():
+        if os.path.exists(result_path):
+            return {'places': [{'title': 'Haldız Kuyumculuk'}]}
+        return None
+    return fetch, lookup
+
+
+def run_threads(lock_path, counter_path, result_path, threads, start_at, queue=None):
+    coalescer = RequestCoalescer(lock_path=lock_path, lock_timeout=10)
+    fetch, lookup = counting_fetch(counter_path, result_path)
+    results = []
+
+    def worker():
+        time.sleep(max(start_at - time.time(), 0))
+        results.append(coalescer.run(KEY, fetch, lookup)[0])
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    if queue is not None:
+        queue.put(results)
+    return results
+
+
+def upstream_calls(counter_path):
+    if not os.path.exists(counter_path):
+        return 0
+    with open(counter_path) as f:
+        return len(f.read().split())
+
+
+def test_threads_share_single_fetch(tmp_path):
+    counter_path = str(tmp_path / 'calls')
+    results = run_threads(str(tmp_path / 'inflight.lock'), counter_path,
+                          str(tmp_path / 'result'), threads=16, start_at=time.time())
+
+    assert upstream_calls(counter_path) == 1
+    assert len(results) == 16
+    assert all(result == results[0] for result in results)
+
+
+def test_processes_share_single_fetch(tmp_path):
+    counter_path = str(tmp_path / 'calls')
+    args = (str(tmp_path / 'inflight.lock'), counter_path, str(tmp_path / 'result'), 8)
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    start_at = time.time() + 1.5
+    processes = [context.Process(target=run_threads, args=args + (start_at, queue)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    results = [item for _ in processes for item in queue.get(timeout=30)]
+    for process in processes:
+        process.join(timeout=30)
+
+    assert all(process.exitcode == 0 for process in processes)
+    assert upstream_calls(counter_path) == 1
+    assert len(results) == 24
+    assert all(result == results[0] for result in results)
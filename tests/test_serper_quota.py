@@ -0,0 +1,145 @@
+import time
+import threading
+import pytest
+import rank_analyzer
+from rank_analyzer import RankAnalyzer
+from serper_quota import SerperQuota, RateLimitTimeout
+from serp_cache import SerpCache
+from request_coalescer import RequestCoalescer
+
+PLACES = {'places': [{'title': 'Haldız Kuyumculuk', 'rating': 4.8, 'ratingCount': 120}]}
+
+
+@pytest.fixture
+def quota(tmp_path):
+    return SerperQuota(path=str(tmp_path / 'quota.db'), rate=10, burst=3)
+
+
+def ledger(quota):
+    return quota._connect().execute('SELECT status, ok FROM calls ORDER BY id').fetchall()
+
+
+def test_acquire_allows_burst_then_spaces_requests(quota):
+    assert [quota.acquire('k') for _ in range(3)] == [0.0, 0.0, 0.0]
+    started = time.monotonic()
+    waited = quota.acquire('k')
+    assert 0.05 < waited <= 0.1
+    assert time.monotonic() - started >= waited
+    # Anahtarlar birbirinin kovasını tüketmez
+    assert quota.acquire('other') == 0.0
+
+
+def test_acquire_raises_when_wait_exceeds_limit(quota):
+    for _ in range(3):
+        quota.acquire('k')
+    with pytest.raises(RateLimitTimeout):
+        quota.acquire('k', max_wait=0.01)
+
+
+def test_try_acquire_and_refund(quota):
+    assert all(quota.try_acquire('k') for _ in range(3))
+    assert not quota.try_acquire('k')
+    # Kullanılmayan hak geri verilince beklemeden yeniden alınabilir
+    quota.refund('k')
+    assert quota.try_acquire('k')
+    assert not quota.try_acquire('k')
+
+
+def test_penalize_blocks_bucket(quota):
+    quota.penalize('k', 5)
+    with pytest.raises(RateLimitTimeout):
+        quota.acquire('k', max_wait=1)
+
+
+class FakeResponse:
+    def __init__(self, status, data=None, headers=None):
+        self.status_code = status
+        self.headers = headers or {}
+        self._data = data
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f'HTTP {self.status_code}')
+
+
+class FakeSession:
+    """Sırayla verilen yanıtları döndüren, istek sayısını tutan HTTP oturumu"""
+
+    def __init__(self, responses, delay=0.0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def post(self, url, json=None, headers=None):
+        with self.lock:
+            self.calls += 1
+            response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        time.sleep(self.delay)
+        return response
+
+
+@pytest.fixture
+def serper(tmp_path, monkeypatch, quota):
+    """RankAnalyzer'ın kota, önbellek ve birleştiricisini geçici dosyalara yönlendirir"""
+    cache = SerpCache(path=str(tmp_path / 'cache.db'))
+    coalescer = RequestCoalescer(lock_path=str(tmp_path / 'inflight.lock'))
+    monkeypatch.setattr(rank_analyzer, 'get_serper_quota', lambda: quota)
+    monkeypatch.setattr(rank_analyzer, 'get_serp_cache', lambda: cache)
+    monkeypatch.setattr(rank_analyzer, 'get_request_coalescer', lambda: coalescer)
+    monkeypatch.setattr(rank_analyzer, 'HTTP_RETRY_BACKOFF', 0)
+
+    def use_session(session):
+        monkeypatch.setattr(rank_analyzer, 'get_session', lambda: session)
+        return session
+    return use_session
+
+
+def test_every_retry_attempt_is_recorded(serper, quota):
+    session = serper(FakeSession([
+        FakeResponse(503),
+        FakeResponse(429, headers={'Retry-After': '0'}),
+        FakeResponse(502),
+        FakeResponse(200, PLACES)
+    ]))
+    analyzer = RankAnalyzer('Haldız Kuyumculuk', 'test-key', verbose=False)
+
+    assert analyzer.get_serper_data('kuyumcu', '41.0', '29.0') == PLACES
+    assert session.calls == 4
+    assert ledger(quota) == [(503, 0), (429, 0), (502, 0), (200, 1)]
+
+
+def test_server_errors_give_up_after_max_retries(serper, quota, monkeypatch):
+    monkeypatch.setattr(rank_analyzer, 'HTTP_MAX_RETRIES', 2)
+    session = serper(FakeSession([FakeResponse(503)]))
+    analyzer = RankAnalyzer('Haldız Kuyumculuk', 'test-key', verbose=False)
+
+    assert analyzer.get_serper_data('kuyumcu', '41.0', '29.0') is None
+    assert session.calls == 3
+    assert ledger(quota) == [(503, 0)] * 3
+
+
+def test_only_leader_waits_for_token(serper, quota):
+    session = serper(FakeSession([FakeResponse(200, PLACES)], delay=0.2))
+    analyzer = RankAnalyzer('Haldız Kuyumculuk', 'test-key', verbose=False)
+    # Kova boş: lider 0,3 sn bekler, aynı anahtarı isteyenler hak için beklememelidir
+    quota.penalize(analyzer.key_id, 0.3)
+
+    results = []
+    started = time.monotonic()
+    threads = [threading.Thread(target=lambda: results.append(analyzer.get_serper_data('kuyumcu', '41.0', '29.0')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    assert results == [PLACES] * 8
+    assert session.calls == 1
+    assert ledger(quota) == [(200, 1)]
+    # Takipçiler sırayla hak bekleseydi 8 x 0,1 sn daha sürerdi
+    assert elapsed < 0.9
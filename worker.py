@@ -0,0 +1,146 @@
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import threading
+
+# İşçi ayarları
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', os.cpu_count() or 1))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', 2))
+# Zamanlayıcı tüm işçilerde çalışır, koşullu güncelleme aynı zamanlamanın iki kez gönderilmesini engeller
+SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', '1') == '1'
+
+
+def _heartbeat(app, job_id, worker_id, stop_event, interval):
+    """İş sürdükçe kirayı düzenli olarak uzatır"""
+    from job_queue import extend_lease
+    while not stop_event.wait(interval):
+        try:
+            with app.app_context():
+                if not extend_lease(job_id, worker_id):
+                    print(f"[{worker_id}] İş #{job_id} kirası kaybedildi")
+                    return
+        except Exception as e:
+            print(f"[{worker_id}] Kira uzatma hatası: {str(e)}")
+
+
+def _scheduler_loop(app, worker_id, stop_event):
+    """Zamanı gelen ScheduledAnalysis kayıtlarını düzenli olarak kuyruğa ekler"""
+    from analysis_scheduler import dispatch_due_schedules, SCHEDULER_TICK_SECONDS
+    # İşçiler aynı anda başlasa bile turlar birbirine denk gelmesin
+    stop_event.wait(random.uniform(0, SCHEDULER_TICK_SECONDS))
+    while not stop_event.is_set():
+        try:
+            with app.app_context():
+                dispatched = dispatch_due_schedules()
+            if dispatched:
+                print(f"[{worker_id}] {dispatched} zamanlanmış analiz kuyruğa eklendi")
+        except Exception as e:
+            print(f"[{worker_id}] Zamanlayıcı hatası: {str(e)}")
+        stop_event.wait(SCHEDULER_TICK_SECONDS)
+
+
+def run_worker(worker_index):
+    """Kuyruktan iş alıp analizleri çalıştıran işçi döngüsü"""
+    # Uygulama her süreçte ayrıca yüklenir, böylece veritabanı bağlantıları paylaşılmaz
+    from app import app, run_analysis, pregenerate_report
+    from rematch import rematch_project
+    from job_queue import claim_next_job, complete_job, fail_job, JOB_LEASE_SECONDS
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = threading.Event()
+
+    def handle_stop(signum, frame):
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    print(f"[{worker_id}] İşçi #{worker_index} başladı")
+
+    if SCHEDULER_ENABLED:
+        threading.Thread(target=_scheduler_loop, args=(app, worker_id, stopping), daemon=True).start()
+
+    while not stopping.is_set():
+        try:
+            with app.app_context():
+                job = claim_next_job(worker_id)
+        except Exception as e:
+            print(f"[{worker_id}] İş alma hatası: {str(e)}")
+            job = None
+
+        if job is None:
+            stopping.wait(JOB_POLL_SECONDS)
+            continue
+
+        print(f"[{worker_id}] İş #{job['id']} ({job['kind']}) başladı (proje {job['project_id']}, deneme {job['attempts']})")
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=_heartbeat,
+            args=(app, job['id'], worker_id, heartbeat_stop, max(JOB_LEASE_SECONDS / 3, 1)),
+            daemon=True
+        )
+        heartbeat.start()
+
+        error = None
+        analysis_id = None
+        try:
+            if job['kind'] == 'rematch':
+                # Arşivlenmiş yanıtlardan yeniden eşleştirme yeni analiz üretmez
+                with app.app_context():
+                    rematch_project(job['project_id'], static_folder=app.static_folder)
+            else:
+                analysis_id = run_analysis(job['project_id'], job['id'], job['attempts'])
+                if analysis_id is None:
+                    error = 'Analiz tamamlanamadı'
+        except Exception as e:
+            error = str(e)
+        finally:
+            heartbeat_stop.set()
+            heartbeat.join()
+
+        with app.app_context():
+            if error:
+                print(f"[{worker_id}] İş #{job['id']} başarısız: {error}")
+                fail_job(job['id'], worker_id, error)
+            else:
+                print(f"[{worker_id}] İş #{job['id']} tamamlandı (analiz {analysis_id})")
+                complete_job(job['id'], worker_id, analysis_id)
+
+        # Rapor iş tamamlandıktan sonra üretilir, böylece kullanıcı sonucu beklemeden görür
+        if analysis_id is not None:
+            pregenerate_report(analysis_id)
+
+    print(f"[{worker_id}] İşçi durdu")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analiz kuyruğu işçilerini çalıştırır')
+    parser.add_argument('-w', '--workers', type=int, default=JOB_WORKERS, help='İşçi süreç sayısı')
+    args = parser.parse_args()
+
+    if args.workers <= 1:
+        run_worker(0)
+        return
+
+    # Her işçi kendi Python sürecinde başlar
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=run_worker, args=(i,)) for i in range(args.workers)]
+    for process in processes:
+        process.start()
+
+    def handle_stop(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    main()